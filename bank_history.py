@@ -0,0 +1,211 @@
+# bank_history.py
+"""
+转账历史存储与时间范围查询
+
+所有转账按追加顺序存放在列式数组中，每个账户另有一份按时间排序的索引
+（时间戳数组 + 行号数组），查询某账户 [start, end) 内的转账时用 bisect
+定位区间，范围查询和分页都是 O(log n + k)，不扫描全部历史。
+
+金额按原值返回：全是 int64 范围内的整数时存在 array("q")，全是 float 时存在
+array("d")；出现其他类型（Decimal、超出 int64 的整数、整数与浮点数混用等）后
+改为普通列表保存原对象，整数不会变成浮点数，大整数也不会丢失精度。
+
+内存占用（array 紧凑存储，不含账户ID本身）：
+- 全局列：时间戳 8B + 金额 8B + 转出/转入账户序号各 4B = 24B/笔（金额改存列表后
+  每笔另加金额对象本身）
+- 账户索引：转出方和转入方各一份，时间戳 8B + 行号 4B，共 24B/笔
+合计约 48B/笔，1000 万笔约 480MB；另外每个账户有约 200B 的索引对象固定开销。
+可用 memory_usage() 查看数组实际占用。
+"""
+
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from bank import transfer
+
+TransferRecord = namedtuple("TransferRecord", "row timestamp src dst amount")
+
+
+class _AccountIndex:
+    """单个账户的时间有序索引"""
+
+    __slots__ = ("times", "rows")
+
+    def __init__(self):
+        self.times = array("d")
+        self.rows = array("I")
+
+    def add(self, timestamp, row):
+        if not self.times or self.times[-1] <= timestamp:
+            self.times.append(timestamp)
+            self.rows.append(row)
+        else:
+            # 乱序到达的记录按时间插入，代价 O(n)，正常情况下不会发生
+            pos = bisect_right(self.times, timestamp)
+            self.times.insert(pos, timestamp)
+            self.rows.insert(pos, row)
+
+
+class TransferHistory:
+    """
+    转账历史
+
+    用法：
+        history = TransferHistory()
+        history.transfer("1001", account_a, "1002", account_b, 30)
+        history.query("1001", start, end, offset=0, limit=50)
+    """
+
+    def __init__(self, clock=time.time):
+        """:param clock: 时钟函数，返回秒"""
+        self.clock = clock
+        self._times = array("d")
+        self._amounts = array("q")  # 见模块说明，也可能是 array("d") 或列表
+        self._src = array("I")
+        self._dst = array("I")
+        self._ids = []          # 账户序号 -> 账户ID
+        self._seq = {}          # 账户ID -> 账户序号
+        self._indexes = []      # 账户序号 -> _AccountIndex
+
+    def __len__(self):
+        return len(self._times)
+
+    def _account(self, account_id) -> int:
+        seq = self._seq.get(account_id)
+        if seq is None:
+            seq = len(self._ids)
+            self._seq[account_id] = seq
+            self._ids.append(account_id)
+            self._indexes.append(_AccountIndex())
+        return seq
+
+    def record(self, src_id, dst_id, amount, timestamp: float = None) -> int:
+        """
+        记录一笔转账
+        :return: 行号
+        """
+        if timestamp is None:
+            timestamp = self.clock()
+        row = len(self._times)
+        s = self._account(src_id)
+        d = self._account(dst_id)
+        self._times.append(timestamp)
+        self._append_amount(amount)
+        self._src.append(s)
+        self._dst.append(d)
+        self._indexes[s].add(timestamp, row)
+        if d != s:
+            self._indexes[d].add(timestamp, row)
+        return row
+
+    def _append_amount(self, amount):
+        """按金额类型选择存储，保证原值原样返回"""
+        amounts = self._amounts
+        if amounts.__class__ is array:
+            if amount.__class__ is float:
+                if not amounts and amounts.typecode == "q":
+                    amounts = self._amounts = array("d")
+                if amounts.typecode == "d":
+                    amounts.append(amount)
+                    return
+            elif amount.__class__ is int and amounts.typecode == "q":
+                try:
+                    amounts.append(amount)
+                    return
+                except OverflowError:
+                    pass
+            amounts = self._amounts = list(amounts)
+        amounts.append(amount)
+
+    def transfer(self, src_id, account_a, dst_id, account_b, amount, timestamp: float = None):
+        """
+        调用 bank.transfer，成功后记入历史
+        :return: True  转账成功
+        :raises: ValueError 金额非法或余额不足
+        """
+        result = transfer(account_a, account_b, amount)
+        self.record(src_id, dst_id, amount, timestamp)
+        return result
+
+    def get(self, row: int) -> TransferRecord:
+        """按行号取一条记录"""
+        return TransferRecord(row, self._times[row], self._ids[self._src[row]],
+                              self._ids[self._dst[row]], self._amounts[row])
+
+    def _range(self, account_id, start, end):
+        seq = self._seq.get(account_id)
+        if seq is None:
+            return None, 0, 0
+        index = self._indexes[seq]
+        lo = 0 if start is None else bisect_left(index.times, start)
+        hi = len(index.times) if end is None else bisect_left(index.times, end, lo)
+        return index, lo, hi
+
+    def count(self, account_id, start: float = None, end: float = None) -> int:
+        """账户在 [start, end) 内的转账笔数，O(log n)"""
+        _, lo, hi = self._range(account_id, start, end)
+        return hi - lo
+
+    def query(self, account_id, start: float = None, end: float = None,
+              offset: int = 0, limit: int = None, reverse: bool = False) -> list:
+        """
+        查询账户在 [start, end) 内的转账（转出和转入），按时间排序
+        :param offset: 跳过前 offset 条
+        :param limit: 最多返回 limit 条，None 表示不限
+        :param reverse: 为 True 时按时间倒序
+        :return: [TransferRecord, ...]
+        :raises: ValueError offset 或 limit 不是非负整数
+        """
+        if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+            raise ValueError("offset必须为非负整数")
+        if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 0):
+            raise ValueError("limit必须为非负整数")
+        index, lo, hi = self._range(account_id, start, end)
+        if index is None:
+            return []
+        if reverse:
+            hi -= offset
+            if limit is not None:
+                lo = max(lo, hi - limit)
+            positions = range(hi - 1, lo - 1, -1)
+        else:
+            lo += offset
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            positions = range(lo, hi)
+        return [self.get(index.rows[i]) for i in positions]
+
+    def memory_usage(self) -> int:
+        """列数组和索引数组占用的字节数（不含账户ID和字典本身，金额为列表时不含金额对象）"""
+        total = sum(a.itemsize * len(a) for a in (self._times, self._src, self._dst))
+        amounts = self._amounts
+        total += amounts.itemsize * len(amounts) if amounts.__class__ is array else sys.getsizeof(amounts)
+        for index in self._indexes:
+            total += index.times.itemsize * len(index.times) + index.rows.itemsize * len(index.rows)
+        return total
+
+
+if __name__ == "__main__":
+    # 内存与查询速度测试：python bank_history.py [转账笔数] [账户数]
+    import random
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_accounts = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    rng = random.Random(1)
+    history = TransferHistory()
+    start = time.perf_counter()
+    for i in range(n):
+        history.record(rng.randrange(n_accounts), rng.randrange(n_accounts), 1.0, float(i))
+    elapsed = time.perf_counter() - start
+    print(f"写入 {n:,} 笔: {n / elapsed:,.0f} 笔/秒")
+    print(f"数组占用: {history.memory_usage() / n:.1f} B/笔, 共 {history.memory_usage() / 2**20:,.0f} MB")
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        t = rng.uniform(0, n)
+        history.query(rng.randrange(n_accounts), t, t + n / 10, limit=20)
+    elapsed = time.perf_counter() - start
+    print(f"范围查询: {100_000 / elapsed:,.0f} 次/秒")
@@ -0,0 +1,174 @@
+# bank_limits.py
+"""
+转账限额（速度检查）
+
+在 bank.transfer 之上按账户做滑动窗口限制，例如：
+- 任意 60 秒内转出总额不超过 X；
+- 每分钟最多 N 笔转账。
+
+每个账户只保存固定数量的时间桶（环形数组），检查和记录都只动当前桶和
+已过期的桶，均摊 O(1)，内存与转账历史长度无关。
+
+金额按最小货币单位（默认为分）换算成整数后累加，反复加减浮点数不会产生误差，
+恰好用满额度的转账不会被误拒。
+"""
+
+import time
+
+from bank import transfer
+
+
+class TransferLimitExceededError(ValueError):
+    """超出转账限额异常"""
+    pass
+
+
+class SlidingWindowLimit:
+    """
+    分桶滑动窗口限额
+
+    窗口被切成 buckets 个等宽的桶，另外多保留一个桶保证统计范围不小于窗口：
+    判定时最多多算一个桶宽度的历史，宁严勿宽。
+    """
+
+    def __init__(self, window: float = 60, max_amount=None, max_count: int = None,
+                 buckets: int = 60, digits: int = 2):
+        """
+        :param window: 窗口长度（秒）
+        :param max_amount: 窗口内转出总额上限，None 表示不限
+        :param max_count: 窗口内转账笔数上限，None 表示不限
+        :param buckets: 桶数量，越多越精确，单账户内存越大
+        :param digits: 最小货币单位的小数位数，金额四舍六入五成双到这一位后按整数累加
+        """
+        if window <= 0 or buckets <= 0:
+            raise ValueError("窗口长度和桶数量必须为正数")
+        if digits < 0:
+            raise ValueError("小数位数不能为负数")
+        if max_amount is None and max_count is None:
+            raise ValueError("至少需要设置一种限额")
+        self.window = window
+        self.max_amount = max_amount
+        self.max_count = max_count
+        self.width = window / buckets
+        self.slots = buckets + 1
+        self._scale = 10 ** digits
+        self._max_units = None if max_amount is None else self._units(max_amount)
+        # 账户ID -> [最新桶序号, 总额, 笔数, 各桶金额, 各桶笔数]，金额为最小货币单位的整数
+        self._state = {}
+
+    def _units(self, amount) -> int:
+        """金额换算成最小货币单位的整数"""
+        if amount.__class__ is int:
+            return amount * self._scale
+        return round(amount * self._scale)
+
+    def _advance(self, account_id, now):
+        """取出账户状态，并清空已滑出窗口的桶"""
+        idx = int(now // self.width)
+        state = self._state.get(account_id)
+        if state is None:
+            state = [idx, 0, 0, [0] * self.slots, [0] * self.slots]
+            self._state[account_id] = state
+            return state
+
+        last = state[0]
+        if idx <= last:
+            # 时钟回拨时计入当前桶
+            return state
+        amounts, counts = state[3], state[4]
+        if idx - last >= self.slots:
+            for i in range(self.slots):
+                amounts[i] = 0
+                counts[i] = 0
+            state[1] = 0
+            state[2] = 0
+        else:
+            for i in range(last + 1, idx + 1):
+                slot = i % self.slots
+                state[1] -= amounts[slot]
+                state[2] -= counts[slot]
+                amounts[slot] = 0
+                counts[slot] = 0
+        state[0] = idx
+        return state
+
+    def check(self, account_id, amount, now: float):
+        """
+        检查本次转账是否会超限
+        :raises: TransferLimitExceededError 超出限额
+        """
+        state = self._advance(account_id, now)
+        if self._max_units is not None and state[1] + self._units(amount) > self._max_units:
+            raise TransferLimitExceededError(
+                f"账户{account_id}在{self.window}秒内转出金额超过{self.max_amount}")
+        if self.max_count is not None and state[2] + 1 > self.max_count:
+            raise TransferLimitExceededError(
+                f"账户{account_id}在{self.window}秒内转账笔数超过{self.max_count}")
+
+    def record(self, account_id, amount, now: float):
+        """记录一笔已成功的转账"""
+        state = self._advance(account_id, now)
+        slot = state[0] % self.slots
+        units = self._units(amount)
+        state[1] += units
+        state[2] += 1
+        state[3][slot] += units
+        state[4][slot] += 1
+
+    def prune(self, now: float) -> int:
+        """
+        删除整个窗口内都没有转账的账户状态
+        :return: 删除的账户数量
+        """
+        idx = int(now // self.width)
+        expired = [acc for acc, state in self._state.items()
+                   if idx - state[0] >= self.slots]
+        for acc in expired:
+            del self._state[acc]
+        return len(expired)
+
+
+class TransferLimiter:
+    """
+    带限额的转账
+
+    用法：
+        limiter = TransferLimiter(
+            SlidingWindowLimit(60, max_amount=5000),
+            SlidingWindowLimit(60, max_count=10),
+        )
+        limiter.transfer("1001", account_a, account_b, 100)
+    """
+
+    def __init__(self, *limits, clock=time.monotonic):
+        """
+        :param limits: 若干 SlidingWindowLimit，全部满足才允许转账
+        :param clock: 时钟函数，返回秒
+        """
+        self.limits = limits
+        self.clock = clock
+
+    def transfer(self, account_id, account_a, account_b, amount, now: float = None):
+        """
+        先检查限额，再调用 bank.transfer，成功后计入窗口
+        :param account_id: 转出账户ID，限额按它统计
+        :return: True  转账成功
+        :raises: TransferLimitExceededError 超出限额
+                 ValueError 金额非法或余额不足
+        """
+        if now is None:
+            now = self.clock()
+        # 金额非法的转账交给 transfer 报错，不占用限额
+        if amount > 0:
+            for limit in self.limits:
+                limit.check(account_id, amount, now)
+        result = transfer(account_a, account_b, amount)
+        for limit in self.limits:
+            limit.record(account_id, amount, now)
+        return result
+
+    def prune(self, now: float = None) -> int:
+        """清理所有限额中已过期的账户状态"""
+        if now is None:
+            now = self.clock()
+        return sum(limit.prune(now) for limit in self.limits)
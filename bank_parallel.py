@@ -0,0 +1,255 @@
+# bank_parallel.py
+"""
+分片并行转账执行器
+
+把账户按分片划分给多个工作进程，每个进程独占自己分片内账户的余额：
+- 同分片转账直接在所属进程内调用 bank.transfer 执行，各分片之间并行；
+- 跨分片转账走两阶段 预留(reserve)/提交(commit) 协议：
+  源分片按顺序扣款并把结果告知协调者，目标分片拿到预留成功的结果后再入账。
+
+每个账户上的操作保持全局顺序，尚未得知预留结果的入账以及依赖它的后续操作
+推迟到下一轮，因此最终余额和每笔转账的结果与顺序执行完全一致。
+"""
+
+import multiprocessing
+import zlib
+
+from bank import transfer
+
+# 分片内操作类型
+_LOCAL = 0
+_RESERVE = 1
+_COMMIT = 2
+
+
+def default_shard_of(account_id, num_shards: int) -> int:
+    """稳定的分片函数：不依赖进程内随机化的 hash()"""
+    return zlib.crc32(str(account_id).encode("utf-8")) % num_shards
+
+
+def apply_sequential(accounts: dict, transfers) -> list:
+    """
+    顺序执行一批转账，作为并行执行的参照语义
+    :param accounts: {账户ID: {"balance": 余额}}，原地修改
+    :param transfers: [(转出账户ID, 转入账户ID, 金额), ...]
+    :return: 每笔转账的结果，成功为 True，失败为 ValueError 的错误信息
+    """
+    results = []
+    for src, dst, amount in transfers:
+        try:
+            results.append(transfer(accounts[src], accounts[dst], amount))
+        except ValueError as e:
+            results.append(str(e))
+    return results
+
+
+def _run_shard_ops(balances, pending, resolved, results, reserved, commutative):
+    """
+    按顺序扫描分片内尚未完成的操作，能确定结果的立即执行，其余留到下一轮
+
+    同一账户上的操作保持全局顺序：某账户出现被推迟的扣款后，其后所有涉及该账户
+    的操作都推迟。commutative 为 True（金额和余额都是整数）时入账可交换，
+    有未决入账的账户只要余额已足够，扣款就一定成功，可以直接执行；
+    否则有未决入账的账户上的后续操作一律推迟。
+    :return: 推迟到下一轮的操作列表
+    """
+    deferred = []
+    blocked = set()
+    incoming = set()
+    hold = {"balance": 0}
+    for op in pending:
+        kind, seq, src, dst, amount = op
+        if kind == _COMMIT:
+            if seq not in resolved or (blocked and dst in blocked):
+                deferred.append(op)
+                incoming.add(dst)
+                if not commutative:
+                    blocked.add(dst)
+            elif resolved.pop(seq) is True:
+                balances[dst]["balance"] += amount
+            continue
+
+        # 本地转账和预留都要从 src 扣款，本地转账还要向 dst 入账
+        local = kind == _LOCAL
+        account = balances[src]
+        wait = False
+        if blocked:
+            wait = src in blocked or (local and dst in blocked)
+        if incoming and not wait:
+            if commutative:
+                # 余额不足，但之前还有未决入账时结果不确定
+                wait = src in incoming and 0 < amount and account["balance"] < amount
+            else:
+                wait = src in incoming or (local and dst in incoming)
+        if wait:
+            deferred.append(op)
+            blocked.add(src)
+            if local:
+                incoming.add(dst)
+                if not commutative:
+                    blocked.add(dst)
+            continue
+
+        # 本地转账直接入账；预留时扣款放入预留账户，校验规则与错误信息与 transfer 一致
+        try:
+            results[seq] = transfer(account, balances[dst] if local else hold, amount)
+        except ValueError as e:
+            results[seq] = str(e)
+        if not local:
+            reserved[seq] = results[seq]
+    return deferred
+
+
+def _shard_worker(conn, balances, ops, commutative):
+    """工作进程主循环：每轮接收新到的预留结果，返回本轮产生的预留结果"""
+    pending = ops
+    resolved = {}
+    results = {}
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        resolved.update(msg)
+        reserved = {}
+        pending = _run_shard_ops(balances, pending, resolved, results, reserved, commutative)
+        if not pending:
+            conn.send((True, reserved, results, balances))
+        else:
+            conn.send((False, reserved, None, None))
+    conn.close()
+
+
+class ParallelTransferExecutor:
+    """
+    分片并行转账执行器
+
+    用法：
+        executor = ParallelTransferExecutor(num_shards=8)
+        results = executor.run(accounts, transfers)
+    """
+
+    def __init__(self, num_shards: int = None, shard_of=None):
+        """
+        :param num_shards: 分片（工作进程）数量，默认等于 CPU 核数
+        :param shard_of: 分片函数 shard_of(account_id, num_shards) -> int
+        """
+        if num_shards is None:
+            num_shards = multiprocessing.cpu_count()
+        if num_shards <= 0:
+            raise ValueError("分片数量必须为正数")
+        self.num_shards = num_shards
+        self.shard_of = shard_of or default_shard_of
+
+    def plan(self, accounts: dict, transfers):
+        """
+        把账户和转账拆分到各分片
+        :return: (账户所属分片, 每个分片的账户, 每个分片的操作列表)
+        :raises: KeyError 转账引用了不存在的账户
+        """
+        n = self.num_shards
+        owner = {acc: self.shard_of(acc, n) for acc in accounts}
+        shard_accounts = [{} for _ in range(n)]
+        for acc, shard in owner.items():
+            shard_accounts[shard][acc] = {"balance": accounts[acc]["balance"]}
+
+        shard_ops = [[] for _ in range(n)]
+        for seq, (src, dst, amount) in enumerate(transfers):
+            if src not in owner or dst not in owner:
+                raise KeyError(f"转账{seq}引用了不存在的账户")
+            s, d = owner[src], owner[dst]
+            if s == d:
+                shard_ops[s].append((_LOCAL, seq, src, dst, amount))
+            else:
+                shard_ops[s].append((_RESERVE, seq, src, dst, amount))
+                shard_ops[d].append((_COMMIT, seq, src, dst, amount))
+        return owner, shard_accounts, shard_ops
+
+    def run(self, accounts: dict, transfers) -> list:
+        """
+        并行执行一批转账，结果与 apply_sequential 完全一致
+        :param accounts: {账户ID: {"balance": 余额}}，执行结束后原地更新余额
+        :param transfers: [(转出账户ID, 转入账户ID, 金额), ...]
+        :return: 每笔转账的结果，成功为 True，失败为 ValueError 的错误信息
+        """
+        transfers = list(transfers)
+        owner, shard_accounts, shard_ops = self.plan(accounts, transfers)
+
+        # 整数金额下入账顺序不影响结果，可以放宽同一账户上的入账顺序
+        commutative = all(type(t[2]) is int for t in transfers) and \
+            all(type(acc["balance"]) is int for acc in accounts.values())
+
+        ctx = multiprocessing.get_context()
+        conns, procs = [], []
+        for i in range(self.num_shards):
+            parent, child = ctx.Pipe()
+            p = ctx.Process(target=_shard_worker,
+                            args=(child, shard_accounts[i], shard_ops[i], commutative),
+                            daemon=True)
+            p.start()
+            child.close()
+            conns.append(parent)
+            procs.append(p)
+
+        results = [None] * len(transfers)
+        try:
+            # 每个分片待投递的预留结果
+            outbox = [{} for _ in range(self.num_shards)]
+            running = set(range(self.num_shards))
+            while running:
+                for i in running:
+                    conns[i].send(outbox[i])
+                    outbox[i] = {}
+                finished = []
+                progressed = False
+                for i in running:
+                    done, reserved, shard_results, balances = conns[i].recv()
+                    for seq, outcome in reserved.items():
+                        progressed = True
+                        outbox[owner[transfers[seq][1]]][seq] = outcome
+                    if done:
+                        finished.append(i)
+                        for seq, outcome in shard_results.items():
+                            results[seq] = outcome
+                        for acc, state in balances.items():
+                            accounts[acc]["balance"] = state["balance"]
+                if not finished and not progressed:
+                    raise RuntimeError("分片执行陷入停滞")
+                running.difference_update(finished)
+        finally:
+            for conn in conns:
+                try:
+                    conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                conn.close()
+            for p in procs:
+                p.join()
+        return results
+
+
+if __name__ == "__main__":
+    # 简单吞吐量测试：python bank_parallel.py [账户数] [转账笔数]
+    import random
+    import sys
+    import time
+
+    n_accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_transfers = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    rng = random.Random(42)
+    base = {i: {"balance": 100_000} for i in range(n_accounts)}
+    batch = [(rng.randrange(n_accounts), rng.randrange(n_accounts), rng.randint(1, 500))
+             for _ in range(n_transfers)]
+
+    seq_accounts = {k: dict(v) for k, v in base.items()}
+    start = time.perf_counter()
+    expected = apply_sequential(seq_accounts, batch)
+    elapsed = time.perf_counter() - start
+    print(f"顺序执行: {n_transfers / elapsed:,.0f} 笔/秒")
+
+    for shards in (1, 2, 4, 8):
+        par_accounts = {k: dict(v) for k, v in base.items()}
+        start = time.perf_counter()
+        got = ParallelTransferExecutor(shards).run(par_accounts, batch)
+        elapsed = time.perf_counter() - start
+        assert got == expected and par_accounts == seq_accounts
+        print(f"{shards} 分片: {n_transfers / elapsed:,.0f} 笔/秒")
@@ -1,4 +1,6 @@
 # library.py
+import threading
+
 class UserNotExistError(Exception):
     """用户不存在异常"""
     pass
@@ -11,6 +13,10 @@ class NoStockError(Exception):
     """库存为0异常"""
     pass
 
+class NoLoanError(Exception):
+    """用户没有借这本书"""
+    pass
+
 # 模拟数据库
 USERS = {"1001": "Alice", "1002": "Bob"}
 BOOKS = {
@@ -18,6 +24,27 @@ BOOKS = {
     "978-7-111-12345-6": {"title": "算法导论", "stock": 0},
 }
 
+# 批量借书的单项结果
+BORROW_OK = "ok"
+BORROW_NO_USER = "user_not_exist"
+BORROW_NO_BOOK = "book_not_exist"
+BORROW_NO_STOCK = "no_stock"
+BORROW_ABORTED = "aborted"  # 全部成功模式下，因其他项失败而未执行
+
+# 在借记录：(用户编号, ISBN) -> 在借本数，还书时必须有对应的借阅
+LOANS = {}
+
+# 库存和在借记录的检查与修改在这把锁内进行，监听器在锁外通知
+_LOCK = threading.Lock()
+
+# 借还事件监听器，调用方式 listener(event, user_id, book_isbn)，event 为 "borrow" 等
+LISTENERS = []
+
+def _notify(event: str, user_id: str, book_isbn: str):
+    """通知监听器（索引、借阅记录等）库存发生了变化"""
+    for listener in LISTENERS:
+        listener(event, user_id, book_isbn)
+
 def borrow_book(user_id: str, book_isbn: str):
     """
     借书主逻辑
@@ -31,9 +58,117 @@ def borrow_book(user_id: str, book_isbn: str):
     if book_isbn not in BOOKS:
         raise BookNotExistError(f"图书{book_isbn}不存在")
 
-    if BOOKS[book_isbn]["stock"] <= 0:
-        raise NoStockError(f"图书{book_isbn}库存为0")
+    with _LOCK:
+        if BOOKS[book_isbn]["stock"] <= 0:
+            raise NoStockError(f"图书{book_isbn}库存为0")
+
+        # 借书成功
+        BOOKS[book_isbn]["stock"] -= 1
+        key = (user_id, book_isbn)
+        LOANS[key] = LOANS.get(key, 0) + 1
+    _notify("borrow", user_id, book_isbn)
+    return True
+
+def return_book(user_id: str, book_isbn: str):
+    """
+    还书主逻辑，用户必须有这本书的在借记录
+    :param user_id: 用户编号
+    :param book_isbn: 图书ISBN
+    :raises: 对应异常；没有在借记录时抛出 NoLoanError，库存不变
+    """
+    if user_id not in USERS:
+        raise UserNotExistError(f"用户{user_id}不存在")
+
+    if book_isbn not in BOOKS:
+        raise BookNotExistError(f"图书{book_isbn}不存在")
+
+    key = (user_id, book_isbn)
+    with _LOCK:
+        count = LOANS.get(key, 0)
+        if count <= 0:
+            raise NoLoanError(f"用户{user_id}没有借图书{book_isbn}")
+
+        # 还书成功
+        if count == 1:
+            del LOANS[key]
+        else:
+            LOANS[key] = count - 1
+        BOOKS[book_isbn]["stock"] += 1
+    _notify("return", user_id, book_isbn)
+    return True
+
+def borrow_books(user_id: str, book_isbns, all_or_nothing: bool = False) -> list:
+    """
+    批量借书：只检查一次用户，一趟校验所有ISBN，不抛异常
+    :param user_id: 用户编号
+    :param book_isbns: 图书ISBN列表，同一ISBN出现多次表示借多本
+    :param all_or_nothing: 为 True 时只要有一项失败就全部不借
+    :return: 每一项的结果码 BORROW_OK / BORROW_NO_USER / BORROW_NO_BOOK /
+             BORROW_NO_STOCK / BORROW_ABORTED
+    """
+    book_isbns = list(book_isbns)
+    if user_id not in USERS:
+        return [BORROW_NO_USER] * len(book_isbns)
+
+    results = []
+    taken = {}  # 本批次每个ISBN已占用的数量
+    failed = False
+    with _LOCK:
+        for isbn in book_isbns:
+            book = BOOKS.get(isbn)
+            if book is None:
+                results.append(BORROW_NO_BOOK)
+                failed = True
+                continue
+            count = taken.get(isbn, 0)
+            if book["stock"] - count <= 0:
+                results.append(BORROW_NO_STOCK)
+                failed = True
+                continue
+            taken[isbn] = count + 1
+            results.append(BORROW_OK)
+
+        if failed and all_or_nothing:
+            return [BORROW_ABORTED if r == BORROW_OK else r for r in results]
+
+        for isbn, count in taken.items():
+            BOOKS[isbn]["stock"] -= count
+            key = (user_id, isbn)
+            LOANS[key] = LOANS.get(key, 0) + count
+    if LISTENERS:
+        for isbn, result in zip(book_isbns, results):
+            if result == BORROW_OK:
+                _notify("borrow", user_id, isbn)
+    return results
+
+
+if __name__ == "__main__":
+    # 批量借书与逐本调用 borrow_book 的对比：python library.py [本数]
+    import sys
+    import time
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    # 一半借成功，一半因不存在或无库存失败
+    queue = [f"isbn-{i % 1000}" if i % 2 == 0 else f"missing-{i}" if i % 4 == 1 else "isbn-empty"
+             for i in range(n)]
+
+    def reset():
+        BOOKS.clear()
+        BOOKS.update({f"isbn-{i}": {"title": f"图书{i}", "stock": n} for i in range(1000)})
+        BOOKS["isbn-empty"] = {"title": "无库存", "stock": 0}
+
+    reset()
+    start = time.perf_counter()
+    for isbn in queue:
+        try:
+            borrow_book("1001", isbn)
+        except (UserNotExistError, BookNotExistError, NoStockError):
+            pass
+    loop = time.perf_counter() - start
 
-    # 借书成功
-    BOOKS[book_isbn]["stock"] -= 1
-    return True
\ No newline at end of file
+    reset()
+    start = time.perf_counter()
+    borrow_books("1001", queue)
+    batch = time.perf_counter() - start
+    print(f"逐本 borrow_book: {loop * 1000:.1f} ms, borrow_books: {batch * 1000:.1f} ms, "
+          f"加速 {loop / batch:.1f} 倍")
\ No newline at end of file
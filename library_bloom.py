@@ -0,0 +1,258 @@
+# library_bloom.py
+"""
+布隆过滤器：快速排除不在目录中的 ISBN
+
+扫码借书时相当一部分条码并不在目录里，最后以 BookNotExistError 结束。
+目录放到磁盘或数据库后，每次未命中都要付出一次完整查询。布隆过滤器在内存中
+用少量比特回答“一定不存在 / 可能存在”，大部分未命中无需访问目录。
+
+- BloomFilter：按容量和期望误判率计算比特数和哈希次数，支持增量添加；
+- BloomGuardedCatalog：包在任意 {ISBN: 记录} 映射外面，未命中的 ISBN 直接返回；
+- SQLiteLibrary(bloom=...) 在借书前先查过滤器，见 library_sqlite.py。
+
+导入时把 filter.update 作为 library_import.import_books 的 on_chunk 回调即可
+增量更新；元素数超过容量后误判率上升，应调用 rebuild 按新容量重建。
+哈希基于内置 hash()，只在当前进程内有效，不能持久化。
+
+添加在锁内进行，不会因为并发的“读-改-写”丢失比特；比特数组、大小和计数放在
+同一个状态对象里，rebuild 在旁边建好新状态后一次性替换引用，查询不加锁，
+总是看到一份自洽的状态。重建期间的添加照常写入旧状态，同时被记录下来，
+替换前补进新状态，不会丢失。
+"""
+
+import math
+import threading
+from collections.abc import MutableMapping
+
+_MASK = (1 << 64) - 1
+
+
+class _State:
+    """过滤器的一代状态，只在持有 BloomFilter 的锁时修改"""
+
+    __slots__ = ("capacity", "num_bits", "num_hashes", "bits", "count")
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def add(self, h1: int, h2: int):
+        bits, m = self.bits, self.num_bits
+        changed = False
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % m
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                changed = True
+        # 所有比特都已置位的键视为已存在，重复添加同一个键不重复计数
+        if changed:
+            self.count += 1
+
+    def add_many(self, hashes):
+        """批量添加 [(h1, h2), ...]，与逐个 add 结果相同"""
+        bits, m, k = self.bits, self.num_bits, self.num_hashes
+        added = 0
+        for h1, h2 in hashes:
+            changed = False
+            for i in range(k):
+                pos = (h1 + i * h2) % m
+                mask = 1 << (pos & 7)
+                if not bits[pos >> 3] & mask:
+                    bits[pos >> 3] |= mask
+                    changed = True
+            added += changed
+        self.count += added
+
+
+class BloomFilter:
+    """
+    布隆过滤器，线程安全
+
+    count 为添加过的不同元素数的估计：与已有元素全部比特冲突的新元素（即误判的那部分）
+    不计入，所以可能略少于实际值。
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        :param capacity: 预计元素数量
+        :param error_rate: 元素数不超过 capacity 时的期望误判率
+        """
+        if capacity <= 0:
+            raise ValueError("容量必须为正数")
+        if not 0 < error_rate < 1:
+            raise ValueError("误判率必须在 0 和 1 之间")
+        self.error_rate = error_rate
+        self._state = _State(capacity, error_rate)
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()  # 同一时间只有一次重建
+        self._pending = None  # 重建期间添加的 (h1, h2)，替换前补进新状态
+
+    @property
+    def capacity(self) -> int:
+        return self._state.capacity
+
+    @property
+    def num_bits(self) -> int:
+        return self._state.num_bits
+
+    @property
+    def num_hashes(self) -> int:
+        return self._state.num_hashes
+
+    @property
+    def count(self) -> int:
+        return self._state.count
+
+    @classmethod
+    def from_keys(cls, keys, error_rate: float = 0.01, capacity: int = None):
+        """根据已有的键构建，容量默认为键的数量"""
+        keys = list(keys)
+        bloom = cls(capacity or max(1, len(keys)), error_rate)
+        bloom.update(keys)
+        return bloom
+
+    def _hashes(self, key):
+        # 双重哈希：h1 + i * h2 模拟 k 个独立哈希
+        h1 = hash(key) & _MASK
+        h2 = (hash((key, 0x9E3779B9)) & _MASK) | 1
+        return h1, h2
+
+    def add(self, key):
+        """添加一个元素"""
+        h1, h2 = self._hashes(key)
+        with self._lock:
+            self._state.add(h1, h2)
+            if self._pending is not None:
+                self._pending.append((h1, h2))
+
+    def update(self, keys):
+        """批量添加，可直接作为 import_books 的 on_chunk 回调"""
+        hashes = [self._hashes(key) for key in keys]
+        with self._lock:
+            self._state.add_many(hashes)
+            if self._pending is not None:
+                self._pending.extend(hashes)
+
+    def __contains__(self, key) -> bool:
+        h1, h2 = self._hashes(key)
+        state = self._state
+        bits, m = state.bits, state.num_bits
+        for i in range(state.num_hashes):
+            pos = (h1 + i * h2) % m
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    @property
+    def saturated(self) -> bool:
+        """元素数超过容量，误判率已高于设定值"""
+        state = self._state
+        return state.count > state.capacity
+
+    def rebuild(self, keys, capacity: int = None):
+        """
+        按新容量（默认为当前元素数的两倍）清空并重建
+
+        新状态在锁外建好后一次性替换，查询和添加期间一直使用旧状态；
+        开始重建之后的添加会补进新状态。keys 须包含开始重建之前添加的所有应保留的元素
+        """
+        with self._rebuild_lock:
+            with self._lock:
+                self._pending = []
+            try:
+                keys = list(keys)
+                fresh = _State(capacity or max(1, 2 * len(keys)), self.error_rate)
+                fresh.add_many([self._hashes(key) for key in keys])
+            except BaseException:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                fresh.add_many(self._pending)
+                self._pending = None
+                self._state = fresh
+
+
+class BloomGuardedCatalog(MutableMapping):
+    """
+    带布隆过滤器的目录
+
+    用法：
+        library.BOOKS = BloomGuardedCatalog(disk_catalog, error_rate=0.001)
+    """
+
+    def __init__(self, catalog, error_rate: float = 0.01, capacity: int = None):
+        """
+        :param catalog: 底层目录，任意 {ISBN: 记录} 映射
+        :param capacity: 过滤器容量，默认为当前目录大小的两倍
+        """
+        self.catalog = catalog
+        self.bloom = BloomFilter(capacity or max(1024, 2 * len(catalog)), error_rate)
+        self.bloom.update(catalog)
+
+    def __contains__(self, isbn):
+        return isbn in self.bloom and isbn in self.catalog
+
+    def __getitem__(self, isbn):
+        if isbn not in self.bloom:
+            raise KeyError(isbn)
+        return self.catalog[isbn]
+
+    def __setitem__(self, isbn, book):
+        self.catalog[isbn] = book
+        # 即使过滤器已判定“可能存在”也要添加：可能是误判，而进行中的重建不一定包含这个键；
+        # 重复添加不改变比特也不增加计数
+        self.bloom.add(isbn)
+        if self.bloom.saturated:
+            self.bloom.rebuild(self.catalog)
+
+    def __delitem__(self, isbn):
+        # 过滤器不支持删除，留下的比特只会让以后的未命中多查一次底层目录
+        del self.catalog[isbn]
+
+    def __iter__(self):
+        return iter(self.catalog)
+
+    def __len__(self):
+        return len(self.catalog)
+
+
+if __name__ == "__main__":
+    # 未命中路径测速：python library_bloom.py [图书数量] [查询次数]
+    import os
+    import sys
+    import tempfile
+    import time
+
+    from library import BookNotExistError
+    from library_sqlite import SQLiteLibrary
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    books = {f"978-7-{i:08d}-0": {"title": f"图书{i}", "stock": 1} for i in range(n)}
+    misses = [f"978-9-{i:08d}-0" for i in range(lookups)]
+
+    start = time.perf_counter()
+    bloom = BloomFilter.from_keys(books, error_rate=0.01)
+    print(f"构建过滤器: {time.perf_counter() - start:.2f}s, {len(bloom._state.bits) / 2**20:.1f} MB, "
+          f"k={bloom.num_hashes}")
+    false_positives = sum(isbn in bloom for isbn in misses)
+    print(f"实测误判率: {false_positives / lookups:.4f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, guard in (("无过滤器", None), ("布隆过滤器", bloom)):
+            with SQLiteLibrary(os.path.join(tmp, "library.db"), bloom=guard) as lib:
+                if guard is None:
+                    lib.load({"1001": "Alice"}, books)
+                start = time.perf_counter()
+                for isbn in misses:
+                    try:
+                        lib.borrow_book("1001", isbn)
+                    except BookNotExistError:
+                        pass
+                elapsed = time.perf_counter() - start
+                print(f"SQLite 未命中 {name}: {lookups / elapsed:,.0f} 次/秒")
@@ -0,0 +1,165 @@
+# library_circulation.py
+"""
+并发借还服务
+
+library 的单次借还在它自己的锁内完成，但“先把库存分给排队读者再借出”这样的
+多步操作仍需要整体串行。这里按 ISBN 加锁，同一本书的借、还、预约串行执行；
+锁是固定数量的分段锁（按 hash(ISBN) 取模），扫到不存在的条码不会让锁表增长，
+不同的书大多互不阻塞。
+
+每本书有一个先进先出的预约队列：还回的书直接借给队首读者（O(1)），
+读者不必反复调用 borrow_book 直到不再抛 NoStockError。有人排队时，
+可借的库存（例如补货后）先分给排队的读者，临时来借的读者不能插队。
+
+借阅记录由 library.LOANS 维护，还书时没有对应借阅的请求被拒绝（NoLoanError），
+不会虚增库存。
+
+library.LISTENERS 中的监听器在持有某本书的锁时被调用，不同的书的借还事件
+可能在不同线程中同时通知，监听器须线程安全（如 library_loans.LoanLedger）。
+on_fulfilled 回调在释放锁之后调用。
+"""
+
+import threading
+from collections import deque
+
+import library
+from library import BookNotExistError, NoLoanError, NoStockError, UserNotExistError
+
+# 分段锁的数量
+LOCK_STRIPES = 64
+
+
+class CirculationService:
+    """
+    借还服务
+
+    用法：
+        service = CirculationService(on_fulfilled=notify_patron)
+        service.borrow("1001", isbn)
+        service.reserve("1002", isbn)     # 无库存时排队
+        service.return_book("1001", isbn) # 直接借给 1002，并回调 on_fulfilled
+    """
+
+    def __init__(self, on_fulfilled=None, stripes: int = LOCK_STRIPES):
+        """
+        :param on_fulfilled: 预约被满足时回调 on_fulfilled(user_id, book_isbn)
+        :param stripes: 分段锁的数量
+        """
+        if stripes <= 0:
+            raise ValueError("锁的数量必须为正数")
+        self.on_fulfilled = on_fulfilled
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._queues = {}
+
+    def _lock(self, book_isbn: str) -> threading.Lock:
+        # 同一时间只持有一把锁，不同的书共用一把锁也不会死锁
+        return self._locks[hash(book_isbn) % len(self._locks)]
+
+    def _borrow_locked(self, user_id: str, book_isbn: str):
+        """借出，调用方须持有该书的锁"""
+        return library.borrow_book(user_id, book_isbn)
+
+    def _fulfil(self, book_isbn: str) -> list:
+        """
+        把可借的库存按先后顺序分给排队的读者，调用方须持有该书的锁
+        :return: 拿到书的读者编号列表
+        """
+        fulfilled = []
+        queue = self._queues.get(book_isbn)
+        while queue and library.BOOKS[book_isbn]["stock"] > 0:
+            next_user = queue.popleft()
+            try:
+                self._borrow_locked(next_user, book_isbn)
+            except UserNotExistError:
+                # 预约后被注销的读者直接跳过
+                continue
+            fulfilled.append(next_user)
+        if queue is not None and not queue:
+            del self._queues[book_isbn]
+        return fulfilled
+
+    def _notify_fulfilled(self, book_isbn: str, fulfilled: list):
+        if self.on_fulfilled is not None:
+            for user_id in fulfilled:
+                self.on_fulfilled(user_id, book_isbn)
+
+    def borrow(self, user_id: str, book_isbn: str):
+        """
+        借书，异常与 library.borrow_book 相同；有人排队时库存先分给排队的读者，
+        分完后没有剩余库存则抛出 NoStockError
+        :return: True  借书成功
+        """
+        error = None
+        with self._lock(book_isbn):
+            fulfilled = self._fulfil(book_isbn) if book_isbn in library.BOOKS else []
+            if user_id not in fulfilled:
+                try:
+                    self._borrow_locked(user_id, book_isbn)
+                except (UserNotExistError, BookNotExistError, NoStockError) as e:
+                    error = e
+                else:
+                    # 直接借到了，不必再排队
+                    queue = self._queues.get(book_isbn)
+                    if queue and user_id in queue:
+                        queue.remove(user_id)
+                        if not queue:
+                            del self._queues[book_isbn]
+        # 先通知已分到书的预约读者，再报告本次借书的错误
+        self._notify_fulfilled(book_isbn, fulfilled)
+        if error is not None:
+            raise error
+        return True
+
+    def return_book(self, user_id: str, book_isbn: str):
+        """
+        还书；有人预约时直接借给队首读者
+        :return: 拿到这本书的预约读者编号，没有人预约时返回 None
+        :raises: 与 library.return_book 相同，没有借这本书时为 NoLoanError
+        """
+        with self._lock(book_isbn):
+            library.return_book(user_id, book_isbn)
+            fulfilled = self._fulfil(book_isbn)
+        self._notify_fulfilled(book_isbn, fulfilled)
+        return fulfilled[0] if fulfilled else None
+
+    def loans(self, user_id: str, book_isbn: str) -> int:
+        """读者借的这本书尚未归还的本数"""
+        return library.LOANS.get((user_id, book_isbn), 0)
+
+    def reserve(self, user_id: str, book_isbn: str) -> bool:
+        """
+        预约：有库存且无人排队时直接借出，否则排到队尾
+        :return: True 已直接借到，False 已进入预约队列
+        :raises: UserNotExistError / BookNotExistError
+        """
+        if user_id not in library.USERS:
+            raise UserNotExistError(f"用户{user_id}不存在")
+        if book_isbn not in library.BOOKS:
+            raise BookNotExistError(f"图书{book_isbn}不存在")
+        with self._lock(book_isbn):
+            queue = self._queues.get(book_isbn)
+            if not queue and library.BOOKS[book_isbn]["stock"] > 0:
+                return self._borrow_locked(user_id, book_isbn)
+            if queue is None:
+                queue = self._queues[book_isbn] = deque()
+            queue.append(user_id)
+            return False
+
+    def cancel_reservation(self, user_id: str, book_isbn: str) -> bool:
+        """
+        取消预约（需要在队列中查找，O(队列长度)）
+        :return: 是否取消成功
+        """
+        with self._lock(book_isbn):
+            queue = self._queues.get(book_isbn)
+            if not queue or user_id not in queue:
+                return False
+            queue.remove(user_id)
+            if not queue:
+                del self._queues[book_isbn]
+            return True
+
+    def waiting(self, book_isbn: str) -> list:
+        """预约队列中的读者，按先后顺序"""
+        with self._lock(book_isbn):
+            return list(self._queues.get(book_isbn, ()))
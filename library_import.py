@@ -0,0 +1,225 @@
+# library_import.py
+"""
+图书目录和读者的流式批量导入
+
+逐行读取 CSV/JSONL 文件，校验后按块写入 BOOKS/USERS（或任何支持 update
+的映射），源文件不会整体读入内存，内存占用只和块大小有关。
+
+文件格式（CSV 需要表头，JSONL 每行一个对象）：
+- 图书：isbn, title, stock
+- 读者：user_id, name
+"""
+
+import csv
+import json
+import os
+import time
+from operator import itemgetter
+
+import library
+
+# 被拒绝的行最多保留多少条明细，其余只计数
+MAX_REJECTS_KEPT = 100
+
+# 块内键重复时，前面的行被后面的行覆盖，按这个原因计入被拒绝的行
+DUPLICATE_REASON = "键重复，已被后面的行覆盖"
+
+
+class ImportReport:
+    """导入结果统计"""
+
+    def __init__(self):
+        self.loaded = 0          # 成功导入的行数
+        self.rejected = 0        # 被拒绝的行数（含块内被覆盖的重复行），loaded + rejected 等于读取的行数
+        self.rejects = []        # [(行号, 原因), ...]，最多 MAX_REJECTS_KEPT 条
+        self.elapsed = 0.0       # 耗时（秒）
+
+    @property
+    def rate(self) -> float:
+        """导入速度（行/秒）"""
+        return (self.loaded + self.rejected) / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, line_no: int, reason: str):
+        self.rejected += 1
+        if len(self.rejects) < MAX_REJECTS_KEPT:
+            self.rejects.append((line_no, reason))
+
+    def __repr__(self):
+        return (f"ImportReport(loaded={self.loaded}, rejected={self.rejected}, "
+                f"elapsed={self.elapsed:.2f}s, rate={self.rate:,.0f}/s)")
+
+
+def is_valid_isbn(isbn, verify_checksum: bool = False) -> bool:
+    """
+    校验 ISBN 格式：去掉连字符后为 13 位数字，或 9 位数字加一位数字/X 的 ISBN-10，
+    只接受 ASCII 数字（str.isdigit 也认全角、阿拉伯-印度数字和上标等）
+    :param verify_checksum: 是否同时校验校验位
+    """
+    if not isinstance(isbn, str):
+        return False
+    digits = isbn.replace("-", "")
+    if not digits.isascii():
+        return False
+    if len(digits) == 13 and digits.isdigit():
+        if not verify_checksum:
+            return True
+        total = sum(int(c) * (3 if i % 2 else 1) for i, c in enumerate(digits))
+        return total % 10 == 0
+    if len(digits) == 10 and digits[:9].isdigit() and (digits[9].isdigit() or digits[9] in "xX"):
+        if not verify_checksum:
+            return True
+        total = sum((10 - i) * (10 if c in "xX" else int(c)) for i, c in enumerate(digits))
+        return total % 11 == 0
+    return False
+
+
+def _detect_format(path: str, fmt: str) -> str:
+    if fmt is None:
+        fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"不支持的文件格式: {fmt}")
+    return fmt
+
+
+def iter_rows(path: str, fields: tuple, fmt: str = None):
+    """
+    流式读取文件
+    :return: 生成 (行号, 字段值元组)；缺少字段的行字段值为 None
+    """
+    fmt = _detect_format(path, fmt)
+    # utf-8-sig 去掉 Excel 等导出文件开头的 BOM，否则第一个表头字段匹配不上
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            header = [h.strip() for h in header]
+            missing = [name for name in fields if name not in header]
+            if missing:
+                raise ValueError(f"CSV表头缺少字段: {', '.join(missing)}")
+            cols = [header.index(name) for name in fields]
+            width = max(cols) + 1
+            pick = itemgetter(*cols)
+            for line_no, row in enumerate(reader, start=2):
+                if len(row) < width:
+                    yield line_no, None
+                else:
+                    yield line_no, pick(row)
+        else:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    obj = json.loads(line)
+                    values = tuple([obj[name] for name in fields])
+                except (ValueError, KeyError, TypeError):
+                    values = None
+                yield line_no, values
+
+
+def _run_import(rows, parse, target, chunk_size, on_chunk) -> ImportReport:
+    report = ImportReport()
+    start = time.perf_counter()
+    chunk = {}
+    lines = {}  # 块内每个键所在的行号，用于报告被覆盖的重复行
+    for line_no, values in rows:
+        if values is None:
+            report.reject(line_no, "格式错误或缺少字段")
+            continue
+        try:
+            key, record = parse(values)
+        except ValueError as e:
+            report.reject(line_no, str(e))
+            continue
+        previous = lines.get(key)
+        if previous is not None:
+            report.reject(previous, DUPLICATE_REASON)
+        lines[key] = line_no
+        chunk[key] = record
+        if len(chunk) >= chunk_size:
+            report.loaded += len(chunk)
+            target.update(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk)
+            chunk = {}
+            lines = {}
+    if chunk:
+        report.loaded += len(chunk)
+        target.update(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def import_books(path: str, books=None, fmt: str = None, chunk_size: int = 50_000,
+                 verify_checksum: bool = False, on_chunk=None) -> ImportReport:
+    """
+    导入图书目录
+    :param books: 目标目录，默认 library.BOOKS
+    :param chunk_size: 每块行数，块内 ISBN 重复时后者覆盖前者，前者按 DUPLICATE_REASON 计入被拒绝的行
+    :param verify_checksum: 是否校验 ISBN 校验位
+    :param on_chunk: 每写入一块后回调 on_chunk({ISBN: 记录})，用于增量更新索引等
+    :return: ImportReport
+    """
+    if books is None:
+        books = library.BOOKS
+
+    def parse(values):
+        isbn, title, stock = values
+        if not is_valid_isbn(isbn, verify_checksum):
+            raise ValueError(f"ISBN格式错误: {isbn}")
+        if not isinstance(title, str) or not title.strip():
+            raise ValueError("书名为空")
+        if isinstance(stock, str):
+            stock = stock.strip()
+            if not (stock.isascii() and stock.isdigit()):
+                raise ValueError(f"库存必须为非负整数: {stock}")
+            stock = int(stock)
+        elif not isinstance(stock, int) or isinstance(stock, bool) or stock < 0:
+            raise ValueError(f"库存必须为非负整数: {stock}")
+        return isbn, {"title": title, "stock": stock}
+
+    rows = iter_rows(path, ("isbn", "title", "stock"), fmt)
+    return _run_import(rows, parse, books, chunk_size, on_chunk)
+
+
+def import_users(path: str, users=None, fmt: str = None, chunk_size: int = 50_000,
+                 on_chunk=None) -> ImportReport:
+    """
+    导入读者
+    :param users: 目标读者表，默认 library.USERS
+    :return: ImportReport
+    """
+    if users is None:
+        users = library.USERS
+
+    def parse(values):
+        user_id, name = values
+        if isinstance(user_id, int) and not isinstance(user_id, bool):
+            user_id = str(user_id)
+        if not isinstance(user_id, str) or not user_id.strip():
+            raise ValueError("用户编号为空")
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("用户名为空")
+        return user_id, name
+
+    rows = iter_rows(path, ("user_id", "name"), fmt)
+    return _run_import(rows, parse, users, chunk_size, on_chunk)
+
+
+if __name__ == "__main__":
+    # 导入速度测试：python library_import.py [图书数量]
+    import sys
+    import tempfile
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "books.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["isbn", "title", "stock"])
+            for i in range(n):
+                writer.writerow([f"978-7-{i:08d}-0", f"图书{i}", i % 5])
+        print(import_books(path, books={}))
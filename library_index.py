@@ -0,0 +1,174 @@
+# library_index.py
+"""
+图书目录二级索引
+
+BOOKS 只能按 ISBN 查找，这里在其上维护三种索引：
+- 倒排索引：书名规范化后切分成词（拉丁字母/数字按连续片段，汉字按单字），
+  词 -> ISBN 集合，多词查询从最短的倒排表开始求交集；
+- 前缀索引：按规范化书名排序的数组，bisect 定位后顺序读出，用于自动补全；
+- 有货集合：库存大于 0 的 ISBN，用于“只看有货”过滤。
+
+索引通过 library.LISTENERS 接收借还事件，随库存变化增量更新。
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+
+import library
+
+# 汉字单独成词，其余字母数字按连续片段成词
+_CJK = "㐀-䶿一-鿿豈-﫿"
+_TOKEN_RE = re.compile(rf"[{_CJK}]|(?:(?![{_CJK}])[^\W_])+")
+
+
+def normalize(text: str) -> str:
+    """规范化书名：NFKC 全半角统一 + 大小写折叠 + 合并空白"""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def tokenize(text: str) -> list:
+    """把书名切分成规范化的词"""
+    return _TOKEN_RE.findall(normalize(text))
+
+
+class CatalogIndex:
+    """
+    目录索引
+
+    用法：
+        index = CatalogIndex(library.BOOKS)
+        index.attach()                      # 跟随 borrow_book 更新库存
+        index.search("python 编程", in_stock_only=True)
+        index.autocomplete("pyth")
+    """
+
+    def __init__(self, books: dict = None):
+        """:param books: {ISBN: {"title": 书名, "stock": 库存}}，默认 library.BOOKS"""
+        self.books = library.BOOKS if books is None else books
+        self._postings = {}     # 词 -> ISBN 集合
+        self._titles = []       # 规范化书名，有序
+        self._isbns = []        # 与 _titles 一一对应
+        self._normalized = {}   # ISBN -> 规范化书名
+        self._in_stock = set()
+        self.rebuild()
+
+    def rebuild(self):
+        """根据 books 全量重建索引"""
+        self._postings.clear()
+        self._normalized.clear()
+        self._in_stock.clear()
+        pairs = []
+        for isbn, book in self.books.items():
+            title = normalize(book["title"])
+            self._normalized[isbn] = title
+            pairs.append((title, isbn))
+            self._index_tokens(isbn, book["title"])
+            if book["stock"] > 0:
+                self._in_stock.add(isbn)
+        pairs.sort()
+        self._titles = [title for title, _ in pairs]
+        self._isbns = [isbn for _, isbn in pairs]
+
+    def _index_tokens(self, isbn, title):
+        for token in set(tokenize(title)):
+            self._postings.setdefault(token, set()).add(isbn)
+
+    def add_book(self, isbn: str):
+        """把 books 中新增（或书名变化）的图书加入索引"""
+        if isbn in self._normalized:
+            self.remove_book(isbn)
+        book = self.books[isbn]
+        title = normalize(book["title"])
+        self._normalized[isbn] = title
+        self._index_tokens(isbn, book["title"])
+        pos = bisect_right(self._titles, title)
+        self._titles.insert(pos, title)
+        self._isbns.insert(pos, isbn)
+        self.update_stock(isbn)
+
+    def remove_book(self, isbn: str):
+        """从索引中删除图书"""
+        title = self._normalized.pop(isbn, None)
+        if title is None:
+            return
+        for token in set(_TOKEN_RE.findall(title)):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.discard(isbn)
+                if not postings:
+                    del self._postings[token]
+        lo = bisect_left(self._titles, title)
+        hi = bisect_right(self._titles, title, lo)
+        pos = self._isbns.index(isbn, lo, hi)
+        del self._titles[pos]
+        del self._isbns[pos]
+        self._in_stock.discard(isbn)
+
+    def update_stock(self, isbn: str):
+        """根据 books 中的当前库存更新有货集合"""
+        book = self.books.get(isbn)
+        if book is not None and book["stock"] > 0:
+            self._in_stock.add(isbn)
+        else:
+            self._in_stock.discard(isbn)
+
+    def on_event(self, event: str, user_id: str, book_isbn: str):
+        """library.LISTENERS 回调：借还都只影响库存"""
+        self.update_stock(book_isbn)
+
+    def attach(self):
+        """注册到 library.LISTENERS"""
+        if self.on_event not in library.LISTENERS:
+            library.LISTENERS.append(self.on_event)
+
+    def detach(self):
+        """从 library.LISTENERS 注销"""
+        if self.on_event in library.LISTENERS:
+            library.LISTENERS.remove(self.on_event)
+
+    def search(self, query: str, in_stock_only: bool = False, limit: int = None) -> list:
+        """
+        按书名中的词查找，所有词都出现才算命中
+        :return: 命中的 ISBN 列表（按 ISBN 排序）
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        sets = []
+        for token in tokens:
+            postings = self._postings.get(token)
+            if not postings:
+                return []
+            sets.append(postings)
+        if in_stock_only:
+            sets.append(self._in_stock)
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            result.intersection_update(other)
+            if not result:
+                break
+        result = sorted(result)
+        return result if limit is None else result[:limit]
+
+    def autocomplete(self, prefix: str, limit: int = 10, in_stock_only: bool = False) -> list:
+        """
+        书名前缀补全，按规范化书名排序
+        :return: [(ISBN, 书名), ...]
+        """
+        prefix = normalize(prefix)
+        result = []
+        pos = bisect_left(self._titles, prefix)
+        while pos < len(self._titles) and len(result) < limit:
+            if not self._titles[pos].startswith(prefix):
+                break
+            isbn = self._isbns[pos]
+            if not in_stock_only or isbn in self._in_stock:
+                result.append((isbn, self.books[isbn]["title"]))
+            pos += 1
+        return result
+
+    def in_stock(self, isbn: str) -> bool:
+        """是否有货"""
+        return isbn in self._in_stock
@@ -0,0 +1,199 @@
+# library_loans.py
+"""
+借阅记录与到期索引
+
+LoanLedger 注册到 library.LISTENERS 后，borrow_book 每借出一本就建立一条借阅
+记录（谁、哪本书、何时借、何时到期），还书时关闭最早的那条。
+
+到期时间索引是一个分块有序表：若干个长度有上限的有序小列表，外加每块最大值
+的列表。插入和删除先二分定位块，再在块内二分，代价 O(log n + 块长)；
+“截至 T 的全部逾期”和“接下来 N 条到期”都是两次二分定位后顺序读出，O(log n + k)。
+还书时记录立即从索引和字典中删除，内存只与在借数量有关。
+
+台账的修改和查询都在一把锁内进行，可以挂到 library_circulation 的并发借还
+服务上（不同的书的借还事件可能在不同线程中同时通知）。
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque, namedtuple
+
+import library
+
+Loan = namedtuple("Loan", "loan_id user_id isbn borrowed_at due_at")
+
+# 分块有序表中每块的目标长度
+_BLOCK = 512
+
+
+class _SortedBlocks:
+    """分块有序表，元素为可比较的元组"""
+
+    def __init__(self):
+        self._blocks = []
+        self._maxes = []
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def add(self, item):
+        if not self._blocks:
+            self._blocks.append([item])
+            self._maxes.append(item)
+        else:
+            i = bisect_left(self._maxes, item)
+            if i == len(self._maxes):
+                # 大于所有元素，追加到最后一块（到期时间递增时的常见情况）
+                i -= 1
+                self._blocks[i].append(item)
+                self._maxes[i] = item
+            else:
+                insort(self._blocks[i], item)
+            if len(self._blocks[i]) > 2 * _BLOCK:
+                block = self._blocks[i]
+                self._blocks[i:i + 1] = [block[:_BLOCK], block[_BLOCK:]]
+                self._maxes[i:i + 1] = [block[_BLOCK - 1], block[-1]]
+        self._len += 1
+
+    def remove(self, item):
+        i = bisect_left(self._maxes, item)
+        if i == len(self._maxes):
+            raise ValueError(item)
+        block = self._blocks[i]
+        j = bisect_left(block, item)
+        if block[j] != item:
+            raise ValueError(item)
+        del block[j]
+        self._len -= 1
+        if not block:
+            del self._blocks[i]
+            del self._maxes[i]
+        elif j == len(block):
+            self._maxes[i] = block[-1]
+
+    def iter_from(self, key):
+        """从第一个 >= key 的元素开始顺序遍历"""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return
+        j = bisect_left(self._blocks[i], key)
+        for block in self._blocks[i:]:
+            yield from block[j:] if j else block
+            j = 0
+
+    def __iter__(self):
+        for block in self._blocks:
+            yield from block
+
+
+class LoanLedger:
+    """
+    借阅台账，线程安全
+
+    用法：
+        ledger = LoanLedger(loan_days=30)
+        ledger.attach()
+        borrow_book("1001", isbn)
+        ledger.overdue(as_of=time.time())
+        ledger.next_due(10)
+    """
+
+    def __init__(self, loan_days: float = 30, clock=time.time):
+        """
+        :param loan_days: 借期（天）
+        :param clock: 时钟函数，返回秒
+        """
+        self.loan_period = loan_days * 86400
+        self.clock = clock
+        self._loans = {}      # 借阅编号 -> Loan（只保存在借记录）
+        self._open = {}       # (用户编号, ISBN) -> deque[借阅编号]，先借先还
+        self._due = _SortedBlocks()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._loans)
+
+    def get(self, loan_id: int) -> Loan:
+        """按编号取在借记录，不存在时返回 None"""
+        with self._lock:
+            return self._loans.get(loan_id)
+
+    def open_loan(self, user_id: str, book_isbn: str, now: float = None) -> Loan:
+        """建立一条借阅记录"""
+        if now is None:
+            now = self.clock()
+        with self._lock:
+            loan = Loan(self._next_id, user_id, book_isbn, now, now + self.loan_period)
+            self._next_id += 1
+            self._loans[loan.loan_id] = loan
+            self._open.setdefault((user_id, book_isbn), deque()).append(loan.loan_id)
+            self._due.add((loan.due_at, loan.loan_id))
+        return loan
+
+    def close_loan(self, user_id: str, book_isbn: str) -> Loan:
+        """
+        关闭该用户这本书最早的一条借阅记录
+        :return: 被关闭的记录，没有在借记录时返回 None
+        """
+        key = (user_id, book_isbn)
+        with self._lock:
+            ids = self._open.get(key)
+            if not ids:
+                return None
+            loan = self._loans.pop(ids.popleft())
+            if not ids:
+                del self._open[key]
+            self._due.remove((loan.due_at, loan.loan_id))
+        return loan
+
+    def on_event(self, event: str, user_id: str, book_isbn: str):
+        """library.LISTENERS 回调"""
+        if event == "borrow":
+            self.open_loan(user_id, book_isbn)
+        elif event == "return":
+            self.close_loan(user_id, book_isbn)
+
+    def attach(self):
+        """注册到 library.LISTENERS"""
+        if self.on_event not in library.LISTENERS:
+            library.LISTENERS.append(self.on_event)
+
+    def detach(self):
+        """从 library.LISTENERS 注销"""
+        if self.on_event in library.LISTENERS:
+            library.LISTENERS.remove(self.on_event)
+
+    def overdue(self, as_of: float = None, limit: int = None) -> list:
+        """
+        截至 as_of 已逾期（到期时间早于 as_of）的在借记录，按到期时间排序
+        :return: [Loan, ...]
+        """
+        if as_of is None:
+            as_of = self.clock()
+        result = []
+        with self._lock:
+            for due_at, loan_id in self._due:
+                if due_at >= as_of or (limit is not None and len(result) >= limit):
+                    break
+                result.append(self._loans[loan_id])
+        return result
+
+    def next_due(self, n: int, as_of: float = None) -> list:
+        """
+        截至 as_of 尚未逾期、接下来最先到期的 n 条记录
+        :return: [Loan, ...]
+        """
+        if as_of is None:
+            as_of = self.clock()
+        result = []
+        if n <= 0:
+            return result
+        with self._lock:
+            for due_at, loan_id in self._due.iter_from((as_of,)):
+                result.append(self._loans[loan_id])
+                if len(result) >= n:
+                    break
+        return result
@@ -0,0 +1,225 @@
+# library_sqlite.py
+"""
+SQLite 存储的图书馆
+
+提供与 library.borrow_book 相同的接口和异常，数据保存在 SQLite 文件中：
+- 小型连接池复用连接，每个连接开启 WAL 和 busy_timeout，支持多线程并发写；
+- SQL 语句固定，由 sqlite3 的语句缓存复用预编译结果；
+- 借书只执行一条带条件的 UPDATE（库存大于 0 且用户存在），
+  一次往返完成检查和扣减；只有失败时才再查一次以确定异常类型；
+- 可选的布隆过滤器（library_bloom.BloomFilter）在内存中排除不存在的 ISBN，
+  这类请求不再去争抢写锁；已知存在的用户编号缓存在内存中（load 写入的和查到过的），
+  过滤器拒绝的请求通常不访问数据库。本类不删除用户，若其他程序删除了用户，
+  缓存中的用户借不存在的书时报 BookNotExistError 而不是 UserNotExistError。
+"""
+
+import queue
+import sqlite3
+from contextlib import contextmanager
+
+from library import UserNotExistError, BookNotExistError, NoStockError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    name    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS books (
+    isbn  TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    stock INTEGER NOT NULL CHECK (stock >= 0)
+);
+"""
+
+_BORROW_SQL = (
+    "UPDATE books SET stock = stock - 1 "
+    "WHERE isbn = ? AND stock > 0 AND EXISTS (SELECT 1 FROM users WHERE user_id = ?)"
+)
+_RETURN_SQL = (
+    "UPDATE books SET stock = stock + 1 "
+    "WHERE isbn = ? AND EXISTS (SELECT 1 FROM users WHERE user_id = ?)"
+)
+_USER_SQL = "SELECT EXISTS (SELECT 1 FROM users WHERE user_id = ?)"
+_DIAGNOSE_SQL = (
+    "SELECT EXISTS (SELECT 1 FROM users WHERE user_id = ?), "
+    "(SELECT stock FROM books WHERE isbn = ?)"
+)
+
+
+class SQLiteLibrary:
+    """
+    SQLite 图书馆
+
+    用法：
+        lib = SQLiteLibrary("library.db")
+        lib.load(library.USERS, library.BOOKS)
+        lib.borrow_book("1001", "978-7-111-54320-0")
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, timeout: float = 30.0, bloom=None):
+        """
+        :param path: 数据库文件路径（连接池中的连接共享同一个文件）
+        :param pool_size: 连接池大小
+        :param timeout: 等待写锁的最长时间（秒）
+        :param bloom: 可选的 BloomFilter，必须包含库中所有 ISBN，load 时自动更新
+        """
+        if pool_size <= 0:
+            raise ValueError("连接池大小必须为正数")
+        self.path = path
+        self.timeout = timeout
+        self.bloom = bloom
+        self._known_users = set()  # 确认存在的用户编号，只增不减
+        self._pool = queue.LifoQueue()
+        self._all = []
+        for _ in range(pool_size):
+            conn = sqlite3.connect(path, timeout=timeout, isolation_level=None,
+                                   check_same_thread=False, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._all.append(conn)
+            self._pool.put(conn)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connection(self):
+        conn = self._pool.get(timeout=self.timeout)
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        """关闭所有连接"""
+        for conn in self._all:
+            conn.close()
+        self._all = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self, users: dict, books: dict):
+        """
+        批量写入用户和图书（已存在的会被覆盖）
+        :param users: {用户编号: 用户名}
+        :param books: {ISBN: {"title": 书名, "stock": 库存}}
+        """
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("INSERT OR REPLACE INTO users VALUES (?, ?)", users.items())
+                conn.executemany("INSERT OR REPLACE INTO books VALUES (?, ?, ?)",
+                                 ((isbn, b["title"], b["stock"]) for isbn, b in books.items()))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        self._known_users.update(users)
+        if self.bloom is not None:
+            self.bloom.update(books)
+
+    def _reject_missing_book(self, user_id, book_isbn):
+        """
+        过滤器判定图书一定不存在：只需确认用户，保持与 library 相同的异常优先级；
+        已知存在的用户不访问数据库
+        """
+        if user_id not in self._known_users:
+            with self._connection() as conn:
+                exists = conn.execute(_USER_SQL, (user_id,)).fetchone()[0]
+            if not exists:
+                raise UserNotExistError(f"用户{user_id}不存在")
+            self._known_users.add(user_id)
+        raise BookNotExistError(f"图书{book_isbn}不存在")
+
+    def _raise_failure(self, conn, user_id, book_isbn):
+        """条件更新没有命中时，查出具体原因并抛出与 library 相同的异常"""
+        user_exists, stock = conn.execute(_DIAGNOSE_SQL, (user_id, book_isbn)).fetchone()
+        if not user_exists:
+            raise UserNotExistError(f"用户{user_id}不存在")
+        if stock is None:
+            raise BookNotExistError(f"图书{book_isbn}不存在")
+        raise NoStockError(f"图书{book_isbn}库存为0")
+
+    def borrow_book(self, user_id: str, book_isbn: str):
+        """
+        借书主逻辑，语义同 library.borrow_book
+        :raises: 对应异常
+        """
+        if self.bloom is not None and book_isbn not in self.bloom:
+            self._reject_missing_book(user_id, book_isbn)
+        with self._connection() as conn:
+            if conn.execute(_BORROW_SQL, (book_isbn, user_id)).rowcount == 1:
+                return True
+            self._raise_failure(conn, user_id, book_isbn)
+
+    def return_book(self, user_id: str, book_isbn: str):
+        """
+        还书主逻辑，语义同 library.return_book，但数据库中没有借阅表，不检查在借记录
+        :raises: 对应异常
+        """
+        if self.bloom is not None and book_isbn not in self.bloom:
+            self._reject_missing_book(user_id, book_isbn)
+        with self._connection() as conn:
+            if conn.execute(_RETURN_SQL, (book_isbn, user_id)).rowcount == 1:
+                return True
+            self._raise_failure(conn, user_id, book_isbn)
+
+    def stock(self, book_isbn: str) -> int:
+        """
+        查询库存
+        :raises: BookNotExistError
+        """
+        with self._connection() as conn:
+            row = conn.execute("SELECT stock FROM books WHERE isbn = ?", (book_isbn,)).fetchone()
+        if row is None:
+            raise BookNotExistError(f"图书{book_isbn}不存在")
+        return row[0]
+
+
+if __name__ == "__main__":
+    # 与内存字典的吞吐量对比：python library_sqlite.py [借书次数] [线程数]
+    import os
+    import sys
+    import tempfile
+    import threading
+    import time
+
+    import library
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    books = {f"isbn-{i}": {"title": f"图书{i}", "stock": n} for i in range(1000)}
+    isbns = [f"isbn-{i % 1000}" for i in range(n)]
+
+    library.BOOKS = {k: dict(v) for k, v in books.items()}
+    start = time.perf_counter()
+    for isbn in isbns:
+        library.borrow_book("1001", isbn)
+    elapsed = time.perf_counter() - start
+    print(f"内存字典: {n / elapsed:,.0f} 次/秒")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with SQLiteLibrary(os.path.join(tmp, "library.db"), pool_size=n_threads) as lib:
+            lib.load(library.USERS, books)
+            start = time.perf_counter()
+            for isbn in isbns:
+                lib.borrow_book("1001", isbn)
+            elapsed = time.perf_counter() - start
+            print(f"SQLite 单线程: {n / elapsed:,.0f} 次/秒")
+
+            def worker(part):
+                for isbn in part:
+                    lib.borrow_book("1002", isbn)
+
+            threads = [threading.Thread(target=worker, args=(isbns[i::n_threads],))
+                       for i in range(n_threads)]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            print(f"SQLite {n_threads} 线程: {n / elapsed:,.0f} 次/秒")
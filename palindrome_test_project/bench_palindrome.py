@@ -0,0 +1,71 @@
+"""
+is_palindrome 性能测试
+
+对比原始实现（生成器拼接 + [::-1] 反转）与分块双指针实现，
+输入为 1 KB、1 MB、100 MB 的回文（最坏情况，需要扫描全部字符）
+以及首字符就不匹配的非回文；另外对比大量短字符串的逐个调用与批量接口。
+
+用法：
+    python bench_palindrome.py            # 默认 1KB 1MB 100MB
+    python bench_palindrome.py 1000 1000000
+"""
+
+import sys
+import time
+
+from palindrome import is_palindrome, is_palindrome_many
+
+
+def is_palindrome_naive(s: str) -> bool:
+    """原始实现，作为对照"""
+    cleaned = ''.join(char.lower() for char in s if char.isalnum())
+    return cleaned == cleaned[::-1]
+
+
+def make_input(size: int, unicode: bool = False) -> str:
+    """构造长度约为 size 的回文，包含大小写和标点"""
+    unit = "Ab, 数字-c! " if unicode else "Ab, 1-c! "
+    half = (unit * (size // (2 * len(unit)) + 1))[:size // 2]
+    return half + half[::-1].swapcase()
+
+
+def timeit(func, s: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(s)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_many(count: int = 1_000_000):
+    """大量短字符串：逐个调用与批量接口对比"""
+    words = [("Ab1, " * (i % 4))[: i % 11] for i in range(count)]
+    words = [w + w[::-1] if i % 2 else w for i, w in enumerate(words)]
+    start = time.perf_counter()
+    expected = [is_palindrome(w) for w in words]
+    loop = time.perf_counter() - start
+    start = time.perf_counter()
+    assert is_palindrome_many(words) == expected
+    batch = time.perf_counter() - start
+    print(f"{count:,} 个短字符串: 逐个 {loop * 1000:.0f}ms, 批量 {batch * 1000:.0f}ms, "
+          f"加速 {loop / batch:.1f}x")
+
+
+def main(sizes):
+    print(f"{'输入':<22}{'原始实现':>12}{'新实现':>12}{'加速':>8}")
+    for size in sizes:
+        repeat = 5 if size <= 10_000_000 else 1
+        for label, s in (("ASCII 回文", make_input(size)),
+                         ("Unicode 回文", make_input(size, unicode=True)),
+                         ("ASCII 首字符不匹配", "x" + make_input(size))):
+            assert is_palindrome(s) == is_palindrome_naive(s)
+            old = timeit(is_palindrome_naive, s, repeat)
+            new = timeit(is_palindrome, s, repeat)
+            name = f"{label} {size:,}"
+            print(f"{name:<22}{old * 1000:>10.2f}ms{new * 1000:>10.2f}ms{old / new:>7.1f}x")
+    bench_many()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 1_000_000, 100_000_000])
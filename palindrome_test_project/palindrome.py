@@ -1,23 +1,177 @@
+class _CleanTable(dict):
+    """
+    str.translate 用的字符映射表：字母数字映射为其小写形式，其余字符删除
+
+    ASCII 部分预先填好，其他字符第一次出现时按 isalnum()/lower() 计算并缓存，
+    与逐字符 char.lower() if char.isalnum() 的结果完全一致。
+    """
+
+    def __missing__(self, code):
+        char = chr(code)
+        value = char.lower() if char.isalnum() else None
+        self[code] = value
+        return value
+
+
+_CLEAN_TABLE = _CleanTable()
+for _code in range(128):
+    _CLEAN_TABLE.__missing__(_code)
+del _code
+
+# ASCII 快速路径：bytes.translate 一次完成小写化和删除非字母数字
+_ASCII_LOWER = bytes(range(256)).lower()
+_ASCII_DELETE = bytes(c for c in range(256) if not chr(c).isalnum() or c >= 128)
+
+# 分块大小：从小块开始，尽早发现不匹配；之后倍增到上限
+_FIRST_CHUNK = 64
+_MAX_CHUNK = 1 << 16
+
+
+def _clean(chunk: str, ascii_only: bool):
+    """
+    清理一段字符串：只保留字母数字字符，转换为小写
+
+    整个输入都是 ASCII 时返回 bytes；否则返回 str，其中纯 ASCII 的片段
+    仍走 bytes.translate 再解码，比逐字符查表快得多。
+    """
+    if ascii_only:
+        return chunk.encode("ascii").translate(_ASCII_LOWER, _ASCII_DELETE)
+    if chunk.isascii():
+        return chunk.encode("ascii").translate(_ASCII_LOWER, _ASCII_DELETE).decode("ascii")
+    return chunk.translate(_CLEAN_TABLE)
+
+
 def is_palindrome(s: str) -> bool:
     """
     判断一个字符串是否为回文
-    
+
     回文是指正读和反读都一样的字符串，忽略大小写和非字母数字字符
-    
+
+    从两端向中间分块扫描，每块用转换表清理后比较，遇到第一个不匹配立即返回，
+    不构造完整的清理后字符串，额外内存只和块大小有关。
+
     Args:
         s: 要判断的字符串
-        
+
     Returns:
         如果是回文返回True，否则返回False
     """
     if not isinstance(s, str):
         raise TypeError("Input must be a string")
-    
-    # 清理字符串：只保留字母数字字符，转换为小写
-    cleaned = ''.join(char.lower() for char in s if char.isalnum())
-    
-    if not cleaned:
-        return True  # 空字符串或只包含非字母数字字符的字符串视为回文
-    
-    # 判断是否为回文
-    return cleaned == cleaned[::-1]
\ No newline at end of file
+
+    ascii_only = s.isascii()
+    return _match_from_ends(len(s), lambda a, b: _clean(s[a:b], ascii_only),
+                            b"" if ascii_only else "")
+
+
+def _match_from_ends(length: int, clean_range, empty, align=None) -> bool:
+    """
+    从两端向中间分块比较清理后的字符
+
+    Args:
+        length: 原始数据长度
+        clean_range: clean_range(start, end) 返回原始数据 [start, end) 清理后的结果
+        empty: 与 clean_range 返回值同类型的空值
+        align: 可选，align(pos) 把切分位置向前调整到字符边界（用于 UTF-8 字节）
+
+    Returns:
+        清理后的字符序列是否为回文
+    """
+    # left: 从左端清理出、尚未比较的字符；right: 从右端清理出、已反转、尚未比较的字符
+    left = right = empty
+    i, j = 0, length
+    size = _FIRST_CHUNK
+    while True:
+        if not left:
+            if i >= j:
+                break
+            end = i + size
+            if end >= j:
+                end = j
+            elif align is not None:
+                # 对齐失败（数据中全是续字节）时按原位置切分，交给解码报错
+                end = align(end) if align(end) > i else end
+            left = clean_range(i, end)
+            i = end
+        elif not right:
+            if i >= j:
+                break
+            start = j - size
+            if start > i and align is not None:
+                start = align(start)
+            if start < i:
+                start = i
+            right = clean_range(start, j)[::-1]
+            j = start
+            size = min(size * 2, _MAX_CHUNK)
+        else:
+            n = min(len(left), len(right))
+            if left[:n] != right[:n]:
+                return False
+            left = left[n:]
+            right = right[n:]
+
+    # 两端相遇：剩下未配对的部分就是中间段，它自身必须是回文
+    middle = left or right
+    return middle == middle[::-1]
+
+
+# 批量接口：各字符串用 \0 连接后一次清理，\0 作为分隔符保留下来
+_SEP = "\0"
+_BATCH_ASCII_DELETE = _ASCII_DELETE.replace(b"\0", b"")
+_BATCH_TABLE = _CleanTable(_CLEAN_TABLE)
+_BATCH_TABLE[0] = _SEP
+
+
+def _check_chunk(chunk: list) -> list:
+    """判断一块字符串，返回布尔值列表"""
+    try:
+        joined = _SEP.join(chunk)
+    except TypeError:
+        raise TypeError("Input must be a string") from None
+    if joined.count(_SEP) != len(chunk) - 1:
+        # 字符串自身含有分隔符，逐个判断
+        return [is_palindrome(s) for s in chunk]
+    if joined.isascii():
+        parts = joined.encode("ascii").translate(_ASCII_LOWER, _BATCH_ASCII_DELETE).split(b"\0")
+    else:
+        parts = joined.translate(_BATCH_TABLE).split(_SEP)
+    return [p == p[::-1] for p in parts]
+
+
+def iter_is_palindrome(strings, chunk_size: int = 65536):
+    """
+    批量判断回文，逐个产出结果
+
+    每 chunk_size 个字符串拼成一块，一次 translate 完成清理，再逐个比较，
+    省去每次调用 is_palindrome 的类型检查和分块扫描开销。内存只和块大小有关。
+
+    Args:
+        strings: 字符串的可迭代对象
+        chunk_size: 每块字符串数量
+
+    Yields:
+        每个字符串是否为回文
+    """
+    chunk = []
+    for s in strings:
+        chunk.append(s)
+        if len(chunk) >= chunk_size:
+            yield from _check_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield from _check_chunk(chunk)
+
+
+def is_palindrome_many(strings, chunk_size: int = 65536) -> list:
+    """
+    批量判断回文
+
+    Args:
+        strings: 字符串的可迭代对象
+        chunk_size: 每块字符串数量
+
+    Returns:
+        与输入一一对应的布尔值列表
+    """
+    return list(iter_is_palindrome(strings, chunk_size))
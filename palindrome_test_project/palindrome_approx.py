@@ -0,0 +1,221 @@
+"""
+近似回文
+
+在与 is_palindrome 相同的规范化序列（只保留字母数字字符、转小写）上计算：
+- 回文编辑距离：删除、插入、替换一个字符各算一次编辑，最少几次能变成回文
+  （插入一个字符与删除它的对称字符效果相同，所以只需考虑删除和替换）；
+- 最少删除次数：只允许删除时的距离，等于长度减去最长回文子序列长度。
+
+教科书做法是区间 DP，O(n²) 时间和内存。这里把它看成 t 从左往右、从右往左
+两个指针的对齐：状态 (a, b) 表示左边已处理 a 个字符、右边已处理 b 个字符，
+两指针相遇即结束。每次删除使 a - b 变化 1，所以代价不超过 k 的路径只落在
+|a - b| <= k 的带内。按代价逐层推进每条对角线上能到达的最远位置
+（Landau-Vishkin），相等的字符用切片比较成段跳过，时间 O(n·k)（输入接近
+回文时接近 O(n + k²)），除规范化序列外只需 O(k) 内存。
+
+只允许删除且字符串较短时，改用位并行 LCS：最长回文子序列 = LCS(t, t 反转)，
+用 Python 大整数每次处理一整行，共 n 次整数运算。
+"""
+
+from palindrome import _clean
+
+# 位并行路径的长度上限（超过后大整数运算本身变成 O(n²/64)，不如按带计算）
+_BIT_PARALLEL_MAX = 4096
+
+
+def _normalize(s: str):
+    if not isinstance(s, str):
+        raise TypeError("Input must be a string")
+    return _clean(s, s.isascii())
+
+
+def _common_length(t, a: int, rev, b: int, limit: int) -> int:
+    """t[a:] 与 rev[b:] 的公共前缀长度，最多 limit；先倍增步长再二分"""
+    matched = 0
+    step = 16
+    while matched < limit:
+        m = min(step, limit - matched)
+        i, j = a + matched, b + matched
+        if t[i:i + m] == rev[j:j + m]:
+            matched += m
+            step *= 2
+            continue
+        lo, hi = 0, m - 1  # 第一个不相等的位置在 [lo, hi] 内
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if t[i:i + mid + 1] == rev[j:j + mid + 1]:
+                lo = mid + 1
+            else:
+                hi = mid
+        return matched + lo
+    return matched
+
+
+def _banded_distance(t, limit: int, substitutions: bool):
+    """
+    按代价逐层推进的带状算法
+
+    Returns:
+        距离，超过 limit 时返回 None
+    """
+    n = len(t)
+    rev = t[::-1]
+
+    def slide(a: int, b: int) -> int:
+        # 沿对角线跳过相等的字符对，直到两指针相遇（a + b >= n - 1）
+        return a + _common_length(t, a, rev, b, (n - a - b) // 2)
+
+    a = slide(0, 0)
+    if 2 * a >= n - 1:
+        return 0
+    # far[d + e]：代价 e 时对角线 d = b - a 上能到达的最大 a；-1 表示不可达
+    far = [a]
+    for e in range(1, limit + 1):
+        new = [-1] * (2 * e + 1)
+        for d in range(-e, e + 1):
+            best = -1
+            i = d + e - 1  # 上一层中对角线 d 的下标
+            if substitutions and 0 <= i < len(far) and far[i] >= 0:
+                best = far[i] + 1
+            if 0 <= i + 1 < len(far) and far[i + 1] >= 0:
+                best = max(best, far[i + 1] + 1)   # 删除左边字符：从对角线 d + 1 来
+            if 0 <= i - 1 < len(far) and far[i - 1] >= 0:
+                best = max(best, far[i - 1])       # 删除右边字符：从对角线 d - 1 来
+            if best < 0 or best + d < 0:
+                continue
+            a = best
+            b = a + d
+            if a + b < n - 1:
+                a = slide(a, b)
+                b = a + d
+            if a + b >= n - 1:
+                return e
+            new[d + e] = a
+        far = new
+    return None
+
+
+def _lcs_bit_parallel(x, y) -> int:
+    """位并行 LCS 长度（Allison-Dix / Hyyrö）"""
+    n = len(x)
+    if n == 0 or not y:
+        return 0
+    masks = {}
+    for i, c in enumerate(x):
+        masks[c] = masks.get(c, 0) | (1 << i)
+    full = (1 << n) - 1
+    v = full
+    for c in y:
+        u = v & masks.get(c, 0)
+        v = ((v + u) | (v - u)) & full
+    return n - v.bit_count()
+
+
+def palindrome_distance(s: str, substitutions: bool = True, limit: int = None):
+    """
+    最少编辑几次能变成回文
+
+    Args:
+        s: 原字符串
+        substitutions: 是否允许替换；False 时只算删除（与只算插入相同）
+        limit: 可选，距离上限；超过时提前返回 None，耗时只和 limit 有关
+
+    Returns:
+        距离，超过 limit 时返回 None
+    """
+    t = _normalize(s)
+    n = len(t)
+    if limit is None:
+        limit = n
+    elif limit < 0:
+        raise ValueError("limit must be non-negative")
+    if not substitutions and n <= _BIT_PARALLEL_MAX and limit * limit >= n:
+        distance = n - _lcs_bit_parallel(t, t[::-1])
+        return distance if distance <= limit else None
+    return _banded_distance(t, limit, substitutions)
+
+
+def is_k_palindrome(s: str, k: int, substitutions: bool = True) -> bool:
+    """
+    判断字符串能否在 k 次编辑内变成回文
+
+    Args:
+        s: 原字符串
+        k: 最多编辑次数
+        substitutions: 是否允许替换；False 时只允许删除
+
+    Returns:
+        能在 k 次内变成回文返回True，否则返回False
+    """
+    return palindrome_distance(s, substitutions, k) is not None
+
+
+def min_deletions(s: str) -> int:
+    """
+    最少删除几个字符能变成回文（规范化序列上）
+
+    Args:
+        s: 原字符串
+
+    Returns:
+        删除次数
+    """
+    return palindrome_distance(s, substitutions=False)
+
+
+if __name__ == "__main__":
+    # 性能测试：python palindrome_approx.py [长度]
+    import random
+    import sys
+    import time
+
+    def quadratic(t, substitutions=True):
+        """教科书区间 DP，逐行滚动，作为对照"""
+        n = len(t)
+        row = [0] * (n + 1)  # row[j]：区间 [i, j) 的距离
+        for i in range(n - 1, -1, -1):
+            prev_diag = 0  # 区间 [i+1, j-1) 的距离
+            new = [0] * (n + 1)
+            for j in range(i + 2, n + 1):
+                if t[i] == t[j - 1]:
+                    new[j] = row[j - 1] if j - 1 > i + 1 else 0
+                else:
+                    best = min(row[j], new[j - 1]) + 1
+                    if substitutions:
+                        best = min(best, (row[j - 1] if j - 1 > i + 1 else 0) + 1)
+                    new[j] = best
+            row = new
+        return row[n]
+
+    def timed(func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - start
+
+    rng = random.Random(0)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    half = "".join(rng.choice("abcd") for _ in range(n // 2))
+    base = half + half[::-1]
+    print(f"长度 {n:,}，回文中随机改动 k 个字符：")
+    for k in (0, 1, 4, 16, 64, 256):
+        text = list(base)
+        for pos in rng.sample(range(n), k):
+            text[pos] = "z"
+        text = "".join(text)
+        dist, t1 = timed(palindrome_distance, text)
+        dels, t2 = timed(min_deletions, text)
+        ok, t3 = timed(is_k_palindrome, text, k)
+        print(f"  k={k:<4} 编辑距离 {dist:<4} {t1 * 1000:>9.1f}ms  删除 {dels:<4} {t2 * 1000:>9.1f}ms  "
+              f"is_k_palindrome {ok} {t3 * 1000:>8.1f}ms")
+
+    print("短随机字符串（距离约为长度的一半）：")
+    for size in (200, 1000, 4000):
+        text = "".join(rng.choice("abcd") for _ in range(size))
+        expected, slow = timed(quadratic, text, False)
+        dels, fast = timed(min_deletions, text)
+        banded, band = timed(_banded_distance, text, size, False)
+        assert expected == dels == banded
+        dist, sub = timed(palindrome_distance, text)
+        assert dist == quadratic(text) if size <= 1000 else True
+        print(f"  n={size:<5} 删除 {dels:<5} O(n²) DP {slow * 1000:>8.1f}ms  位并行 {fast * 1000:>7.1f}ms  "
+              f"带状 {band * 1000:>8.1f}ms  编辑距离 {dist} {sub * 1000:>8.1f}ms")
@@ -0,0 +1,67 @@
+"""
+大文件回文判断
+
+把文件内存映射后从两端向中间扫描，语义与 is_palindrome 相同（忽略大小写和
+非字母数字字符）。每次只解码一小块，块的切分位置调整到 UTF-8 字符边界，
+内存占用与文件大小无关。
+"""
+
+import mmap
+import os
+
+from palindrome import _ASCII_DELETE, _ASCII_LOWER, _CLEAN_TABLE, _match_from_ends
+
+
+def _utf8_align(data):
+    """返回把位置向前调整到 UTF-8 字符起始字节的函数"""
+    def align(pos: int) -> int:
+        # 续字节形如 0b10xxxxxx，最多向前退 3 个字节
+        for _ in range(3):
+            if data[pos] & 0xC0 != 0x80:
+                break
+            pos -= 1
+        return pos
+    return align
+
+
+def _clean_utf8(chunk: bytes) -> str:
+    """清理一段 UTF-8 字节：只保留字母数字字符，转换为小写"""
+    if chunk.isascii():
+        return chunk.translate(_ASCII_LOWER, _ASCII_DELETE).decode("ascii")
+    return chunk.decode("utf-8").translate(_CLEAN_TABLE)
+
+
+def is_palindrome_file(path) -> bool:
+    """
+    判断 UTF-8 文本文件的内容是否为回文
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        如果是回文返回True，否则返回False
+
+    Raises:
+        UnicodeDecodeError: 文件不是合法的 UTF-8
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return True
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _match_from_ends(size, lambda a, b: _clean_utf8(data[a:b]), "",
+                                    align=_utf8_align(data))
+
+
+if __name__ == "__main__":
+    # 用法：python palindrome_file.py 文件...
+    import sys
+    import time
+
+    for name in sys.argv[1:]:
+        start = time.perf_counter()
+        result = is_palindrome_file(name)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(name)
+        print(f"{name}: {result} ({size / 2**20:,.1f} MB, {elapsed:.2f}s, "
+              f"{size / 2**20 / max(elapsed, 1e-9):,.0f} MB/s)")
@@ -0,0 +1,173 @@
+"""
+按行扫描大文件中的回文
+
+把文件按字节区间切成若干块（切分点调整到分隔符之后，不会切断一行），交给
+进程池并行处理。每块在子进程中内存映射读取，整块一次 translate 清理（分隔符
+保留下来），再按分隔符拆开逐行比较，语义与 is_palindrome 相同。结果按块的
+顺序收集，输出顺序与文件中的行顺序一致，和进程数无关。
+
+用法：
+    python palindrome_scan.py 文件 [-j 进程数] [--count] [--min-length N]
+
+非法的 UTF-8 字节按替换字符处理（不是字母数字，清理时被忽略）。
+"""
+
+import mmap
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from palindrome import _ASCII_DELETE, _ASCII_LOWER, _CLEAN_TABLE, _CleanTable
+
+# 每块的目标字节数
+CHUNK_BYTES = 8 << 20
+
+_tables = {}
+
+
+def _line_tables(sep: bytes):
+    """返回保留分隔符的 (bytes 删除表, str 转换表)"""
+    if sep not in _tables:
+        table = _CleanTable(_CLEAN_TABLE)
+        table[sep[0]] = sep.decode("ascii")
+        _tables[sep] = (_ASCII_DELETE.replace(sep, b""), table)
+    return _tables[sep]
+
+
+def split_ranges(path, chunk_bytes: int = CHUNK_BYTES, sep: bytes = b"\n"):
+    """
+    把文件切成约 chunk_bytes 大小的字节区间，每个区间都在分隔符之后结束
+
+    Returns:
+        [(start, end), ...]，首尾相接覆盖整个文件
+    """
+    ranges = []
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return ranges
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            while start < size:
+                pos = data.find(sep, start + chunk_bytes - 1)
+                end = size if pos < 0 else pos + 1
+                ranges.append((start, end))
+                start = end
+    return ranges
+
+
+def _scan_range(task):
+    """
+    子进程：扫描一个字节区间
+
+    Returns:
+        (行数, [(区间内行号, 行内容), ...])
+    """
+    path, start, end, sep, min_length, count_only = task
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            chunk = data[start:end]
+    delete, table = _line_tables(sep)
+    if chunk.isascii():
+        parts = chunk.translate(_ASCII_LOWER, delete).split(sep)
+    else:
+        parts = chunk.decode("utf-8", "replace").translate(table).split(sep.decode("ascii"))
+    if chunk.endswith(sep):
+        # 最后一个分隔符之后没有内容
+        parts.pop()
+    hits = [i for i, p in enumerate(parts) if len(p) >= min_length and p == p[::-1]]
+    if count_only:
+        return len(parts), hits
+    # 整块解码一次再拆分，比逐行解码快
+    lines = chunk.decode("utf-8", "replace").split(sep.decode("ascii"))
+    if b"\r" in chunk:
+        return len(parts), [(i, lines[i].rstrip("\r")) for i in hits]
+    return len(parts), [(i, lines[i]) for i in hits]
+
+
+def scan_file(path, workers: int = None, chunk_bytes: int = CHUNK_BYTES, sep: str = "\n",
+              min_length: int = 1, count_only: bool = False, stats: dict = None):
+    """
+    按文件中的顺序产出回文行
+
+    Args:
+        path: UTF-8 文本文件路径
+        workers: 进程数，默认为 CPU 核数；为 1 时在当前进程内扫描
+        chunk_bytes: 每块的目标字节数
+        sep: 记录分隔符，单个非字母数字的 ASCII 字符
+        min_length: 清理后长度小于该值的行不算回文（默认跳过空行）
+        count_only: 只产出行号，行内容为 None（省去解码和进程间传输）
+        stats: 可选字典，扫描过程中更新 lines、bytes、matches 三项
+
+    Yields:
+        (行号, 行内容)，行号从 1 开始，行内容不含分隔符和行尾的 \\r
+    """
+    if len(sep) != 1 or not sep.isascii() or sep.isalnum():
+        raise ValueError("sep must be a single non-alphanumeric ASCII character")
+    sep = sep.encode("ascii")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if stats is None:
+        stats = {}
+    stats.update(lines=0, bytes=0, matches=0)
+
+    ranges = split_ranges(path, chunk_bytes, sep)
+    tasks = [(os.fspath(path), start, end, sep, min_length, count_only) for start, end in ranges]
+    if workers <= 1 or len(tasks) <= 1:
+        results = map(_scan_range, tasks)
+        yield from _collect(results, ranges, stats, count_only)
+    else:
+        with Pool(min(workers, len(tasks))) as pool:
+            # imap 按提交顺序返回结果，保证输出顺序确定
+            results = pool.imap(_scan_range, tasks)
+            yield from _collect(results, ranges, stats, count_only)
+
+
+def _collect(results, ranges, stats, count_only):
+    """把各块的区间内行号换算成全局行号"""
+    for (start, end), (count, hits) in zip(ranges, results):
+        base = stats["lines"] + 1
+        if count_only:
+            for i in hits:
+                yield base + i, None
+        else:
+            for i, line in hits:
+                yield base + i, line
+        stats["lines"] += count
+        stats["bytes"] += end - start
+        stats["matches"] += len(hits)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="按行扫描文件中的回文")
+    parser.add_argument("path", help="UTF-8 文本文件")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="进程数，默认为 CPU 核数")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / 2**20, help="每块大小（MB）")
+    parser.add_argument("--sep", default="\n", help="记录分隔符，默认换行")
+    parser.add_argument("--min-length", type=int, default=1, help="清理后的最小长度，默认 1（跳过空行）")
+    parser.add_argument("--count", action="store_true", help="只输出回文行数")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出吞吐量统计")
+    args = parser.parse_args(argv)
+
+    stats = {}
+    start = time.perf_counter()
+    out = sys.stdout
+    for line_no, line in scan_file(args.path, args.workers, max(1, int(args.chunk_mb * 2**20)),
+                                   args.sep, args.min_length, args.count, stats):
+        if not args.count:
+            out.write(f"{line_no}\t{line}\n")
+    if args.count:
+        out.write(f"{stats['matches']}\n")
+    out.flush()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    if not args.quiet:
+        print(f"{stats['lines']:,} 行, {stats['bytes'] / 2**20:,.1f} MB, {stats['matches']:,} 个回文, "
+              f"{elapsed:.2f}s ({stats['lines'] / elapsed / 1e6:.2f} M行/秒, "
+              f"{stats['bytes'] / 2**20 / elapsed:,.0f} MB/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+回文子串
+
+在与 is_palindrome 相同的规范化序列（只保留字母数字字符、转小写）上运行
+Manacher 算法，O(n) 求出每个中心的最长回文半径，据此得到：
+- 最长回文子串；
+- 回文子串个数；
+- 所有极大回文（每个中心处无法再向两边扩展的回文）。
+
+结果都映射回原字符串的下标，可以直接用 s[start:end] 取出原文（包含中间的
+标点和空格）。个别字符小写后会变成多个字符（如 "İ"），回文边界落在这类字符
+内部时按整个原字符计算。
+"""
+
+from array import array
+
+from palindrome import _ASCII_DELETE, _ASCII_LOWER
+
+
+def normalize_with_offsets(s: str):
+    """
+    规范化字符串并记录每个字符在原字符串中的位置
+
+    Args:
+        s: 原字符串
+
+    Returns:
+        (规范化后的字符串, 每个规范化字符对应的原下标数组)
+    """
+    if not isinstance(s, str):
+        raise TypeError("Input must be a string")
+    if s.isascii():
+        cleaned = s.encode("ascii").translate(_ASCII_LOWER, _ASCII_DELETE).decode("ascii")
+        offsets = array("q", [i for i, char in enumerate(s) if char.isalnum()])
+        return cleaned, offsets
+    parts = []
+    offsets = array("q")
+    for i, char in enumerate(s):
+        if char.isalnum():
+            lowered = char.lower()
+            parts.append(lowered)
+            if len(lowered) == 1:
+                offsets.append(i)
+            else:
+                offsets.extend([i] * len(lowered))
+    return "".join(parts), offsets
+
+
+def manacher(t: str):
+    """
+    Manacher 算法
+
+    Args:
+        t: 已规范化的序列
+
+    Returns:
+        (odd, even)：odd[i] 为以 i 为中心的奇数长度回文个数（半径），
+        even[i] 为以 i-1、i 之间为中心的偶数长度回文个数
+    """
+    n = len(t)
+    odd = array("q", bytes(8 * n))
+    left, right = 0, -1
+    for i in range(n):
+        k = 1 if i > right else min(odd[left + right - i], right - i + 1)
+        while i - k >= 0 and i + k < n and t[i - k] == t[i + k]:
+            k += 1
+        odd[i] = k
+        if i + k - 1 > right:
+            left, right = i - k + 1, i + k - 1
+
+    even = array("q", bytes(8 * n))
+    left, right = 0, -1
+    for i in range(n):
+        k = 0 if i > right else min(even[left + right - i + 1], right - i + 1)
+        while i - k - 1 >= 0 and i + k < n and t[i - k - 1] == t[i + k]:
+            k += 1
+        even[i] = k
+        if i + k - 1 > right:
+            left, right = i - k, i + k - 1
+    return odd, even
+
+
+def _to_original(offsets, start: int, end: int):
+    """把规范化序列上的 [start, end) 映射为原字符串上的区间"""
+    return offsets[start], offsets[end - 1] + 1
+
+
+def longest_palindromic_substring(s: str):
+    """
+    最长回文子串（按规范化后的长度比较，长度相同时取最靠左的）
+
+    Args:
+        s: 原字符串
+
+    Returns:
+        (start, end)，s[start:end] 即为结果；没有字母数字字符时返回 (0, 0)
+    """
+    t, offsets = normalize_with_offsets(s)
+    if not t:
+        return 0, 0
+    odd, even = manacher(t)
+    best_len, best_start = 0, 0
+    for i in range(len(t)):
+        length = 2 * odd[i] - 1
+        if length > best_len:
+            best_len, best_start = length, i - odd[i] + 1
+        elif length == best_len and i - odd[i] + 1 < best_start:
+            best_start = i - odd[i] + 1
+        length = 2 * even[i]
+        if length > best_len or (length == best_len and length and i - even[i] < best_start):
+            best_len, best_start = length, i - even[i]
+    return _to_original(offsets, best_start, best_start + best_len)
+
+
+def count_palindromic_substrings(s: str) -> int:
+    """
+    规范化序列中回文子串的个数（不同位置分别计数）
+
+    Args:
+        s: 原字符串
+
+    Returns:
+        回文子串个数
+    """
+    t, _ = normalize_with_offsets(s)
+    odd, even = manacher(t)
+    return sum(odd) + sum(even)
+
+
+def maximal_palindromes(s: str, min_length: int = 2):
+    """
+    枚举所有极大回文：每个中心处最长的回文
+
+    Args:
+        s: 原字符串
+        min_length: 只返回规范化长度不小于该值的回文
+
+    Yields:
+        (start, end, length)：原字符串区间及规范化后的长度，按中心位置排序
+    """
+    t, offsets = normalize_with_offsets(s)
+    odd, even = manacher(t)
+    for i in range(len(t)):
+        # 偶数中心位于 i-1 与 i 之间，排在奇数中心 i 之前
+        if even[i] and 2 * even[i] >= min_length:
+            start = i - even[i]
+            yield (*_to_original(offsets, start, i + even[i]), 2 * even[i])
+        if 2 * odd[i] - 1 >= min_length:
+            start = i - odd[i] + 1
+            yield (*_to_original(offsets, start, i + odd[i]), 2 * odd[i] - 1)
+
+
+if __name__ == "__main__":
+    # 性能测试：python palindrome_substring.py [字符数]
+    import random
+    import sys
+    import time
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    rng = random.Random(0)
+    text = "".join(rng.choice("ab, A") for _ in range(n))
+    for name, func in (("最长回文子串", longest_palindromic_substring),
+                       ("回文子串计数", count_palindromic_substrings),
+                       ("极大回文枚举", lambda x: sum(1 for _ in maximal_palindromes(x)))):
+        start = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed:.2f}s ({n / elapsed / 1e6:.2f} M字符/秒), 结果 {result}")
@@ -1,5 +1,5 @@
 import pytest
-from palindrome import is_palindrome
+from palindrome import is_palindrome, is_palindrome_many, iter_is_palindrome
 
 def test_empty_string():
     """测试空字符串"""
@@ -66,4 +66,38 @@ def test_long_palindrome():
     assert is_palindrome(long_palindrome) == True
     
     long_non_palindrome = "a" * 999 + "b"
-    assert is_palindrome(long_non_palindrome) == False
\ No newline at end of file
+    assert is_palindrome(long_non_palindrome) == False
+
+def _is_palindrome_reference(s):
+    """原始实现，用于对照"""
+    cleaned = ''.join(char.lower() for char in s if char.isalnum())
+    return cleaned == cleaned[::-1]
+
+def test_unicode_characters():
+    """测试非ASCII字符与原始实现一致"""
+    assert is_palindrome("上海自来水来自海上") == True
+    assert is_palindrome("Ésé") == True
+    assert is_palindrome("ΣΑς σας") == _is_palindrome_reference("ΣΑς σας")
+    assert is_palindrome("İi̇") == _is_palindrome_reference("İi̇")
+    assert is_palindrome("ßSS") == False
+
+def test_chunk_boundaries():
+    """测试跨越分块边界的长输入"""
+    half = "Ab, 1-c! 数" * 20000
+    assert is_palindrome(half + "x" + half[::-1]) == True
+    assert is_palindrome(half + half[::-1].swapcase()) == True
+    assert is_palindrome(half + "y" + half[::-1] + "z") == False
+    assert is_palindrome("a" + "!" * 100000 + "A") == True
+
+def test_many():
+    """测试批量接口与逐个调用一致"""
+    words = ["", "a", "RaceCar", "hello", "No 'x' in Nixon", "上海自来水来自海上", "a\0a", "ab\0", "!!!"]
+    assert is_palindrome_many(words) == [is_palindrome(w) for w in words]
+    assert is_palindrome_many(words, chunk_size=2) == [is_palindrome(w) for w in words]
+    assert list(iter_is_palindrome(iter(words), chunk_size=3)) == [is_palindrome(w) for w in words]
+    assert is_palindrome_many([]) == []
+
+def test_many_type_error():
+    """测试批量接口的类型检查"""
+    with pytest.raises(TypeError):
+        is_palindrome_many(["abc", 123])
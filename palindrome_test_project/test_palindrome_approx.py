@@ -0,0 +1,65 @@
+import random
+from functools import lru_cache
+
+import pytest
+import palindrome_approx
+from palindrome_approx import is_k_palindrome, min_deletions, palindrome_distance
+
+
+def _brute_force(t, substitutions=True):
+    """区间 DP 对照实现"""
+    @lru_cache(maxsize=None)
+    def f(i, j):
+        if i >= j:
+            return 0
+        if t[i] == t[j]:
+            return f(i + 1, j - 1)
+        best = min(f(i + 1, j), f(i, j - 1)) + 1
+        if substitutions:
+            best = min(best, f(i + 1, j - 1) + 1)
+        return best
+    return f(0, len(t) - 1)
+
+def test_examples():
+    """测试基本用例"""
+    assert palindrome_distance("A man, a plan, a canal: Panama") == 0
+    assert palindrome_distance("") == 0
+    assert palindrome_distance("abca") == 1
+    assert palindrome_distance("abcd") == 2
+    assert min_deletions("abcd") == 3
+    assert min_deletions("Race, a car!") == 1
+    assert is_k_palindrome("abcda", 1) == True
+    assert is_k_palindrome("abcdea", 1) == False
+    assert is_k_palindrome("abcdea", 2) == True
+
+def test_against_brute_force():
+    """测试与区间 DP 一致"""
+    rng = random.Random(7)
+    for _ in range(300):
+        s = "".join(rng.choice("abcA, 数") for _ in range(rng.randrange(0, 25)))
+        t = s.lower().replace(",", "").replace(" ", "")
+        for substitutions in (True, False):
+            expected = _brute_force(t, substitutions)
+            assert palindrome_distance(s, substitutions) == expected
+            assert palindrome_approx._banded_distance(t, len(t), substitutions) == expected
+            k = rng.randrange(0, 6)
+            assert is_k_palindrome(s, k, substitutions) == (expected <= k)
+
+def test_long_near_palindrome():
+    """测试长串少量改动时按 limit 提前结束"""
+    rng = random.Random(1)
+    half = "".join(rng.choice("ab") for _ in range(50_000))
+    s = list(half + half[::-1])
+    s[10], s[70_000] = "x", "y"
+    s = "".join(s)
+    assert palindrome_distance(s) == 2
+    assert palindrome_distance(s, limit=1) is None
+    assert min_deletions(s) == 4
+    assert is_k_palindrome(s, 3, substitutions=False) == False
+
+def test_errors():
+    """测试非法输入"""
+    with pytest.raises(TypeError):
+        palindrome_distance(None)
+    with pytest.raises(ValueError):
+        palindrome_distance("ab", limit=-1)
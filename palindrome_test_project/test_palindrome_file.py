@@ -0,0 +1,32 @@
+import pytest
+from palindrome import is_palindrome
+from palindrome_file import is_palindrome_file
+
+
+def _write(tmp_path, text, name="data.txt"):
+    path = tmp_path / name
+    path.write_bytes(text.encode("utf-8"))
+    return path
+
+def test_empty_file(tmp_path):
+    """测试空文件"""
+    assert is_palindrome_file(_write(tmp_path, "")) == True
+
+def test_basic_file(tmp_path):
+    """测试与 is_palindrome 结果一致"""
+    for text in ["A man, a plan, a canal: Panama\n", "race a car", "上海自来水来自海上", "Ésé!"]:
+        assert is_palindrome_file(_write(tmp_path, text)) == is_palindrome(text)
+
+def test_multibyte_boundaries(tmp_path):
+    """测试多字节字符跨越分块边界"""
+    for shift in range(4):
+        half = "x" * shift + "数é😀Ab, " * 5000
+        assert is_palindrome_file(_write(tmp_path, half + half[::-1])) == True
+        assert is_palindrome_file(_write(tmp_path, half + "q" + half[::-1] + "z")) == False
+
+def test_invalid_utf8(tmp_path):
+    """测试非法 UTF-8"""
+    path = tmp_path / "bad.txt"
+    path.write_bytes(b"ab\xff\xfeba")
+    with pytest.raises(UnicodeDecodeError):
+        is_palindrome_file(path)
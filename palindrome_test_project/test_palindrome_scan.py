@@ -0,0 +1,73 @@
+import random
+
+import pytest
+from palindrome import is_palindrome
+from palindrome_scan import main, scan_file, split_ranges
+
+
+def _write(tmp_path, text, name="lines.txt"):
+    path = tmp_path / name
+    path.write_bytes(text.encode("utf-8"))
+    return path
+
+def _expected(text, sep="\n"):
+    lines = text.split(sep)
+    if text.endswith(sep):
+        lines.pop()
+    return [(i + 1, line.rstrip("\r")) for i, line in enumerate(lines)
+            if any(c.isalnum() for c in line) and is_palindrome(line)]
+
+def _random_text(seed, count=2000):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        half = "".join(rng.choice("aBé数, 1") for _ in range(rng.randrange(0, 8)))
+        lines.append(half + half[::-1] if rng.random() < 0.5 else half + "x")
+    return "\n".join(lines)
+
+def test_split_ranges(tmp_path):
+    """测试切分点都在换行之后且覆盖整个文件"""
+    path = _write(tmp_path, _random_text(1))
+    data = path.read_bytes()
+    ranges = split_ranges(path, chunk_bytes=100)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and data[end - 1:end] == b"\n"
+    assert split_ranges(_write(tmp_path, "", "empty.txt")) == []
+
+def test_scan_matches_is_palindrome(tmp_path):
+    """测试与逐行调用 is_palindrome 结果一致"""
+    text = _random_text(2)
+    path = _write(tmp_path, text)
+    assert list(scan_file(path, workers=1, chunk_bytes=64)) == _expected(text)
+
+def test_parallel_order(tmp_path):
+    """测试多进程时输出顺序与文件顺序一致"""
+    text = _random_text(3) + "\n"
+    path = _write(tmp_path, text)
+    stats = {}
+    result = list(scan_file(path, workers=3, chunk_bytes=97, stats=stats))
+    assert result == _expected(text)
+    assert stats == {"lines": 2000, "bytes": len(text.encode("utf-8")), "matches": len(result)}
+
+def test_line_endings_and_options(tmp_path):
+    """测试 CRLF、空行、最小长度、只计数和自定义分隔符"""
+    path = _write(tmp_path, "Aba\r\n\r\nxy\r\nNo lemon, no melon\r\n!!\r\nq")
+    assert list(scan_file(path, workers=1)) == [(1, "Aba"), (4, "No lemon, no melon"), (6, "q")]
+    assert list(scan_file(path, workers=1, min_length=3)) == [(1, "Aba"), (4, "No lemon, no melon")]
+    assert list(scan_file(path, workers=1, min_length=0))[1] == (2, "")
+    assert list(scan_file(path, workers=1, count_only=True)) == [(1, None), (4, None), (6, None)]
+    path = _write(tmp_path, "abba;上海自来水来自海上;xyz;", "records.txt")
+    assert list(scan_file(path, workers=1, sep=";")) == [(1, "abba"), (2, "上海自来水来自海上")]
+    with pytest.raises(ValueError):
+        list(scan_file(path, sep="a"))
+
+def test_cli(tmp_path, capsys):
+    """测试命令行输出"""
+    path = _write(tmp_path, "level\nhello\nRace car\n")
+    main([str(path), "-j", "1", "-q"])
+    assert capsys.readouterr().out == "1\tlevel\n3\tRace car\n"
+    main([str(path), "--count"])
+    captured = capsys.readouterr()
+    assert captured.out == "2\n"
+    assert "3 行" in captured.err
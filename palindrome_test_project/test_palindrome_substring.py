@@ -0,0 +1,62 @@
+import random
+
+import pytest
+from palindrome import is_palindrome
+from palindrome_substring import (count_palindromic_substrings, longest_palindromic_substring,
+                                  maximal_palindromes, normalize_with_offsets)
+
+
+def _brute_force(t):
+    """朴素算法：所有回文子串的 (start, end)"""
+    return [(i, j) for i in range(len(t)) for j in range(i + 1, len(t) + 1)
+            if t[i:j] == t[i:j][::-1]]
+
+def test_normalize_with_offsets():
+    """测试规范化与下标映射"""
+    t, offsets = normalize_with_offsets("A, b!C")
+    assert t == "abc"
+    assert list(offsets) == [0, 3, 5]
+
+def test_longest_palindromic_substring():
+    """测试最长回文子串映射回原字符串"""
+    s = "xyz A man, a plan, a canal: Panama!"
+    start, end = longest_palindromic_substring(s)
+    assert s[start:end] == "A man, a plan, a canal: Panama"
+    assert longest_palindromic_substring("") == (0, 0)
+    assert longest_palindromic_substring("!!!") == (0, 0)
+    s = "abba上海自来水来自海上"
+    start, end = longest_palindromic_substring(s)
+    assert s[start:end] == "上海自来水来自海上"
+
+def test_count_palindromic_substrings():
+    """测试回文子串计数"""
+    assert count_palindromic_substrings("aaa") == 6
+    assert count_palindromic_substrings("A-b-A") == 4
+    assert count_palindromic_substrings("") == 0
+
+def test_against_brute_force():
+    """测试与朴素算法一致"""
+    rng = random.Random(3)
+    for _ in range(200):
+        s = "".join(rng.choice("abA, ") for _ in range(rng.randrange(0, 30)))
+        t, _ = normalize_with_offsets(s)
+        pals = _brute_force(t)
+        assert count_palindromic_substrings(s) == len(pals)
+        start, end = longest_palindromic_substring(s)
+        assert is_palindrome(s[start:end])
+        longest = max((j - i for i, j in pals), default=0)
+        assert len(normalize_with_offsets(s[start:end])[0]) == longest
+        for start, end, length in maximal_palindromes(s, min_length=1):
+            assert is_palindrome(s[start:end])
+            assert len(normalize_with_offsets(s[start:end])[0]) == length
+
+def test_maximal_palindromes():
+    """测试极大回文枚举"""
+    spans = [(start, end) for start, end, _ in maximal_palindromes("abaab")]
+    assert spans == [(0, 3), (1, 5)]
+    assert len(list(maximal_palindromes("abaab", min_length=1))) == 6
+
+def test_type_error():
+    """测试非字符串输入"""
+    with pytest.raises(TypeError):
+        longest_palindromic_substring(None)
@@ -0,0 +1,83 @@
+# test_bank_history.py
+from decimal import Decimal
+
+import pytest
+from bank_history import TransferHistory
+
+
+def _history():
+    history = TransferHistory()
+    for t in range(10):
+        history.record("A", "B", 10 + t, timestamp=float(t))
+    history.record("C", "A", 99, timestamp=4.5)
+    return history
+
+
+def test_time_range_query():
+    """按时间范围查询，包含转入记录"""
+    records = _history().query("A", 3, 6)
+    assert [r.timestamp for r in records] == [3.0, 4.0, 4.5, 5.0]
+    assert records[2].src == "C" and records[2].amount == 99
+
+
+def test_pagination():
+    """分页与倒序"""
+    history = _history()
+    assert [r.timestamp for r in history.query("B", offset=2, limit=3)] == [2.0, 3.0, 4.0]
+    assert [r.timestamp for r in history.query("B", reverse=True, limit=2)] == [9.0, 8.0]
+    assert [r.timestamp for r in history.query("B", 0, 5, offset=1, limit=2, reverse=True)] == [3.0, 2.0]
+    assert history.count("A") == 11
+    assert history.count("B", 2, 4) == 2
+
+
+def test_invalid_paging():
+    """offset 和 limit 必须为非负整数"""
+    history = _history()
+    for kwargs in ({"offset": -1}, {"offset": 1.5}, {"limit": -1}, {"limit": 2.0}, {"limit": True}):
+        with pytest.raises(ValueError):
+            history.query("A", **kwargs)
+    assert history.query("A", limit=0) == []
+
+
+def test_unknown_account():
+    """没有记录的账户"""
+    history = _history()
+    assert history.query("Z") == []
+    assert history.count("Z") == 0
+
+
+def test_out_of_order_record():
+    """乱序写入仍保持时间顺序"""
+    history = _history()
+    history.record("A", "D", 1, timestamp=0.5)
+    assert [r.timestamp for r in history.query("A", 0, 2)] == [0.0, 0.5, 1.0]
+
+
+def test_transfer_records_only_success():
+    """只有成功的转账进入历史"""
+    history = TransferHistory(clock=lambda: 1.0)
+    a, b = {"balance": 10}, {"balance": 0}
+    assert history.transfer("A", a, "B", b, 5) is True
+    with pytest.raises(ValueError):
+        history.transfer("A", a, "B", b, 50)
+    assert len(history) == 1
+    assert history.get(0).dst == "B"
+
+
+def test_amounts_round_trip():
+    """金额按原值返回：整数不变成浮点数，大整数和 Decimal 不丢精度"""
+    history = _history()
+    assert [r.amount for r in history.query("B", limit=2)] == [10, 11]
+    assert type(history.get(0).amount) is int
+    big = 2 ** 53 + 1
+    history.record("A", "B", big, timestamp=20.0)
+    history.record("A", "B", 2 ** 70, timestamp=21.0)
+    history.record("A", "B", Decimal("0.10"), timestamp=22.0)
+    history.record("A", "B", 1.5, timestamp=23.0)
+    assert [r.amount for r in history.query("A", 20)] == [big, 2 ** 70, Decimal("0.10"), 1.5]
+    assert type(history.get(0).amount) is int
+
+    floats = TransferHistory()
+    floats.record("A", "B", 0.5, timestamp=0.0)
+    floats.record("A", "B", 2, timestamp=1.0)
+    assert [(r.amount, type(r.amount)) for r in floats.query("A")] == [(0.5, float), (2, int)]
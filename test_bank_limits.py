@@ -0,0 +1,77 @@
+# test_bank_limits.py
+import pytest
+from bank_limits import SlidingWindowLimit, TransferLimiter, TransferLimitExceededError
+
+
+def _pair():
+    return {"balance": 10_000}, {"balance": 0}
+
+
+def test_amount_limit():
+    """窗口内转出总额超限"""
+    limiter = TransferLimiter(SlidingWindowLimit(60, max_amount=100))
+    a, b = _pair()
+    assert limiter.transfer("A", a, b, 60, now=0) is True
+    with pytest.raises(TransferLimitExceededError):
+        limiter.transfer("A", a, b, 50, now=30)
+    assert a["balance"] == 9_940
+    # 超过窗口后额度恢复
+    assert limiter.transfer("A", a, b, 50, now=62) is True
+
+
+def test_float_amounts_reach_limit_exactly():
+    """浮点金额反复累加、滑出窗口后，恰好用满额度的转账仍被允许"""
+    limiter = TransferLimiter(SlidingWindowLimit(60, max_amount=0.3))
+    a, b = _pair()
+    limiter.transfer("A", a, b, 0.1, now=0)
+    limiter.transfer("A", a, b, 0.2, now=1)
+    with pytest.raises(TransferLimitExceededError):
+        limiter.transfer("A", a, b, 0.01, now=2)
+
+    # 窗口统计 11 个桶，每秒 0.1 恰好用满 1.1；长时间滑动后仍不会因累计误差被拒
+    limit = SlidingWindowLimit(10, max_amount=1.1, buckets=10)
+    for t in range(1000):
+        limit.check("B", 0.1, now=t)
+        limit.record("B", 0.1, now=t)
+    with pytest.raises(TransferLimitExceededError):
+        limit.check("B", 0.01, now=999)
+
+
+def test_count_limit():
+    """每分钟最多 N 笔"""
+    limiter = TransferLimiter(SlidingWindowLimit(60, max_count=3))
+    a, b = _pair()
+    for t in range(3):
+        limiter.transfer("A", a, b, 1, now=t)
+    with pytest.raises(TransferLimitExceededError):
+        limiter.transfer("A", a, b, 1, now=10)
+    # 其他账户不受影响
+    limiter.transfer("B", a, b, 1, now=10)
+
+
+def test_limit_error_is_value_error():
+    """限额异常兼容原有的 ValueError 处理"""
+    limiter = TransferLimiter(SlidingWindowLimit(60, max_count=1))
+    a, b = _pair()
+    limiter.transfer("A", a, b, 1, now=0)
+    with pytest.raises(ValueError):
+        limiter.transfer("A", a, b, 1, now=1)
+
+
+def test_failed_transfer_not_counted():
+    """余额不足的转账不占用限额"""
+    limiter = TransferLimiter(SlidingWindowLimit(60, max_count=1))
+    a, b = {"balance": 5}, {"balance": 0}
+    with pytest.raises(ValueError, match="余额不足"):
+        limiter.transfer("A", a, b, 10, now=0)
+    assert limiter.transfer("A", a, b, 5, now=1) is True
+
+
+def test_prune_idle_accounts():
+    """整个窗口无转账的账户状态被回收"""
+    limit = SlidingWindowLimit(60, max_count=5)
+    limiter = TransferLimiter(limit)
+    a, b = _pair()
+    limiter.transfer("A", a, b, 1, now=0)
+    assert limiter.prune(now=30) == 0
+    assert limiter.prune(now=200) == 1
@@ -0,0 +1,55 @@
+# test_bank_parallel.py
+import random
+
+import pytest
+from bank_parallel import ParallelTransferExecutor, apply_sequential
+
+
+def _accounts(n, balance=100):
+    return {f"acc{i}": {"balance": balance} for i in range(n)}
+
+
+def test_parallel_matches_sequential():
+    """随机批量转账，并行结果与顺序执行一致"""
+    rng = random.Random(7)
+    batch = [(f"acc{rng.randrange(20)}", f"acc{rng.randrange(20)}", rng.randint(-5, 80))
+             for _ in range(2000)]
+    seq = _accounts(20)
+    expected = apply_sequential(seq, batch)
+    par = _accounts(20)
+    assert ParallelTransferExecutor(4).run(par, batch) == expected
+    assert par == seq
+
+
+def test_cross_shard_chain():
+    """跨分片转账的入账能被后续转账使用"""
+    executor = ParallelTransferExecutor(2, shard_of=lambda acc, n: int(acc[-1]) % n)
+    accounts = {"a0": {"balance": 10}, "b1": {"balance": 0}, "c0": {"balance": 0}}
+    batch = [("a0", "b1", 10), ("b1", "c0", 10), ("b1", "c0", 1)]
+    assert executor.run(accounts, batch) == [True, True, "余额不足"]
+    assert accounts == {"a0": {"balance": 0}, "b1": {"balance": 0}, "c0": {"balance": 10}}
+
+
+def test_invalid_amount_message():
+    """金额非法时返回与 transfer 相同的错误信息"""
+    accounts = _accounts(4)
+    results = ParallelTransferExecutor(2).run(accounts, [("acc0", "acc1", 0)])
+    assert results == ["转账金额必须为正数"]
+
+
+def test_unknown_account():
+    """引用不存在的账户"""
+    with pytest.raises(KeyError):
+        ParallelTransferExecutor(2).run(_accounts(2), [("acc0", "nobody", 1)])
+
+
+def test_float_amounts_keep_order():
+    """浮点金额按账户严格保序，结果逐位一致"""
+    rng = random.Random(3)
+    batch = [(f"acc{rng.randrange(10)}", f"acc{rng.randrange(10)}", rng.random() * 30)
+             for _ in range(1000)]
+    seq = _accounts(10, balance=50.0)
+    expected = apply_sequential(seq, batch)
+    par = _accounts(10, balance=50.0)
+    assert ParallelTransferExecutor(3).run(par, batch) == expected
+    assert par == seq
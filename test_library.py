@@ -1,6 +1,8 @@
 # test_library.py
 import pytest
-from library import borrow_book, UserNotExistError, BookNotExistError, NoStockError, BOOKS
+from library import borrow_book, return_book, UserNotExistError, BookNotExistError, NoStockError, NoLoanError, BOOKS
+from library import (borrow_books, BORROW_OK, BORROW_NO_USER, BORROW_NO_BOOK,
+                     BORROW_NO_STOCK, BORROW_ABORTED)
 
 def test_borrow_success():
     """正常借书"""
@@ -30,4 +32,43 @@ def test_borrow_twice_reduce_stock():
     BOOKS[isbn]["stock"] = 2  # 先重置
     borrow_book("1001", isbn)
     borrow_book("1002", isbn)
-    assert BOOKS[isbn]["stock"] == 0
\ No newline at end of file
+    assert BOOKS[isbn]["stock"] == 0
+
+def test_borrow_books_partial():
+    """批量借书：逐项返回结果码"""
+    isbn = "978-7-111-54320-0"
+    BOOKS[isbn]["stock"] = 2
+    results = borrow_books("1001", [isbn, "000-0-000-00000-0", isbn, "978-7-111-12345-6", isbn])
+    assert results == [BORROW_OK, BORROW_NO_BOOK, BORROW_OK, BORROW_NO_STOCK, BORROW_NO_STOCK]
+    assert BOOKS[isbn]["stock"] == 0
+
+def test_borrow_books_all_or_nothing():
+    """全部成功模式：有一项失败则都不借"""
+    isbn = "978-7-111-54320-0"
+    BOOKS[isbn]["stock"] = 2
+    results = borrow_books("1001", [isbn, "978-7-111-12345-6"], all_or_nothing=True)
+    assert results == [BORROW_ABORTED, BORROW_NO_STOCK]
+    assert BOOKS[isbn]["stock"] == 2
+
+def test_borrow_books_user_not_exist():
+    """批量借书：用户不存在"""
+    assert borrow_books("9999", ["978-7-111-54320-0"] * 2) == [BORROW_NO_USER] * 2
+
+def test_return_book():
+    """还书库存加一"""
+    isbn = "978-7-111-12345-6"
+    BOOKS[isbn]["stock"] = 1
+    assert borrow_book("1002", isbn) is True
+    assert return_book("1002", isbn) is True
+    assert BOOKS[isbn]["stock"] == 1
+    BOOKS[isbn]["stock"] = 0
+    with pytest.raises(BookNotExistError):
+        return_book("1002", "000-0-000-00000-0")
+
+def test_return_requires_loan():
+    """没有在借记录的还书被拒绝，库存不变"""
+    isbn = "978-7-111-12345-6"
+    BOOKS[isbn]["stock"] = 0
+    with pytest.raises(NoLoanError):
+        return_book("1001", isbn)
+    assert BOOKS[isbn]["stock"] == 0
@@ -0,0 +1,134 @@
+# test_library_bloom.py
+import threading
+
+import pytest
+import library
+from library import borrow_book, BookNotExistError, UserNotExistError
+from library_bloom import BloomFilter, BloomGuardedCatalog
+from library_sqlite import SQLiteLibrary
+
+
+def test_no_false_negatives():
+    """已添加的元素一定能查到"""
+    keys = [f"978-7-{i:08d}-0" for i in range(5000)]
+    bloom = BloomFilter.from_keys(keys, error_rate=0.01)
+    assert all(key in bloom for key in keys)
+
+
+def test_false_positive_rate():
+    """误判率接近设定值"""
+    bloom = BloomFilter.from_keys((f"in-{i}" for i in range(10_000)), error_rate=0.01)
+    misses = sum(f"out-{i}" in bloom for i in range(10_000))
+    assert misses < 300
+
+
+def test_rebuild_when_saturated():
+    """超过容量后重建"""
+    bloom = BloomFilter(10)
+    bloom.update(range(20))
+    assert bloom.saturated
+    bloom.rebuild(range(20))
+    assert not bloom.saturated and all(i in bloom for i in range(20))
+
+
+def test_repeated_adds_counted_once():
+    """重复添加同一个键不增加计数"""
+    bloom = BloomFilter(100)
+    for _ in range(50):
+        bloom.add("978-7-111-54320-0")
+    bloom.update(["978-7-111-54320-0"] * 10)
+    assert bloom.count == 1 and not bloom.saturated
+
+
+def test_concurrent_add_and_rebuild():
+    """并发添加不丢比特，重建期间查询不会漏掉已有的键"""
+    bloom = BloomFilter(100_000)
+    base = [f"base-{i}" for i in range(2000)]
+    bloom.update(base)
+    missed = []
+    stop = threading.Event()
+
+    def writer(n):
+        bloom.update(f"w{n}-{i}" for i in range(5000))
+
+    def reader():
+        while not stop.is_set():
+            missed.extend(key for key in base[::50] if key not in bloom)
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for t in readers:
+        t.start()
+    writers = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in writers:
+        t.start()
+    for t in writers:
+        t.join()
+    assert all(f"w{n}-{i}" in bloom for n in range(4) for i in range(5000))
+    for capacity in (5000, 50_000, 5000):
+        bloom.rebuild(base, capacity)
+    stop.set()
+    for t in readers:
+        t.join()
+    assert missed == []
+    assert bloom.capacity == 5000 and bloom.count <= len(base)
+
+
+def test_adds_during_rebuild_kept():
+    """重建进行中添加的键在替换后仍能查到"""
+    bloom = BloomFilter(100)
+    base = [f"base-{i}" for i in range(50)]
+    bloom.update(base)
+    late = [f"late-{i}" for i in range(200)]
+
+    def keys():
+        # 遍历到一半时，另一个线程添加新键
+        yield from base[:25]
+        writer = threading.Thread(target=lambda: [bloom.add(key) for key in late])
+        writer.start()
+        writer.join()
+        yield from base[25:]
+
+    bloom.rebuild(keys(), capacity=1000)
+    assert bloom.capacity == 1000
+    assert all(key in bloom for key in base + late)
+
+
+def test_guarded_catalog_concurrent_inserts():
+    """多线程写入带过滤器的目录，触发重建时不丢键"""
+    catalog = BloomGuardedCatalog({}, capacity=16)
+
+    def writer(n):
+        for i in range(3000):
+            catalog[f"{n}-{i}"] = {"title": "书", "stock": 1}
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(f"{n}-{i}" in catalog.bloom for n in range(4) for i in range(3000))
+
+
+def test_guarded_catalog_with_borrow(monkeypatch):
+    """带过滤器的目录可以直接替换 BOOKS"""
+    catalog = BloomGuardedCatalog({"978-7-111-54320-0": {"title": "Python编程", "stock": 1}})
+    monkeypatch.setattr(library, "BOOKS", catalog)
+    monkeypatch.setattr(library, "LISTENERS", [])
+    monkeypatch.setattr(library, "LOANS", {})
+    with pytest.raises(BookNotExistError):
+        borrow_book("1001", "000-0-000-00000-0")
+    catalog["978-7-111-00000-1"] = {"title": "新书", "stock": 1}
+    assert borrow_book("1001", "978-7-111-00000-1") is True
+
+
+def test_sqlite_with_bloom(tmp_path):
+    """SQLite 存储先查过滤器，异常优先级不变"""
+    bloom = BloomFilter(1000)
+    with SQLiteLibrary(str(tmp_path / "library.db"), bloom=bloom) as lib:
+        lib.load({"1001": "Alice"}, {"978-7-111-54320-0": {"title": "Python编程", "stock": 1}})
+        assert "978-7-111-54320-0" in bloom
+        assert lib.borrow_book("1001", "978-7-111-54320-0") is True
+        with pytest.raises(BookNotExistError):
+            lib.borrow_book("1001", "000-0-000-00000-0")
+        with pytest.raises(UserNotExistError):
+            lib.borrow_book("9999", "000-0-000-00000-0")
@@ -0,0 +1,109 @@
+# test_library_circulation.py
+import threading
+
+import pytest
+import library
+from library import NoStockError
+from library_circulation import CirculationService, NoLoanError
+
+ISBN = "978-7-111-54320-0"
+
+
+@pytest.fixture(autouse=True)
+def books(monkeypatch):
+    data = {ISBN: {"title": "Python编程", "stock": 1}}
+    monkeypatch.setattr(library, "BOOKS", data)
+    monkeypatch.setattr(library, "USERS", {"1001": "Alice", "1002": "Bob", "1003": "Carol"})
+    monkeypatch.setattr(library, "LISTENERS", [])
+    monkeypatch.setattr(library, "LOANS", {})
+    return data
+
+
+def test_concurrent_borrow_never_negative(books):
+    """多线程同时借同一本书，库存不会变成负数"""
+    books[ISBN]["stock"] = 100
+    service = CirculationService()
+    successes = []
+
+    def kiosk():
+        for _ in range(50):
+            try:
+                successes.append(service.borrow("1001", ISBN))
+            except NoStockError:
+                pass
+
+    threads = [threading.Thread(target=kiosk) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(successes) == 100
+    assert books[ISBN]["stock"] == 0
+
+
+def test_return_goes_to_reservation_queue(books):
+    """还回的书按先后顺序交给预约读者"""
+    fulfilled = []
+    service = CirculationService(on_fulfilled=lambda u, i: fulfilled.append(u))
+    assert service.reserve("1001", ISBN) is True
+    assert service.reserve("1002", ISBN) is False
+    assert service.reserve("1003", ISBN) is False
+    assert service.waiting(ISBN) == ["1002", "1003"]
+
+    assert service.return_book("1001", ISBN) == "1002"
+    assert books[ISBN]["stock"] == 0
+    assert service.return_book("1002", ISBN) == "1003"
+    assert service.return_book("1003", ISBN) is None
+    assert books[ISBN]["stock"] == 1
+    assert fulfilled == ["1002", "1003"]
+
+
+def test_cancel_reservation(books):
+    """取消预约后不会再分配给该读者"""
+    service = CirculationService()
+    service.borrow("1001", ISBN)
+    service.reserve("1002", ISBN)
+    assert service.cancel_reservation("1002", ISBN) is True
+    assert service.cancel_reservation("1002", ISBN) is False
+    assert service.return_book("1001", ISBN) is None
+    assert books[ISBN]["stock"] == 1
+
+
+def test_walk_in_cannot_jump_queue(books):
+    """有人排队时，补货的库存先分给排队的读者"""
+    fulfilled = []
+    service = CirculationService(on_fulfilled=lambda u, i: fulfilled.append(u))
+    service.borrow("1001", ISBN)
+    service.reserve("1002", ISBN)
+    books[ISBN]["stock"] += 1  # 补货
+    with pytest.raises(NoStockError):
+        service.borrow("1003", ISBN)
+    assert fulfilled == ["1002"]
+    assert service.waiting(ISBN) == []
+    assert service.loans("1002", ISBN) == 1
+    assert service.loans("1003", ISBN) == 0
+    assert books[ISBN]["stock"] == 0
+
+
+def test_return_requires_loan(books):
+    """没有借阅记录的还书被拒绝，库存不会虚增"""
+    service = CirculationService()
+    service.borrow("1001", ISBN)
+    with pytest.raises(NoLoanError):
+        service.return_book("1002", ISBN)
+    assert service.return_book("1001", ISBN) is None
+    with pytest.raises(NoLoanError):
+        service.return_book("1001", ISBN)
+    assert books[ISBN]["stock"] == 1
+
+
+def test_unknown_isbn_does_not_grow_locks(books):
+    """扫到不存在的条码不会增加锁"""
+    service = CirculationService(stripes=4)
+    for i in range(1000):
+        with pytest.raises(library.BookNotExistError):
+            service.borrow("1001", f"missing-{i}")
+        with pytest.raises(library.BookNotExistError):
+            service.return_book("1001", f"missing-{i}")
+    assert len(service._locks) == 4
+    assert service._queues == {} and library.LOANS == {}
@@ -0,0 +1,63 @@
+# test_library_compact.py
+import tracemalloc
+
+import pytest
+import library
+from library import borrow_book, NoStockError, BookNotExistError
+from library_compact import CompactCatalog, memory_report
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    catalog = CompactCatalog({
+        "978-7-111-54320-0": {"title": "Python编程", "stock": 2},
+        "978-7-111-12345-6": {"title": "算法导论", "stock": 0},
+    })
+    monkeypatch.setattr(library, "BOOKS", catalog)
+    monkeypatch.setattr(library, "LISTENERS", [])
+    monkeypatch.setattr(library, "LOANS", {})
+    return catalog
+
+
+def test_borrow_with_compact_catalog(catalog):
+    """borrow_book 直接使用紧凑目录"""
+    assert borrow_book("1001", "978-7-111-54320-0") is True
+    assert catalog["978-7-111-54320-0"]["stock"] == 1
+    with pytest.raises(NoStockError):
+        borrow_book("1001", "978-7-111-12345-6")
+    with pytest.raises(BookNotExistError):
+        borrow_book("1001", "000-0-000-00000-0")
+
+
+def test_mapping_semantics(catalog):
+    """与字典目录相同的读写方式"""
+    assert catalog["978-7-111-54320-0"] == {"title": "Python编程", "stock": 2}
+    catalog["978-7-111-00000-1"] = {"title": "Python编程", "stock": 5}
+    assert catalog["978-7-111-00000-1"]["title"] is catalog["978-7-111-54320-0"]["title"]
+    del catalog["978-7-111-12345-6"]
+    assert "978-7-111-12345-6" not in catalog
+    catalog["978-7-111-00000-2"] = {"title": "数据结构", "stock": 1}
+    assert len(catalog) == 3
+    assert sorted(catalog) == ["978-7-111-00000-1", "978-7-111-00000-2", "978-7-111-54320-0"]
+    with pytest.raises(KeyError):
+        catalog["978-7-111-54320-0"]["author"]
+
+
+def test_memory_report():
+    """紧凑目录比字典目录省内存"""
+    report = memory_report(10_000)
+    assert report["compact"] < report["dict"]
+
+
+def test_memory_usage_matches_tracemalloc():
+    """估算包括行号 int 对象和书名池，与实际分配的内存一致"""
+    n = 20_000
+    tracemalloc.start()
+    try:
+        catalog = CompactCatalog()
+        for i in range(n):
+            catalog[f"978-7-{i:08d}-0"] = {"title": f"图书{i % (n // 2)}", "stock": i % 5}
+        actual = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert abs(catalog.memory_usage() - actual) < 0.05 * actual
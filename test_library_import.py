@@ -0,0 +1,104 @@
+# test_library_import.py
+import pytest
+from library_import import DUPLICATE_REASON, import_books, import_users, is_valid_isbn
+
+
+def test_isbn_format():
+    """ISBN 格式与校验位"""
+    assert is_valid_isbn("978-7-111-54320-0")
+    assert is_valid_isbn("0-306-40615-X")
+    assert not is_valid_isbn("978-7-111")
+    assert not is_valid_isbn("97871115432A0")
+    assert is_valid_isbn("978-0-306-40615-7", verify_checksum=True)
+    assert not is_valid_isbn("978-0-306-40615-8", verify_checksum=True)
+    assert is_valid_isbn("0-306-40615-2", verify_checksum=True)
+    assert not is_valid_isbn("٩٧٨٧١١١٥٤٣٢٠٠")
+    assert not is_valid_isbn("978711154320²", verify_checksum=True)
+
+
+def test_import_books_csv(tmp_path):
+    """CSV 分块导入并拒绝非法行"""
+    path = tmp_path / "books.csv"
+    path.write_text(
+        "isbn,title,stock\n"
+        "978-7-111-54320-0,Python编程,2\n"
+        "bad-isbn,坏数据,1\n"
+        "978-7-111-12345-6,算法导论,-1\n"
+        "978-7-111-00000-1,,1\n"
+        "978-7-111-00000-2,数据结构,0\n"
+        "978-7-111-00000-3\n",
+        encoding="utf-8",
+    )
+    books, chunks = {}, []
+    report = import_books(str(path), books, chunk_size=1, on_chunk=lambda c: chunks.append(dict(c)))
+    assert report.loaded == 2
+    assert report.rejected == 4
+    assert [line for line, _ in report.rejects] == [3, 4, 5, 7]
+    assert books["978-7-111-00000-2"] == {"title": "数据结构", "stock": 0}
+    assert len(chunks) == 2
+
+
+def test_import_books_jsonl(tmp_path):
+    """JSONL 导入"""
+    path = tmp_path / "books.jsonl"
+    path.write_text(
+        '{"isbn": "978-7-111-54320-0", "title": "Python编程", "stock": 3}\n'
+        '{"isbn": "978-7-111-54320-1", "title": "缺库存"}\n'
+        'not json\n',
+        encoding="utf-8",
+    )
+    books = {}
+    report = import_books(str(path), books)
+    assert report.loaded == 1 and report.rejected == 2
+    assert books["978-7-111-54320-0"]["stock"] == 3
+
+
+def test_import_users(tmp_path):
+    """读者导入"""
+    path = tmp_path / "users.csv"
+    path.write_text("user_id,name\n2001,Carol\n,NoId\n", encoding="utf-8")
+    users = {}
+    report = import_users(str(path), users)
+    assert users == {"2001": "Carol"}
+    assert report.rejected == 1
+
+
+def test_duplicates_counted(tmp_path):
+    """块内重复的行计入被拒绝的行，导入和拒绝的行数加起来等于读取的行数"""
+    path = tmp_path / "books.csv"
+    path.write_text(
+        "isbn,title,stock\n"
+        "978-7-111-54320-0,Python编程,1\n"
+        "978-7-111-54320-0,Python编程（第2版）,2\n"
+        "bad-isbn,坏数据,1\n"
+        "978-7-111-00000-2,数据结构,0\n"
+        "978-7-111-54320-0,Python编程（第3版）,3\n",
+        encoding="utf-8",
+    )
+    books = {}
+    report = import_books(str(path), books, chunk_size=10)
+    assert report.loaded + report.rejected == 5
+    assert report.loaded == 2 and report.rejected == 3
+    assert sorted(report.rejects) == [(2, DUPLICATE_REASON), (3, DUPLICATE_REASON), (4, "ISBN格式错误: bad-isbn")]
+    assert books["978-7-111-54320-0"] == {"title": "Python编程（第3版）", "stock": 3}
+
+
+def test_bom_and_non_ascii_stock(tmp_path):
+    """带 BOM 的 CSV 可以导入，非 ASCII 数字的库存被拒绝"""
+    path = tmp_path / "books.csv"
+    path.write_text(
+        "isbn,title,stock\n"
+        "978-7-111-54320-0,Python编程,2\n"
+        "978-7-111-00000-2,数据结构,٣\n",
+        encoding="utf-8-sig",
+    )
+    books = {}
+    report = import_books(str(path), books)
+    assert books == {"978-7-111-54320-0": {"title": "Python编程", "stock": 2}}
+    assert report.rejected == 1 and report.rejects[0][0] == 3
+
+
+def test_unknown_format(tmp_path):
+    """不支持的格式"""
+    with pytest.raises(ValueError):
+        import_books(str(tmp_path / "books.xml"), {})
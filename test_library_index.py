@@ -0,0 +1,66 @@
+# test_library_index.py
+import pytest
+import library
+from library import borrow_book
+from library_index import CatalogIndex, tokenize
+
+
+@pytest.fixture
+def books(monkeypatch):
+    data = {
+        "978-0-00-000001-1": {"title": "Python编程", "stock": 1},
+        "978-0-00-000002-2": {"title": "Python Cookbook", "stock": 0},
+        "978-0-00-000003-3": {"title": "算法导论", "stock": 3},
+        "978-0-00-000004-4": {"title": "ＰＹＴＨＯＮ 数据分析", "stock": 2},
+    }
+    monkeypatch.setattr(library, "BOOKS", data)
+    monkeypatch.setattr(library, "LISTENERS", [])
+    monkeypatch.setattr(library, "LOANS", {})
+    return data
+
+
+def test_tokenize():
+    """英文按片段、汉字按单字切分，全角转半角"""
+    assert tokenize("Python编程") == ["python", "编", "程"]
+    assert tokenize("ＰＹＴＨＯＮ 3.12!") == ["python", "3", "12"]
+
+
+def test_search(books):
+    """多词查询取交集"""
+    index = CatalogIndex(books)
+    assert index.search("python") == ["978-0-00-000001-1", "978-0-00-000002-2", "978-0-00-000004-4"]
+    assert index.search("python 编程") == ["978-0-00-000001-1"]
+    assert index.search("python", in_stock_only=True, limit=1) == ["978-0-00-000001-1"]
+    assert index.search("java") == []
+
+
+def test_autocomplete(books):
+    """前缀补全"""
+    index = CatalogIndex(books)
+    assert [isbn for isbn, _ in index.autocomplete("Py")] == [
+        "978-0-00-000002-2", "978-0-00-000004-4", "978-0-00-000001-1"]
+    assert index.autocomplete("python c") == [("978-0-00-000002-2", "Python Cookbook")]
+    assert index.autocomplete("py", in_stock_only=True, limit=1) == [
+        ("978-0-00-000004-4", "ＰＹＴＨＯＮ 数据分析")]
+
+
+def test_borrow_updates_in_stock(books):
+    """借走最后一本后从有货集合中移除"""
+    index = CatalogIndex()
+    index.attach()
+    borrow_book("1001", "978-0-00-000001-1")
+    assert not index.in_stock("978-0-00-000001-1")
+    assert index.search("编程", in_stock_only=True) == []
+    index.detach()
+    assert library.LISTENERS == []
+
+
+def test_add_and_remove_book(books):
+    """增量增删图书"""
+    index = CatalogIndex(books)
+    books["978-0-00-000005-5"] = {"title": "Python进阶", "stock": 1}
+    index.add_book("978-0-00-000005-5")
+    assert "978-0-00-000005-5" in index.search("python 进阶")
+    index.remove_book("978-0-00-000001-1")
+    assert index.search("编程") == []
+    assert [isbn for isbn, _ in index.autocomplete("python编")] == []
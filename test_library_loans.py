@@ -0,0 +1,98 @@
+# test_library_loans.py
+import random
+import threading
+
+import pytest
+import library
+from library import borrow_book, return_book
+from library_loans import LoanLedger, _SortedBlocks
+
+DAY = 86400
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    monkeypatch.setattr(library, "BOOKS", {
+        "isbn-1": {"title": "Python编程", "stock": 5},
+        "isbn-2": {"title": "算法导论", "stock": 5},
+    })
+    monkeypatch.setattr(library, "LISTENERS", [])
+    monkeypatch.setattr(library, "LOANS", {})
+    now = [0.0]
+    ledger = LoanLedger(loan_days=10, clock=lambda: now[0])
+    ledger.attach()
+    ledger.now = now
+    return ledger
+
+
+def test_borrow_creates_loan(ledger):
+    """借书建立借阅记录，还书关闭最早的一条"""
+    borrow_book("1001", "isbn-1")
+    ledger.now[0] = DAY
+    borrow_book("1001", "isbn-1")
+    assert len(ledger) == 2
+    return_book("1001", "isbn-1")
+    (loan,) = ledger.overdue(as_of=100 * DAY)
+    assert loan.borrowed_at == DAY and loan.due_at == 11 * DAY
+
+
+def test_overdue_and_next_due(ledger):
+    """逾期查询和即将到期查询"""
+    for day, (user, isbn) in enumerate([("1001", "isbn-1"), ("1002", "isbn-2"), ("1002", "isbn-1")]):
+        ledger.now[0] = day * DAY
+        borrow_book(user, isbn)
+    assert [l.user_id for l in ledger.overdue(as_of=11.5 * DAY)] == ["1001", "1002"]
+    assert [l.isbn for l in ledger.next_due(5, as_of=11.5 * DAY)] == ["isbn-1"]
+    assert [l.loan_id for l in ledger.next_due(2, as_of=0)] == [1, 2]
+    assert ledger.overdue(as_of=11.5 * DAY, limit=1)[0].loan_id == 1
+
+
+def test_returned_loans_released(ledger):
+    """还书后索引不再保留记录"""
+    borrow_book("1001", "isbn-1")
+    return_book("1001", "isbn-1")
+    assert len(ledger) == 0
+    assert ledger.overdue(as_of=100 * DAY) == []
+    assert ledger.close_loan("1001", "isbn-1") is None
+
+
+def test_sorted_blocks_against_sorted_list():
+    """分块有序表与普通排序结果一致"""
+    rng = random.Random(5)
+    blocks, reference = _SortedBlocks(), []
+    for i in range(5000):
+        item = (rng.randrange(1000), i)
+        blocks.add(item)
+        reference.append(item)
+        if i % 3 == 0:
+            victim = reference.pop(rng.randrange(len(reference)))
+            blocks.remove(victim)
+    reference.sort()
+    assert list(blocks) == reference
+    assert list(blocks.iter_from((500,))) == [x for x in reference if x >= (500,)]
+
+
+def test_concurrent_open_close():
+    """多线程同时借还，编号不重复，到期索引与在借记录一致"""
+    ledger = LoanLedger(loan_days=10, clock=lambda: 0.0)
+    opened = []
+
+    def kiosk(n):
+        rng = random.Random(n)
+        for i in range(2000):
+            user = f"{n}-{i % 50}"
+            loan = ledger.open_loan(user, "isbn-1", now=rng.randrange(1000) * DAY)
+            opened.append(loan.loan_id)
+            if i % 2:
+                ledger.close_loan(user, "isbn-1")
+
+    threads = [threading.Thread(target=kiosk, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(opened)) == len(opened) == 16000
+    assert len(ledger) == 8000
+    remaining = ledger.overdue(as_of=10000 * DAY)
+    assert len(remaining) == 8000
+    assert [l.due_at for l in remaining] == sorted(l.due_at for l in remaining)
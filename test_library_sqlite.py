@@ -0,0 +1,62 @@
+# test_library_sqlite.py
+import threading
+
+import pytest
+from library import UserNotExistError, BookNotExistError, NoStockError
+from library_sqlite import SQLiteLibrary
+
+USERS = {"1001": "Alice", "1002": "Bob"}
+BOOKS = {
+    "978-7-111-54320-0": {"title": "Python编程", "stock": 2},
+    "978-7-111-12345-6": {"title": "算法导论", "stock": 0},
+}
+
+
+@pytest.fixture
+def lib(tmp_path):
+    with SQLiteLibrary(str(tmp_path / "library.db")) as lib:
+        lib.load(USERS, BOOKS)
+        yield lib
+
+
+def test_borrow_success(lib):
+    """正常借书"""
+    assert lib.borrow_book("1001", "978-7-111-54320-0") is True
+    assert lib.stock("978-7-111-54320-0") == 1
+
+
+def test_borrow_errors(lib):
+    """与 library.borrow_book 相同的异常"""
+    with pytest.raises(UserNotExistError):
+        lib.borrow_book("9999", "978-7-111-54320-0")
+    with pytest.raises(BookNotExistError):
+        lib.borrow_book("1001", "000-0-000-00000-0")
+    with pytest.raises(NoStockError):
+        lib.borrow_book("1001", "978-7-111-12345-6")
+
+
+def test_return_book(lib):
+    """还书库存加一"""
+    assert lib.return_book("1002", "978-7-111-12345-6") is True
+    assert lib.stock("978-7-111-12345-6") == 1
+
+
+def test_concurrent_writers(lib):
+    """多线程并发借书不会超借"""
+    lib.load(USERS, {"isbn-hot": {"title": "热门书", "stock": 50}})
+    successes = []
+
+    def kiosk():
+        for _ in range(20):
+            try:
+                successes.append(lib.borrow_book("1001", "isbn-hot"))
+            except NoStockError:
+                pass
+
+    threads = [threading.Thread(target=kiosk) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(successes) == 50
+    assert lib.stock("isbn-hot") == 0
@@ -3,10 +3,185 @@ Checkout微服务
 提供购物车结算功能的API接口
 """
 
+import hmac
+import json
+import threading
+from itertools import islice
+
 from flask import Flask, request, jsonify
 
+try:
+    from .cart_schema import validate_items
+    from .cart_sessions import (AmountTooLargeError, CartFullError, CartSessionStore, LineNotFoundError,
+                                SessionNotFoundError)
+    from .cart_stream import CartFormatError, iter_items
+    from .pricing import CatalogError, PriceCatalog
+    from .result_cache import ResultCache, content_key
+    from .totals import CURRENCY_DIGITS, MAX_PRICE, round_units, sum_units, to_units
+except ImportError:  # 直接运行 python app/app.py 时
+    from cart_schema import validate_items
+    from cart_sessions import (AmountTooLargeError, CartFullError, CartSessionStore, LineNotFoundError,
+                               SessionNotFoundError)
+    from cart_stream import CartFormatError, iter_items
+    from pricing import CatalogError, PriceCatalog
+    from result_cache import ResultCache, content_key
+    from totals import CURRENCY_DIGITS, MAX_PRICE, round_units, sum_units, to_units
+
 app = Flask(__name__)
 
+# 请求体超过该字节数（或长度未知）时流式解析 items，设为 None 关闭
+app.config.setdefault("CHECKOUT_STREAM_THRESHOLD", 1 << 20)
+# 总金额的舍入方式，取值见 totals.ROUNDING_MODES
+app.config.setdefault("CHECKOUT_ROUNDING", "half_even")
+# 批量结算一次最多的购物车数，设为 None 不限制
+app.config.setdefault("CHECKOUT_BATCH_LIMIT", 10000)
+# 结算结果缓存的条目数（设为 0 关闭）和有效期（秒）
+app.config.setdefault("CHECKOUT_CACHE_SIZE", 10000)
+app.config.setdefault("CHECKOUT_CACHE_TTL", 60)
+# 商品不合法时最多报告的错误数（流式解析时遇到第一个错误就返回）
+app.config.setdefault("CHECKOUT_MAX_ERRORS", 100)
+# 购物车会话的空闲超时（秒）、最多会话数和每个购物车最多的行数
+app.config.setdefault("CART_SESSION_IDLE", 1800)
+app.config.setdefault("CART_SESSION_MAX", 100000)
+app.config.setdefault("CART_SESSION_MAX_LINES", 100000)
+# 启动后首次使用时加载的价目表 JSON 文件路径（格式见 pricing.py），也可通过 PUT /catalog 加载
+app.config.setdefault("CHECKOUT_CATALOG", None)
+# PUT /catalog 的管理令牌，请求须带 "Authorization: Bearer <令牌>"；为 None 时不允许通过接口修改价目表
+app.config.setdefault("CHECKOUT_CATALOG_ADMIN_TOKEN", None)
+
+# 每块校验和计算的商品数
+_PRICE_BLOCK = 4096
+
+# 首次使用时创建缓存、会话存储和价目表，保证并发的第一批请求只创建一份
+_init_lock = threading.Lock()
+
+
+def _use_stream():
+    """是否对当前请求使用流式解析"""
+    threshold = app.config.get("CHECKOUT_STREAM_THRESHOLD")
+    if threshold is None or not request.is_json:
+        return False
+    length = request.content_length
+    return length is None or length > threshold
+
+
+def _get_cache():
+    """结算结果缓存，首次使用时按配置创建；关闭时返回 None"""
+    cache = app.extensions.get("checkout_cache")
+    if cache is None and app.config["CHECKOUT_CACHE_SIZE"]:
+        with _init_lock:
+            cache = app.extensions.get("checkout_cache")
+            if cache is None:
+                cache = ResultCache(app.config["CHECKOUT_CACHE_SIZE"], app.config["CHECKOUT_CACHE_TTL"])
+                app.extensions["checkout_cache"] = cache
+    return cache
+
+
+def _get_sessions():
+    """购物车会话存储，首次使用时按配置创建"""
+    sessions = app.extensions.get("cart_sessions")
+    if sessions is None:
+        with _init_lock:
+            sessions = app.extensions.get("cart_sessions")
+            if sessions is None:
+                # 总额上限与单价上限相同，换算成金额时不会超出浮点数范围
+                sessions = CartSessionStore(app.config["CART_SESSION_IDLE"], app.config["CART_SESSION_MAX"],
+                                            app.config["CART_SESSION_MAX_LINES"],
+                                            max_units=to_units(MAX_PRICE))
+                app.extensions["cart_sessions"] = sessions
+    return sessions
+
+
+def _get_catalog():
+    """价目表，首次使用时创建并加载 CHECKOUT_CATALOG 指定的文件"""
+    catalog = app.extensions.get("price_catalog")
+    if catalog is None:
+        with _init_lock:
+            catalog = app.extensions.get("price_catalog")
+            if catalog is None:
+                catalog = PriceCatalog()
+                path = app.config["CHECKOUT_CATALOG"]
+                if path:
+                    with open(path, encoding="utf-8") as f:
+                        catalog.load(json.load(f))
+                app.extensions["price_catalog"] = catalog
+    return catalog
+
+
+def _price_items(items, max_errors=None):
+    """
+    校验商品并累加金额
+    
+    商品按块交给编译好的校验函数（见 cart_schema.py），一次遍历检查所有商品并记录
+    每个错误的下标和字段，错误数达到 max_errors（默认 CHECKOUT_MAX_ERRORS）时停止。
+    金额按整数单位精确累加（见 totals.py），最后按 CHECKOUT_ROUNDING 舍入到分
+    
+    返回 (总金额, 错误响应)，二者恰有一个为 None。错误响应中 error 为第一个错误，
+    商品不合法时另有 errors 列出各个错误，例如:
+    {
+        "error": "price must be a non-negative number",
+        "errors": [{"index": 3, "field": "price", "error": "price must be a non-negative number"}]
+    }
+    """
+    if max_errors is None:
+        max_errors = app.config["CHECKOUT_MAX_ERRORS"]
+    units = 0
+    count = 0
+    errors = []
+    columns = ([], [])
+    items = iter(items)
+    while True:
+        # 每次取一块，流式解析时内存也不随购物车增长
+        block = list(islice(items, _PRICE_BLOCK))
+        if not block:
+            break
+        validate_items(block, count, columns, errors, max_errors)
+        count += len(block)
+        if not errors:
+            units += sum_units(*columns)
+        elif len(errors) >= max_errors:
+            break
+        columns[0].clear()
+        columns[1].clear()
+    
+    if errors:
+        return None, {
+            "error": errors[0][2],
+            "errors": [{"index": index, "field": field, "error": message}
+                       for index, field, message in errors],
+        }
+    
+    # 检查购物车是否为空
+    if not count:
+        return None, {"error": "empty cart"}
+    
+    cents = round_units(units, app.config["CHECKOUT_ROUNDING"])
+    try:
+        return cents / 10 ** CURRENCY_DIGITS, None
+    except OverflowError:
+        # 单价不超过 MAX_PRICE，但乘以很大的数量后总额可能超出浮点数范围
+        return None, {"error": "total too large"}
+
+
+def _price_cart(data):
+    """
+    校验一个购物车 {"items": [...]} 并计算总金额
+    
+    返回 (总金额, 错误响应)，二者恰有一个为 None
+    """
+    # 验证请求数据格式
+    if not isinstance(data, dict):
+        return None, {"error": "invalid request format"}
+    
+    items = data.get("items", [])
+    
+    # 验证items字段是否为列表
+    if not isinstance(items, list):
+        return None, {"error": "items must be a list"}
+    
+    return _price_items(items)
+
+
 @app.route("/checkout", methods=["POST"])
 def checkout():
     """
@@ -31,6 +206,88 @@ def checkout():
     {
         "error": "empty cart"
     }
+    
+    大请求体按流式解析（见 CHECKOUT_STREAM_THRESHOLD）：商品逐个校验并累加，
+    遇到第一个不合法的商品立即返回，不必读完整个请求体
+    
+    其余请求的响应按请求体内容缓存（见 CHECKOUT_CACHE_SIZE），
+    字节相同的重复请求直接返回缓存的响应
+    """
+    try:
+        if _use_stream():
+            try:
+                total, error = _price_items(iter_items(request.stream), max_errors=1)
+            except CartFormatError as e:
+                return jsonify({"error": e.args[0]}), 400
+            if error:
+                return jsonify(error), 400
+            return jsonify({"total": total, "status": "ok"}), 200
+        
+        cache = _get_cache() if request.is_json else None
+        if cache is not None:
+            # 舍入方式影响金额，最多报告的错误数影响 400 响应的内容
+            key = content_key(request.get_data(), app.config["CHECKOUT_ROUNDING"],
+                              app.config["CHECKOUT_MAX_ERRORS"])
+            cached = cache.get(key)
+            if cached is not None:
+                return app.response_class(cached[0], status=cached[1], mimetype="application/json")
+        
+        # 尝试解析JSON数据
+        try:
+            data = request.get_json()
+        except Exception as e:
+            total, error = None, {"error": "invalid json format"}
+        else:
+            total, error = _price_cart(data)
+        
+        if error:
+            response, status = jsonify(error), 400
+        else:
+            response, status = jsonify({"total": total, "status": "ok"}), 200
+        if cache is not None:
+            cache.put(key, (response.get_data(), status))
+        return response, status
+        
+    except Exception as e:
+        return jsonify({"error": f"internal server error: {str(e)}"}), 500
+
+
+@app.route("/checkout/cache", methods=["GET"])
+def checkout_cache_stats():
+    """结算结果缓存的命中、未命中等计数"""
+    cache = _get_cache()
+    if cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **cache.stats()}), 200
+
+
+@app.route("/checkout/batch", methods=["POST"])
+def checkout_batch():
+    """
+    批量结算接口
+    一次请求结算多个购物车，每个购物车单独校验，错误信息与 /checkout 相同
+    
+    请求格式:
+    {
+        "carts": [
+            {"items": [{"price": 10.99, "quantity": 2}]},
+            {"items": []}
+        ]
+    }
+    
+    成功响应 (200 OK)，results 与 carts 一一对应，某个购物车处理出错时只有对应的一项为错误:
+    {
+        "results": [
+            {"total": 21.98, "status": "ok"},
+            {"error": "empty cart"}
+        ],
+        "status": "ok"
+    }
+    
+    整个请求不合法时返回 400，例如:
+    {
+        "error": "carts must be a list"
+    }
     """
     try:
         # 尝试解析JSON数据
@@ -39,49 +296,304 @@ def checkout():
         except Exception as e:
             return jsonify({"error": "invalid json format"}), 400
         
-        # 验证请求数据格式
         if not isinstance(data, dict):
             return jsonify({"error": "invalid request format"}), 400
-            
-        items = data.get("items", [])
         
-        # 验证items字段是否为列表
+        carts = data.get("carts", [])
+        if not isinstance(carts, list):
+            return jsonify({"error": "carts must be a list"}), 400
+        
+        if not carts:
+            return jsonify({"error": "empty batch"}), 400
+        
+        limit = app.config["CHECKOUT_BATCH_LIMIT"]
+        if limit is not None and len(carts) > limit:
+            return jsonify({"error": f"too many carts (max {limit})"}), 400
+        
+        results = []
+        append = results.append
+        for cart in carts:
+            # 每个购物车单独处理，一个购物车出错不影响其他购物车的结果
+            try:
+                total, error = _price_cart(cart)
+            except Exception as e:
+                total, error = None, {"error": f"internal server error: {str(e)}"}
+            append(error or {"total": total, "status": "ok"})
+        
+        return jsonify({"results": results, "status": "ok"}), 200
+        
+    except Exception as e:
+        return jsonify({"error": f"internal server error: {str(e)}"}), 500
+
+
+@app.route("/catalog", methods=["PUT"])
+def load_catalog():
+    """
+    加载价目表，请求体为价目表 JSON（格式见 pricing.py）
+    
+    新表编译完成后才替换旧表，正在结算的请求继续使用旧表；格式错误时旧表保持不变
+    
+    价目表决定服务端价格，只有配置了 CHECKOUT_CATALOG_ADMIN_TOKEN 时才开放，
+    请求须带 "Authorization: Bearer <令牌>"；未配置时返回 403，令牌不对时返回 401
+    
+    成功响应 (200 OK):
+    {"version": 2, "skus": 1000, "status": "ok"}
+    """
+    try:
+        token = app.config["CHECKOUT_CATALOG_ADMIN_TOKEN"]
+        if not token:
+            return jsonify({"error": "catalog updates are disabled"}), 403
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+            return jsonify({"error": "unauthorized"}), 401
+        
+        try:
+            data = request.get_json()
+        except Exception as e:
+            return jsonify({"error": "invalid json format"}), 400
+        catalog = _get_catalog()
+        try:
+            version = catalog.load(data)
+        except CatalogError as e:
+            return jsonify({"error": e.args[0]}), 400
+        return jsonify({"version": version, "skus": len(catalog.book), "status": "ok"}), 200
+        
+    except Exception as e:
+        return jsonify({"error": f"internal server error: {str(e)}"}), 500
+
+
+@app.route("/catalog", methods=["GET"])
+def catalog_info():
+    """当前价目表的版本和 SKU 数"""
+    try:
+        book = _get_catalog().book
+    except Exception as e:
+        return jsonify({"error": f"internal server error: {str(e)}"}), 500
+    if book is None:
+        return jsonify({"error": "catalog not loaded"}), 404
+    return jsonify({"version": book.version, "skus": len(book), "status": "ok"}), 200
+
+
+@app.route("/checkout/quote", methods=["POST"])
+def checkout_quote():
+    """
+    按服务端价目表结算，只接收 SKU 和数量，价格、促销和税额都由服务端计算
+    
+    请求格式:
+    {
+        "items": [
+            {"sku": "A1", "quantity": 2},
+            {"sku": "B2", "quantity": 1}
+        ]
+    }
+    
+    成功响应 (200 OK)，total = subtotal - discount + tax:
+    {
+        "subtotal": 26.98,
+        "discount": 2.2,
+        "tax": 1.84,
+        "total": 26.62,
+        "catalog_version": 1,
+        "status": "ok"
+    }
+    
+    错误与 /checkout 相同，另有 "unknown sku"；未加载价目表时返回 503
+    """
+    try:
+        # 整个请求只取一次引用，期间重新加载价目表不影响本次结算
+        book = _get_catalog().book
+        if book is None:
+            return jsonify({"error": "catalog not loaded"}), 503
+        
+        try:
+            data = request.get_json()
+        except Exception as e:
+            return jsonify({"error": "invalid json format"}), 400
+        if not isinstance(data, dict):
+            return jsonify({"error": "invalid request format"}), 400
+        items = data.get("items", [])
         if not isinstance(items, list):
             return jsonify({"error": "items must be a list"}), 400
         
-        # 检查购物车是否为空
+        amounts, errors = book.quote(items, app.config["CHECKOUT_MAX_ERRORS"])
+        if errors:
+            return jsonify({
+                "error": errors[0][2],
+                "errors": [{"index": index, "field": field, "error": message}
+                           for index, field, message in errors],
+            }), 400
         if not items:
             return jsonify({"error": "empty cart"}), 400
         
-        # 计算总金额
-        total = 0.0
-        for item in items:
-            # 验证每个商品的格式
-            if not isinstance(item, dict):
-                return jsonify({"error": "each item must be an object"}), 400
-            
-            # 获取价格和数量，设置默认值
-            price = item.get("price", 0.0)
-            quantity = item.get("quantity", 0)
-            
-            # 验证价格和数量的类型
-            if not isinstance(price, (int, float)) or price < 0:
-                return jsonify({"error": "price must be a non-negative number"}), 400
-            
-            if not isinstance(quantity, int) or quantity < 0:
-                return jsonify({"error": "quantity must be a non-negative integer"}), 400
-            
-            # 累加总金额
-            total += price * quantity
-        
-        # 保留两位小数
-        total = round(total, 2)
-        
-        return jsonify({"total": total, "status": "ok"}), 200
+        rounding = app.config["CHECKOUT_ROUNDING"]
+        subtotal, net, tax = (round_units(units, rounding) for units in amounts)
+        scale = 10 ** CURRENCY_DIGITS
+        try:
+            result = {
+                "subtotal": subtotal / scale,
+                "discount": (subtotal - net) / scale,
+                "tax": tax / scale,
+                "total": (net + tax) / scale,
+                "catalog_version": book.version,
+                "status": "ok",
+            }
+        except OverflowError:
+            return jsonify({"error": "total too large"}), 400
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({"error": f"internal server error: {str(e)}"}), 500
+
+
+def _parse_line():
+    """
+    解析并校验购物车行请求 {"price": ..., "quantity": ...}
+    
+    返回 (行数据, 错误响应)，二者恰有一个为 None；缺少的字段不校验
+    """
+    try:
+        data = request.get_json()
+    except Exception as e:
+        return None, {"error": "invalid json format"}
+    if not isinstance(data, dict):
+        return None, {"error": "invalid request format"}
+    errors = []
+    validate_items([data], 0, ([], []), errors, 10)
+    if errors:
+        return None, {
+            "error": errors[0][2],
+            "errors": [{"field": field, "error": message} for _, field, message in errors],
+        }
+    return data, None
+
+
+def _cart_summary(cart_id, units, lines, **extra):
+    """购物车的总金额和行数，units/lines 取自修改操作在同一次加锁中返回的结果"""
+    cents = round_units(units, app.config["CHECKOUT_ROUNDING"])
+    return jsonify({"cart_id": cart_id, "total": cents / 10 ** CURRENCY_DIGITS, "lines": lines,
+                    **extra, "status": "ok"})
+
+
+# 由下面的 errorhandler 转成 JSON 响应的会话异常，路由中不当作内部错误处理
+_SESSION_ERRORS = (SessionNotFoundError, LineNotFoundError, AmountTooLargeError)
+
+
+@app.errorhandler(SessionNotFoundError)
+def _session_not_found(e):
+    return jsonify({"error": "cart not found"}), 404
+
+
+@app.errorhandler(LineNotFoundError)
+def _line_not_found(e):
+    return jsonify({"error": "line not found"}), 404
+
+
+@app.errorhandler(AmountTooLargeError)
+def _amount_too_large(e):
+    return jsonify({"error": "total too large"}), 400
+
+
+@app.route("/carts", methods=["POST"])
+def create_cart():
+    """
+    创建购物车会话
+    
+    成功响应 (201 Created):
+    {"cart_id": "...", "total": 0.0, "lines": 0, "status": "ok"}
+    
+    之后逐行修改，每次修改只更新这一行对总额的贡献:
+    - POST   /carts/<cart_id>/lines             添加一行 {"price": 10.99, "quantity": 2}
+    - PUT    /carts/<cart_id>/lines/<line_id>   修改价格和/或数量
+    - DELETE /carts/<cart_id>/lines/<line_id>   删除一行
+    - POST   /carts/<cart_id>/checkout          结算，直接使用维护好的总额
+    - DELETE /carts/<cart_id>                   删除购物车
+    空闲超过 CART_SESSION_IDLE 秒的购物车被淘汰，之后访问返回 404
+    """
+    try:
+        return _cart_summary(_get_sessions().create(), 0, 0), 201
+        
+    except Exception as e:
+        return jsonify({"error": f"internal server error: {str(e)}"}), 500
+
+
+@app.route("/carts/<cart_id>", methods=["DELETE"])
+def delete_cart(cart_id):
+    """删除购物车会话"""
+    try:
+        _get_sessions().delete(cart_id)
+        return jsonify({"status": "ok"}), 200
         
+    except _SESSION_ERRORS:
+        raise
     except Exception as e:
         return jsonify({"error": f"internal server error: {str(e)}"}), 500
 
+
+@app.route("/carts/<cart_id>/lines", methods=["POST"])
+def add_cart_line(cart_id):
+    """添加一行，价格和数量的校验与 /checkout 相同"""
+    try:
+        data, error = _parse_line()
+        if error:
+            return jsonify(error), 400
+        sessions = _get_sessions()
+        try:
+            line_id, units, lines = sessions.add_line(cart_id, data.get("price", 0.0), data.get("quantity", 0))
+        except CartFullError:
+            return jsonify({"error": f"too many lines (max {sessions.max_lines})"}), 400
+        return _cart_summary(cart_id, units, lines, line_id=line_id), 201
+        
+    except _SESSION_ERRORS:
+        raise
+    except Exception as e:
+        return jsonify({"error": f"internal server error: {str(e)}"}), 500
+
+
+@app.route("/carts/<cart_id>/lines/<int:line_id>", methods=["PUT"])
+def update_cart_line(cart_id, line_id):
+    """修改一行，只修改请求中给出的字段"""
+    try:
+        data, error = _parse_line()
+        if error:
+            return jsonify(error), 400
+        units, lines = _get_sessions().update_line(cart_id, line_id, data.get("price"), data.get("quantity"))
+        return _cart_summary(cart_id, units, lines, line_id=line_id), 200
+        
+    except _SESSION_ERRORS:
+        raise
+    except Exception as e:
+        return jsonify({"error": f"internal server error: {str(e)}"}), 500
+
+
+@app.route("/carts/<cart_id>/lines/<int:line_id>", methods=["DELETE"])
+def remove_cart_line(cart_id, line_id):
+    """删除一行"""
+    try:
+        units, lines = _get_sessions().remove_line(cart_id, line_id)
+        return _cart_summary(cart_id, units, lines), 200
+        
+    except _SESSION_ERRORS:
+        raise
+    except Exception as e:
+        return jsonify({"error": f"internal server error: {str(e)}"}), 500
+
+
+@app.route("/carts/<cart_id>/checkout", methods=["POST"])
+def checkout_cart(cart_id):
+    """结算购物车会话，响应格式与 /checkout 相同"""
+    try:
+        units, lines = _get_sessions().total(cart_id)
+        if not lines:
+            return jsonify({"error": "empty cart"}), 400
+        cents = round_units(units, app.config["CHECKOUT_ROUNDING"])
+        return jsonify({"total": cents / 10 ** CURRENCY_DIGITS, "status": "ok"}), 200
+        
+    except _SESSION_ERRORS:
+        raise
+    except Exception as e:
+        return jsonify({"error": f"internal server error: {str(e)}"}), 500
+
+
 if __name__ == "__main__":
     """运行Flask应用"""
     app.run(debug=True, host="0.0.0.0", port=5000)
\ No newline at end of file
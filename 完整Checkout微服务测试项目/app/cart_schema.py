@@ -0,0 +1,213 @@
+"""
+购物车校验规则
+商品字段的规则只声明一次，编译成一个专用的校验函数：一次遍历检查整个购物车，
+记录每个错误的商品下标和字段，同时把合法商品的字段值按列收集起来供计算金额。
+"""
+
+from collections import namedtuple
+from operator import itemgetter
+
+try:
+    from .totals import MAX_PRICE
+except ImportError:  # 直接运行 python app/app.py 时
+    from totals import MAX_PRICE
+
+Rule = namedtuple("Rule", "field kind minimum default message maximum", defaults=(None,))
+Rule.__doc__ = """
+字段规则
+- field: 字段名
+- kind: "number"（整数或有限浮点数）或 "integer"
+- minimum: 允许的最小值
+- default: 字段缺失时的默认值
+- message: 不合法时的错误信息
+- maximum: 允许的最大值，None 表示不限
+"""
+
+NOT_OBJECT = "each item must be an object"
+
+ITEM_RULES = (
+    Rule("price", "number", 0, 0.0, "price must be a non-negative number", MAX_PRICE),
+    Rule("quantity", "integer", 0, 0, "quantity must be a non-negative integer"),
+)
+
+_KINDS = ("number", "integer")
+_INF = float("inf")
+_NUMBER_TYPES = {int, float}
+_INTEGER_TYPES = {int}
+
+
+def _number_column_ok(column, minimum, maximum=None):
+    """整列都是在 [minimum, maximum] 内的有限数（NaN 或无穷大会使总和不是有限数）"""
+    if not set(map(type, column)) <= _NUMBER_TYPES or min(column) < minimum:
+        return False
+    try:
+        total = sum(column)
+    except OverflowError:
+        return False
+    if total != total or total == _INF:
+        return False
+    return maximum is None or max(column) <= maximum
+
+
+def _integer_column_ok(column, minimum, maximum=None):
+    """整列都是在 [minimum, maximum] 内的整数"""
+    if not set(map(type, column)) <= _INTEGER_TYPES or min(column) < minimum:
+        return False
+    return maximum is None or max(column) <= maximum
+
+
+def _field_source(i, rule):
+    """生成检查一个字段的代码，结果存入 v{i} / ok{i}"""
+    v, ok = f"v{i}", f"ok{i}"
+    # 浮点数的范围检查同时排除 NaN（比较结果为 False）和无穷大
+    if rule.maximum is None:
+        int_range = f"{v} >= {rule.minimum!r}"
+        float_range = f"{rule.minimum!r} <= {v} < _INF"
+    else:
+        int_range = float_range = f"{rule.minimum!r} <= {v} <= {rule.maximum!r}"
+    lines = [f"{v} = item.get({rule.field!r}, {rule.default!r})"]
+    if rule.kind == "number":
+        # 先比较类型对象走快速路径，再用 isinstance 兼容 bool 等子类
+        lines += [
+            f"if {v}.__class__ is float:",
+            f"    {ok} = {float_range}",
+            f"elif {v}.__class__ is int:",
+            f"    {ok} = {int_range}",
+            f"else:",
+            f"    {ok} = isinstance({v}, int) and {int_range}"
+            f" or isinstance({v}, float) and {float_range}",
+        ]
+    else:
+        lines += [
+            f"if {v}.__class__ is int:",
+            f"    {ok} = {int_range}",
+            f"else:",
+            f"    {ok} = isinstance({v}, int) and {int_range}",
+        ]
+    return lines
+
+
+def compile_validator(rules=ITEM_RULES):
+    """
+    把字段规则编译成校验函数
+
+    返回的函数签名为 validate(items, start, columns, errors, max_errors)：
+    - items: 商品列表（或其中一段），start 为第一个商品的下标
+    - columns: 与 rules 一一对应的列表，合法商品的字段值依次追加进去
+    - errors: 错误追加到这里，每项为 (下标, 字段名, 错误信息)；不是对象时字段名为 None
+    - max_errors: 错误数达到该值时，检查完当前商品就返回
+    """
+    for rule in rules:
+        if rule.kind not in _KINDS:
+            raise ValueError(f"unknown kind: {rule.kind}")
+
+    n = len(rules)
+    checks = {"number": "_number_column_ok", "integer": "_integer_column_ok"}
+    body = [
+        "def validate(items, start, columns, errors, max_errors):",
+        # 快速路径：全是 dict 且字段齐全时按列取值、按列检查，都合法就直接收下
+        "    if items and set(map(type, items)) == _DICT:",
+        "        try:",
+    ]
+    body += [f"            c{i} = list(map(_get{i}, items))" for i in range(n)]
+    body += [
+        "        except KeyError:",
+        "            pass",
+        "        else:",
+        "            if " + " and ".join(f"{checks[rule.kind]}(c{i}, {rule.minimum!r}, {rule.maximum!r})"
+                                     for i, rule in enumerate(rules)) + ":",
+    ]
+    body += [f"                columns[{i}].extend(c{i})" for i in range(n)]
+    body += [
+        "                return",
+        # 逐个检查，记录每个错误的位置
+        "    report = errors.append",
+    ]
+    body += [f"    out{i} = columns[{i}].append" for i in range(n)]
+    body += [
+        "    for index, item in enumerate(items, start):",
+        "        if item.__class__ is not dict and not isinstance(item, dict):",
+        "            report((index, None, NOT_OBJECT))",
+        "            if len(errors) >= max_errors:",
+        "                return",
+        "            continue",
+    ]
+    for i, rule in enumerate(rules):
+        body += ["        " + line for line in _field_source(i, rule)]
+    body += [
+        "        if " + " and ".join(f"ok{i}" for i in range(n)) + ":",
+    ]
+    body += [f"            out{i}(v{i})" for i in range(n)]
+    body += ["        else:"]
+    for i, rule in enumerate(rules):
+        body += [
+            f"            if not ok{i}:",
+            f"                report((index, {rule.field!r}, {rule.message!r}))",
+        ]
+    body += [
+        "            if len(errors) >= max_errors:",
+        "                return",
+    ]
+    source = "\n".join(body) + "\n"
+
+    namespace = {
+        "_INF": _INF,
+        "_DICT": {dict},
+        "NOT_OBJECT": NOT_OBJECT,
+        "_number_column_ok": _number_column_ok,
+        "_integer_column_ok": _integer_column_ok,
+    }
+    namespace.update((f"_get{i}", itemgetter(rule.field)) for i, rule in enumerate(rules))
+    exec(compile(source, "<cart validator>", "exec"), namespace)
+    validate = namespace["validate"]
+    validate.source = source
+    return validate
+
+
+validate_items = compile_validator()
+
+
+if __name__ == "__main__":
+    # 性能测试：python app/cart_schema.py
+    import time
+
+    def hand_written(items):
+        """原来 checkout() 里的校验循环，作为对照（遇到第一个错误就返回）"""
+        total = 0.0
+        for item in items:
+            if not isinstance(item, dict):
+                return "each item must be an object"
+            price = item.get("price", 0.0)
+            quantity = item.get("quantity", 0)
+            if not isinstance(price, (int, float)) or price < 0:
+                return "price must be a non-negative number"
+            if not isinstance(quantity, int) or quantity < 0:
+                return "quantity must be a non-negative integer"
+            total += price * quantity
+        return total
+
+    def compiled(items):
+        columns = ([], [])
+        errors = []
+        validate_items(items, 0, columns, errors, 100)
+        return errors
+
+    def timed(func, items, repeat=5):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(items)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    print(validate_items.source)
+    for n in (1_000, 100_000, 1_000_000):
+        items = [{"price": i % 1000 * 0.01, "quantity": i % 7} for i in range(n)]
+        old = timed(hand_written, items)
+        new = timed(compiled, items)
+        print(f"{n:>9,} 件合法商品: 手写循环 {old * 1000:8.2f}ms  编译校验 {new * 1000:8.2f}ms  "
+              f"({old / new:.2f}x)")
+    items[-1] = {"price": -1, "quantity": 1.5}
+    errors = []
+    validate_items(items, 0, ([], []), errors, 100)
+    print(f"最后一件不合法: {errors}")
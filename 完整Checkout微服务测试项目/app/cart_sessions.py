@@ -0,0 +1,186 @@
+"""
+购物车会话
+服务端保存购物车，逐行增删改时同步维护整数单位的总额（见 totals.py），
+每次修改和结算都是 O(1)，与购物车大小无关。会话按最近使用时间排序，
+空闲超时或超出数量上限的会话在后续操作时顺带淘汰，内存有上界。
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from .totals import to_units
+except ImportError:  # 直接运行 python app/app.py 时
+    from totals import to_units
+
+
+class SessionNotFoundError(KeyError):
+    """会话不存在或已过期"""
+
+
+class LineNotFoundError(KeyError):
+    """购物车中没有这一行"""
+
+
+class CartFullError(ValueError):
+    """购物车行数已达上限"""
+
+
+class AmountTooLargeError(ValueError):
+    """行金额换算溢出，或购物车总额超过上限"""
+
+
+def _line_units(price, quantity):
+    """行金额的整数单位，价格换算溢出时抛出 AmountTooLargeError"""
+    try:
+        return to_units(price) * quantity
+    except OverflowError:
+        raise AmountTooLargeError(price) from None
+
+
+class _Session:
+    __slots__ = ("lines", "units", "next_line", "last_used")
+
+    def __init__(self, now):
+        self.lines = {}       # 行号 -> [价格, 数量, 行金额单位]
+        self.units = 0        # 各行金额单位之和
+        self.next_line = 1
+        self.last_used = now
+
+
+class CartSessionStore:
+    """
+    购物车会话存储，线程安全
+
+    价格和数量须由调用方先校验（与 /checkout 的规则相同）
+
+    用法：
+        store = CartSessionStore(max_idle=1800, max_sessions=100000)
+        cart_id = store.create()
+        line_id, units, count = store.add_line(cart_id, 10.99, 2)
+        units, count = store.update_line(cart_id, line_id, quantity=3)
+        units, count = store.remove_line(cart_id, line_id)
+        units, count = store.total(cart_id)
+
+    修改操作在同一次加锁中返回修改后的总额，不必再调用 total（其间会话可能已被淘汰）
+    """
+
+    def __init__(self, max_idle=1800.0, max_sessions=100000, max_lines=100000, clock=time.monotonic,
+                 max_units=None):
+        """
+        :param max_idle: 空闲多少秒后淘汰，None 表示不按时间淘汰
+        :param max_sessions: 最多保留的会话数，超出时淘汰最久未使用的
+        :param max_lines: 每个购物车最多的行数
+        :param clock: 时钟函数，返回秒
+        :param max_units: 购物车总额上限（整数单位），None 表示不限
+        """
+        if max_sessions <= 0:
+            raise ValueError("max_sessions must be positive")
+        self.max_idle = max_idle
+        self.max_sessions = max_sessions
+        self.max_lines = max_lines
+        self.max_units = max_units
+        self.clock = clock
+        self._sessions = OrderedDict()  # 会话编号 -> _Session，最近使用的在最后
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict(self, now):
+        """淘汰空闲超时的会话；每个会话只会被淘汰一次，均摊 O(1)"""
+        if self.max_idle is None:
+            return
+        sessions = self._sessions
+        deadline = now - self.max_idle
+        while sessions:
+            cart_id, session = next(iter(sessions.items()))
+            if session.last_used > deadline:
+                break
+            del sessions[cart_id]
+            self.evictions += 1
+
+    def _touch(self, cart_id):
+        """取出会话并标记为最近使用，调用方须持有锁"""
+        now = self.clock()
+        self._evict(now)
+        session = self._sessions.get(cart_id)
+        if session is None:
+            raise SessionNotFoundError(cart_id)
+        session.last_used = now
+        self._sessions.move_to_end(cart_id)
+        return session
+
+    def _check_total(self, cart_id, units):
+        """修改后的总额超过上限时抛出 AmountTooLargeError"""
+        if self.max_units is not None and units > self.max_units:
+            raise AmountTooLargeError(cart_id)
+
+    def create(self):
+        """创建空购物车，返回会话编号"""
+        cart_id = secrets.token_hex(16)
+        now = self.clock()
+        with self._lock:
+            self._evict(now)
+            self._sessions[cart_id] = _Session(now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return cart_id
+
+    def delete(self, cart_id):
+        """删除会话"""
+        with self._lock:
+            if self._sessions.pop(cart_id, None) is None:
+                raise SessionNotFoundError(cart_id)
+
+    def add_line(self, cart_id, price, quantity):
+        """添加一行，返回 (行号, 总额单位, 行数)"""
+        units = _line_units(price, quantity)
+        with self._lock:
+            session = self._touch(cart_id)
+            if len(session.lines) >= self.max_lines:
+                raise CartFullError(cart_id)
+            self._check_total(cart_id, session.units + units)
+            line_id = session.next_line
+            session.next_line += 1
+            session.lines[line_id] = [price, quantity, units]
+            session.units += units
+            return line_id, session.units, len(session.lines)
+
+    def update_line(self, cart_id, line_id, price=None, quantity=None):
+        """修改一行的价格和/或数量，返回 (总额单位, 行数)；出错时这一行保持不变"""
+        with self._lock:
+            session = self._touch(cart_id)
+            line = session.lines.get(line_id)
+            if line is None:
+                raise LineNotFoundError(line_id)
+            if price is None:
+                price = line[0]
+            if quantity is None:
+                quantity = line[1]
+            # 先算出新金额并检查，都通过后再修改
+            units = _line_units(price, quantity)
+            self._check_total(cart_id, session.units + units - line[2])
+            session.units += units - line[2]
+            line[:] = [price, quantity, units]
+            return session.units, len(session.lines)
+
+    def remove_line(self, cart_id, line_id):
+        """删除一行，返回 (总额单位, 行数)"""
+        with self._lock:
+            session = self._touch(cart_id)
+            line = session.lines.pop(line_id, None)
+            if line is None:
+                raise LineNotFoundError(line_id)
+            session.units -= line[2]
+            return session.units, len(session.lines)
+
+    def total(self, cart_id):
+        """返回 (总额单位, 行数)"""
+        with self._lock:
+            session = self._touch(cart_id)
+            return session.units, len(session.lines)
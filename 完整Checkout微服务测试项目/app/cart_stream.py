@@ -0,0 +1,230 @@
+"""
+购物车流式解析
+按块读取请求体，增量解析顶层对象，items 数组中的商品逐个产出，
+不构造完整的对象树，内存占用只与单个商品和读取块大小有关。
+items 以外的值（包括顶层不是对象的请求体）逐个元素跳过，不整体解析；
+单个标量或商品超过 MAX_VALUE_SIZE 个字符时直接报错
+"""
+
+import codecs
+import json
+import re
+
+# 每次从请求体读取的字节数
+CHUNK_SIZE = 64 * 1024
+# 单个值（商品、键或 items 以外的标量）最多缓冲的字符数
+MAX_VALUE_SIZE = 256 * 1024
+# 数组和对象最多的嵌套层数
+MAX_DEPTH = 200
+# 离缓冲区末尾超过该距离的解码错误或值的结尾不受截断影响（最长的字面量为 -Infinity）
+_TRUNCATION_MARGIN = 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# 数组元素之后的分隔符（连同两侧空白）
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+
+
+class CartFormatError(ValueError):
+    """请求体格式错误，args[0] 为返回给客户端的错误信息"""
+
+
+class _Reader:
+    """带缓冲的增量 JSON 读取器"""
+
+    def __init__(self, stream, chunk_size, max_value=MAX_VALUE_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_value = max_value
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """再读入一块，已到结尾时返回 False"""
+        if self.eof:
+            return False
+        data = self.stream.read(self.chunk_size)
+        try:
+            text = self.decoder.decode(data, final=not data)
+        except UnicodeDecodeError:
+            raise CartFormatError("invalid json format") from None
+        if not data:
+            self.eof = True
+        # 丢弃已解析的部分，避免缓冲区随请求体增长
+        if self.pos >= self.chunk_size:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += text
+        return True
+
+    def peek(self):
+        """跳过空白，返回下一个字符；到结尾时返回空字符串"""
+        while True:
+            buf = self.buf
+            self.pos = pos = _WHITESPACE.match(buf, self.pos).end()
+            if pos < len(buf):
+                return buf[pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        """读取一个指定的分隔符"""
+        if self.peek() != char:
+            raise CartFormatError("invalid json format")
+        self.pos += 1
+
+    def next_char(self):
+        """读取下一个非空白字符"""
+        char = self.peek()
+        if not char:
+            raise CartFormatError("invalid json format")
+        self.pos += 1
+        return char
+
+    def array(self, skip=False, depth=0):
+        """
+        逐个产出数组元素（"[" 已读过），直到读到 "]"
+
+        skip 为 True 时元素只用于跳过：跨块的数组和对象逐层跳过，不整体缓冲
+        """
+        scan = self.json.scan_once
+        separator = _SEPARATOR.match
+        while True:
+            buf = self.buf
+            # 快速路径：元素、分隔符和其后的空白都在缓冲区内
+            try:
+                obj, end = scan(buf, self.pos)
+                match = separator(buf, end)
+            except (StopIteration, json.JSONDecodeError, RecursionError):
+                match = None
+            if match is None or match.end() >= len(buf):
+                # 跨越块边界或格式错误，走逐步读取的路径
+                if skip:
+                    obj = self.skip(depth)
+                else:
+                    obj = self.value()
+                char = self.next_char()
+                self.peek()
+            else:
+                self.pos = match.end()
+                char = match.group(1)
+            yield obj
+            if char == "]":
+                return
+            if char != ",":
+                raise CartFormatError("invalid json format")
+
+    def skip(self, depth=0):
+        """跳过下一个值；数组和对象逐个元素跳过，内存只与单个标量有关"""
+        if depth >= MAX_DEPTH:
+            raise CartFormatError("invalid json format")
+        char = self.peek()
+        if char == "[":
+            self.pos += 1
+            if self.peek() == "]":
+                self.pos += 1
+            else:
+                for _ in self.array(skip=True, depth=depth + 1):
+                    pass
+        elif char == "{":
+            self.pos += 1
+            if self.peek() == "}":
+                self.pos += 1
+                return
+            while True:
+                if self.peek() != '"':
+                    raise CartFormatError("invalid json format")
+                self.value()
+                self.expect(":")
+                self.skip(depth + 1)
+                char = self.next_char()
+                if char == "}":
+                    return
+                if char != ",":
+                    raise CartFormatError("invalid json format")
+        else:
+            self.value()
+
+    def value(self):
+        """解析下一个完整的 JSON 值"""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.json.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # 错误位置离缓冲区末尾较远时是真正的格式错误，
+                # 否则可能只是值被块边界截断，读入更多后重试
+                truncated = (e.pos >= len(self.buf) - _TRUNCATION_MARGIN
+                             or e.msg.startswith("Unterminated string"))
+                if not truncated or not self._grow():
+                    raise CartFormatError("invalid json format") from None
+                continue
+            except RecursionError:
+                raise CartFormatError("invalid json format") from None
+            # 值结束在缓冲区末尾附近时可能被截断（例如 "1." 会解析成 1），读入更多后重试
+            if end > len(self.buf) - _TRUNCATION_MARGIN and self._grow():
+                continue
+            self.pos = end
+            return obj
+
+    def _grow(self):
+        """为当前值读入更多数据，值超过 max_value 个字符时报错"""
+        if len(self.buf) - self.pos > self.max_value:
+            raise CartFormatError("json value too large")
+        return self.fill()
+
+
+def iter_items(stream, chunk_size=CHUNK_SIZE, max_value=MAX_VALUE_SIZE):
+    """
+    流式解析 {"items": [...], ...}，逐个产出 items 中的元素
+
+    消费方可以在任何一个元素处停止迭代，剩余请求体不再解析。
+    请求体整体不合法时，在产出已读到的元素之后抛出 CartFormatError，
+    错误信息与一次性解析时相同：
+    - "invalid json format"：不是合法的 JSON
+    - "invalid request format"：顶层不是对象，或 items 字段重复
+    - "items must be a list"：items 不是数组
+    - "json value too large"：单个值超过 max_value 个字符
+    没有 items 字段时不产出任何元素。
+    """
+    reader = _Reader(stream, chunk_size, max_value)
+    if reader.peek() != "{":
+        reader.skip()
+        if reader.peek():
+            raise CartFormatError("invalid json format")
+        raise CartFormatError("invalid request format")
+
+    reader.pos += 1
+    seen_items = False
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            if reader.peek() != '"':
+                raise CartFormatError("invalid json format")
+            key = reader.value()
+            reader.expect(":")
+            if key != "items":
+                reader.skip()
+            elif seen_items:
+                raise CartFormatError("invalid request format")
+            elif reader.peek() != "[":
+                reader.skip()
+                raise CartFormatError("items must be a list")
+            else:
+                seen_items = True
+                reader.pos += 1
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    yield from reader.array()
+            char = reader.next_char()
+            if char == "}":
+                break
+            if char != ",":
+                raise CartFormatError("invalid json format")
+
+    if reader.peek():
+        raise CartFormatError("invalid json format")
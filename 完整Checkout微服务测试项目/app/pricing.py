@@ -0,0 +1,269 @@
+"""
+服务端定价
+SKU 价目表和促销/税率规则在加载时编译成按 SKU 查找的表：每个 SKU 对应
+(原价单位, 按数量分档的折后单价, 税率)，结算时每行只需一次字典查找和几次整数运算，
+不再逐条判断规则。金额单位与 totals.py 相同（百万分之一元）。
+
+重新加载时在旁边编译出新表，再一次性替换引用；正在处理的请求继续使用
+开始时拿到的旧表，不会被阻塞，也不会看到新旧混合的价格。
+
+价目表格式:
+{
+    "skus": {
+        "A1": {"price": 10.99, "category": "books"},
+        "B2": {"price": 5.00}
+    },
+    "promotions": [
+        {"type": "percent", "value": 10, "categories": ["books"]},
+        {"type": "amount", "value": 0.5, "skus": ["B2"], "min_quantity": 10}
+    ],
+    "taxes": [
+        {"rate": 0.06, "categories": ["books"]}
+    ],
+    "default_tax": 0.13
+}
+促销按顺序叠加：percent 为百分比折扣，amount 为每件减价（不低于 0）；
+不写 skus/categories 时对所有 SKU 生效，min_quantity 为该行数量下限。
+税率取第一条匹配的规则，都不匹配时用 default_tax。
+"""
+
+import threading
+
+try:
+    from .totals import MAX_PRICE, PRICE_DIGITS, round_units, to_units
+except ImportError:  # 直接运行 python app/app.py 时
+    from totals import MAX_PRICE, PRICE_DIGITS, round_units, to_units
+
+_HUNDRED_PERCENT = to_units(100)
+
+NOT_OBJECT = "each item must be an object"
+UNKNOWN_SKU = "unknown sku"
+BAD_QUANTITY = "quantity must be a non-negative integer"
+
+
+class CatalogError(ValueError):
+    """价目表格式错误"""
+
+
+def _non_negative(value, what):
+    """不超过 MAX_PRICE 的非负数，换算整数单位不会溢出"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= MAX_PRICE:
+        raise CatalogError(f"{what} must be a non-negative number")
+    return value
+
+
+def _targets(rule):
+    """规则适用的 SKU 和分类集合，都不写时为 (None, None) 表示全部适用"""
+    scopes = []
+    for key in ("skus", "categories"):
+        value = rule.get(key)
+        if value is not None and (not isinstance(value, list)
+                                  or not all(isinstance(v, str) for v in value)):
+            raise CatalogError(f"{key} must be a list of strings")
+        scopes.append(None if value is None else frozenset(value))
+    return tuple(scopes)
+
+
+def _applies(targets, sku, category):
+    """规则是否适用于该 SKU（不含数量条件）"""
+    skus, categories = targets
+    if skus is None and categories is None:
+        return True
+    return (skus is not None and sku in skus) or (categories is not None and category in categories)
+
+
+def _compile_promotions(promotions):
+    """校验促销规则，返回 [(适用范围, 数量下限, 类型, 值的整数单位), ...]"""
+    compiled = []
+    for rule in promotions:
+        if not isinstance(rule, dict) or rule.get("type") not in ("percent", "amount"):
+            raise CatalogError("promotion type must be 'percent' or 'amount'")
+        value = _non_negative(rule.get("value"), "promotion value")
+        if rule["type"] == "percent" and value > 100:
+            raise CatalogError("percent must not exceed 100")
+        min_quantity = rule.get("min_quantity", 0)
+        if isinstance(min_quantity, bool) or not isinstance(min_quantity, int) or min_quantity < 0:
+            raise CatalogError("min_quantity must be a non-negative integer")
+        compiled.append((_targets(rule), min_quantity, rule["type"], to_units(value)))
+    return compiled
+
+
+def _compile_taxes(taxes):
+    """校验税率规则，返回 [(适用范围, 税率的整数单位), ...]"""
+    compiled = []
+    for rule in taxes:
+        if not isinstance(rule, dict):
+            raise CatalogError("tax rule must be an object")
+        compiled.append((_targets(rule), to_units(_non_negative(rule.get("rate"), "tax rate"))))
+    return compiled
+
+
+def _discount(unit, kind, value):
+    """对单价（整数单位）应用一条促销，百分比折扣按四舍六入五成双舍入到整数单位"""
+    if kind == "percent":
+        # unit * (100% - 折扣) 除以 100 * 10^6，不经过浮点数
+        return round_units(unit * (_HUNDRED_PERCENT - value), "half_even", -2)
+    return max(0, unit - value)
+
+
+class PriceBook:
+    """
+    编译好的价目表，创建后不再修改
+
+    用法：
+        book = PriceBook(catalog, version=1)
+        result, errors = book.quote([{"sku": "A1", "quantity": 2}])
+    """
+
+    def __init__(self, catalog, version=0):
+        self.version = version
+        self._table = {}
+        try:
+            self._compile(catalog)
+        except CatalogError:
+            raise
+        except Exception as e:
+            # 校验之外的意外情况也按格式错误处理，旧表保持不变
+            raise CatalogError(f"invalid catalog: {e}") from e
+
+    def _compile(self, catalog):
+        """校验价目表并编译出按 SKU 查找的表"""
+        if not isinstance(catalog, dict) or not isinstance(catalog.get("skus"), dict):
+            raise CatalogError("catalog must contain a 'skus' object")
+        promotions = catalog.get("promotions", [])
+        taxes = catalog.get("taxes", [])
+        if not isinstance(promotions, list) or not isinstance(taxes, list):
+            raise CatalogError("promotions and taxes must be lists")
+        promotions = _compile_promotions(promotions)
+        taxes = _compile_taxes(taxes)
+        default_tax = to_units(_non_negative(catalog.get("default_tax", 0), "default_tax"))
+
+        for sku, info in catalog["skus"].items():
+            if not isinstance(info, dict):
+                raise CatalogError(f"sku {sku} must be an object")
+            price = to_units(_non_negative(info.get("price"), f"price of sku {sku}"))
+            category = info.get("category")
+            if category is not None and not isinstance(category, str):
+                raise CatalogError(f"category of sku {sku} must be a string")
+            rules = [r for r in promotions if _applies(r[0], sku, category)]
+            # 每个数量下限对应一档单价，按下限从高到低排列
+            thresholds = sorted({0, *(r[1] for r in rules)}, reverse=True)
+            tiers = []
+            for threshold in thresholds:
+                unit = price
+                for _, min_quantity, kind, value in rules:
+                    if min_quantity <= threshold:
+                        unit = _discount(unit, kind, value)
+                tiers.append((threshold, unit))
+            rate = next((rate for targets, rate in taxes if _applies(targets, sku, category)), default_tax)
+            self._table[sku] = (price, tuple(tiers), rate)
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, sku):
+        return sku in self._table
+
+    def quote(self, items, max_errors=100):
+        """
+        按价目表计算购物车金额
+
+        Args:
+            items: [{"sku": ..., "quantity": ...}, ...]，不读取客户端传来的价格
+            max_errors: 最多报告的错误数
+
+        Returns:
+            (金额, 错误列表)。金额为 (原价合计, 折后合计, 税额) 的整数单位，
+            有错误时为 None；错误为 (下标, 字段名, 错误信息)
+        """
+        table_get = self._table.get
+        subtotal = net = tax = 0
+        errors = []
+        for index, item in enumerate(items):
+            if item.__class__ is not dict and not isinstance(item, dict):
+                errors.append((index, None, NOT_OBJECT))
+                if len(errors) >= max_errors:
+                    break
+                continue
+            sku = item.get("sku")
+            entry = table_get(sku) if sku.__class__ is str else None
+            quantity = item.get("quantity", 0)
+            quantity_ok = (quantity.__class__ is int or isinstance(quantity, int)) and quantity >= 0
+            if entry is not None and quantity_ok:
+                price, tiers, rate = entry
+                # 分档按数量下限从高到低排列，最后一档下限为 0
+                for threshold, unit in tiers:
+                    if quantity >= threshold:
+                        break
+                line = unit * quantity
+                subtotal += price * quantity
+                net += line
+                tax += line * rate
+                continue
+            if entry is None:
+                errors.append((index, "sku", UNKNOWN_SKU))
+            if not quantity_ok:
+                errors.append((index, "quantity", BAD_QUANTITY))
+            if len(errors) >= max_errors:
+                break
+        if errors:
+            return None, errors
+        # 税额 = 折后金额 * 税率，两者都是整数单位，除以 10^6 后舍入
+        return (subtotal, net, round_units(tax, "half_even", PRICE_DIGITS - 6)), errors
+
+
+class PriceCatalog:
+    """
+    可热更新的价目表
+
+    读取方先取 catalog.book 再计算，整个请求使用同一份表；
+    load() 在锁外编译新表，编译完成后替换引用，读取方不需要加锁
+    """
+
+    def __init__(self):
+        self.book = None
+        self._reload_lock = threading.Lock()  # 只用于给版本号排序
+
+    def load(self, catalog):
+        """编译并替换价目表，返回新版本号；格式错误时抛出 CatalogError，旧表保持不变"""
+        book = PriceBook(catalog)
+        with self._reload_lock:
+            book.version = (self.book.version if self.book else 0) + 1
+            self.book = book
+        return book.version
+
+
+if __name__ == "__main__":
+    # 性能测试：python app/pricing.py
+    import random
+    import time
+
+    rng = random.Random(0)
+    categories = ["books", "food", "toys", "tools"]
+    catalog = {
+        "skus": {f"SKU{i:06d}": {"price": rng.randrange(100, 100000) / 100, "category": rng.choice(categories)}
+                 for i in range(100_000)},
+        "promotions": [
+            {"type": "percent", "value": 10, "categories": ["books"]},
+            {"type": "amount", "value": 0.5, "categories": ["food"], "min_quantity": 10},
+            {"type": "percent", "value": 5, "min_quantity": 50},
+            {"type": "percent", "value": 20, "skus": [f"SKU{i:06d}" for i in range(0, 100_000, 97)]},
+        ],
+        "taxes": [{"rate": 0.06, "categories": ["books", "food"]}],
+        "default_tax": 0.13,
+    }
+    start = time.perf_counter()
+    catalog_service = PriceCatalog()
+    catalog_service.load(catalog)
+    print(f"编译 {len(catalog['skus']):,} 个 SKU、{len(catalog['promotions'])} 条促销: "
+          f"{(time.perf_counter() - start) * 1000:.0f}ms")
+
+    skus = list(catalog["skus"])
+    for lines in (10, 1000, 10000):
+        items = [{"sku": rng.choice(skus), "quantity": rng.randrange(1, 100)} for _ in range(lines)]
+        best = float("inf")
+        for _ in range(20):
+            start = time.perf_counter()
+            amounts, errors = catalog_service.book.quote(items)
+            best = min(best, time.perf_counter() - start)
+        print(f"{lines:>6,} 行购物车定价: {best * 1000:.3f}ms")
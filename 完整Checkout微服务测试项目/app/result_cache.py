@@ -0,0 +1,104 @@
+"""
+结算结果缓存
+以请求内容的哈希为键缓存已经序列化好的响应，容量有上限（最近最少使用的先淘汰），
+条目超过有效期后失效。重复的请求命中缓存时既不解析 JSON，也不校验和求和。
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_key(body, *context):
+    """
+    计算请求内容的键
+
+    body 为请求体字节；context 为影响结果的其他参数（如舍入方式），一并计入哈希
+    """
+    digest = hashlib.blake2b(body, digest_size=16)
+    for part in context:
+        digest.update(b"\0" + str(part).encode("utf-8"))
+    return digest.digest()
+
+
+class ResultCache:
+    """
+    线程安全的 LRU + TTL 缓存
+
+    用法：
+        cache = ResultCache(max_entries=10000, ttl=60)
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.put(key, value)
+        cache.stats()
+    """
+
+    def __init__(self, max_entries=10000, ttl=60.0, clock=time.monotonic):
+        """
+        :param max_entries: 最多缓存的条目数
+        :param ttl: 有效期（秒），None 表示不过期
+        :param clock: 时钟函数，返回秒
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # 键 -> (过期时间, 值)，最近使用的在最后
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """取缓存的值，没有或已过期时返回 None"""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存和计数"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        """命中、未命中等计数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,136 @@
+"""
+金额计算
+价格先换算成整数的最小计价单位（百万分之一元），行金额和总额都用整数精确累加，
+最后按指定的舍入方式换算成分。商品数量较多且安装了 numpy 时用数组批量计算，
+结果与逐个计算完全一致。
+"""
+
+try:
+    import numpy as np
+except ImportError:  # numpy 是可选依赖，没有时只走逐个计算
+    np = None
+
+# 价格换算成整数时保留的小数位数
+PRICE_DIGITS = 6
+PRICE_SCALE = 10 ** PRICE_DIGITS
+# 允许的最大价格：乘以 PRICE_SCALE 后仍是有限浮点数，换算整数单位不会溢出
+MAX_PRICE = 1e300
+# 结算金额保留的小数位数
+CURRENCY_DIGITS = 2
+# 商品数不少于该值时使用数组计算
+VECTOR_THRESHOLD = 256
+
+ROUNDING_MODES = ("half_even", "half_up", "half_down", "down", "up")
+
+_FLOAT_EXACT = 2 ** 53
+_INT64_MAX = 2 ** 63 - 1
+
+
+def to_units(price):
+    """价格换算为整数单位，小数位超过 PRICE_DIGITS 时按银行家舍入（整数价格不经过浮点）"""
+    return round(price * PRICE_SCALE)
+
+
+def _sum_vector(prices, quantities):
+    """数组计算，可能溢出时返回 None"""
+    try:
+        p = np.asarray(prices, dtype=np.float64)
+        q = np.asarray(quantities, dtype=np.int64)
+    except OverflowError:
+        return None
+    # 与 round(price * PRICE_SCALE) 相同：同样的浮点乘法，同样的银行家舍入
+    units = np.rint(p * PRICE_SCALE)
+    if units.max() >= _FLOAT_EXACT:
+        # 超出浮点数能精确表示的整数范围，整数价格换算会有误差
+        return None
+    units = units.astype(np.int64)
+    if int(units.max()) * int(q.max()) * len(units) > _INT64_MAX:
+        return None
+    return int(np.dot(units, q))
+
+
+def sum_units(prices, quantities, vector_threshold=VECTOR_THRESHOLD):
+    """
+    计算 sum(价格 × 数量)，单位为 1 / PRICE_SCALE 元
+
+    prices 和 quantities 须已校验：价格为有限非负数，数量为非负整数
+    """
+    if np is not None and len(prices) >= vector_threshold:
+        result = _sum_vector(prices, quantities)
+        if result is not None:
+            return result
+    scale = PRICE_SCALE
+    return sum([round(p * scale) * q for p, q in zip(prices, quantities)])
+
+
+def round_units(units, rounding="half_even", digits=CURRENCY_DIGITS):
+    """
+    把整数单位舍入到 digits 位小数，返回以 10^-digits 元为单位的整数
+
+    rounding 取值：
+    - half_even：四舍六入五成双
+    - half_up：四舍五入（五远离零）
+    - half_down：五舍六入（五靠近零）
+    - down：直接截断（向零）
+    - up：有余数就进位（远离零）
+    """
+    if rounding not in ROUNDING_MODES:
+        raise ValueError(f"unknown rounding mode: {rounding}")
+    factor = 10 ** (PRICE_DIGITS - digits)
+    sign = -1 if units < 0 else 1
+    quotient, remainder = divmod(abs(units), factor)
+    if rounding == "up":
+        carry = remainder > 0
+    elif rounding == "down":
+        carry = False
+    else:
+        twice = remainder * 2
+        if twice != factor:
+            carry = twice > factor
+        elif rounding == "half_even":
+            carry = quotient % 2 == 1
+        else:
+            carry = rounding == "half_up"
+    return sign * (quotient + carry)
+
+
+def compute_total(prices, quantities, rounding="half_even", digits=CURRENCY_DIGITS):
+    """
+    计算总金额
+
+    返回 float，例如 41.97；整数部分很大时也是与精确结果最接近的浮点数
+    """
+    return round_units(sum_units(prices, quantities), rounding, digits) / 10 ** digits
+
+
+if __name__ == "__main__":
+    # 性能测试：python app/totals.py
+    import random
+    import time
+
+    def timed(func, *args):
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            result = func(*args)
+            best = min(best, time.perf_counter() - start)
+        return result, best
+
+    def float_loop(prices, quantities):
+        """原来的浮点累加，作为对照"""
+        total = 0.0
+        for price, quantity in zip(prices, quantities):
+            total += price * quantity
+        return round(total, 2)
+
+    rng = random.Random(0)
+    print(f"numpy: {'有' if np is not None else '无'}")
+    for n in (100, 256, 10_000, 1_000_000):
+        prices = [rng.randrange(1, 100_000) / 100 for _ in range(n)]
+        quantities = [rng.randrange(0, 50) for _ in range(n)]
+        old, t_old = timed(float_loop, prices, quantities)
+        scalar, t_scalar = timed(sum_units, prices, quantities, float("inf"))
+        vector, t_vector = timed(sum_units, prices, quantities, 0)
+        assert scalar == vector
+        print(f"{n:>9,} 件: 浮点循环 {t_old * 1000:8.2f}ms  整数逐个 {t_scalar * 1000:8.2f}ms  "
+              f"整数数组 {t_vector * 1000:8.2f}ms  总额 {round_units(scalar) / 100} (浮点 {old})")
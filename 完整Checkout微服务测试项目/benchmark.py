@@ -0,0 +1,309 @@
+"""
+Checkout微服务压测脚本
+在本机按不同购物车大小压测 /checkout，报告吞吐量、延迟分位数和峰值内存（JSON）。
+
+- 传输方式：inprocess 通过 Flask test_client() 直接调用应用，只测应用本身；
+  socket 在后台线程启动 HTTP 服务，客户端通过真实的 TCP 连接发送请求
+- 并发方式：thread 在当前进程内开多个线程；process 开多个进程（spawn），
+  inprocess 时每个进程各自加载一份应用，不受 GIL 限制
+- 默认关闭结果缓存（CHECKOUT_CACHE_SIZE=0），每次请求都真正计算；
+  每种大小生成几份不同的购物车轮流发送
+
+用法：
+    python benchmark.py --sizes 1,100,10000,100000 --workers 4 --duration 2 -o result.json
+    python benchmark.py --baseline result.json   # 与上次结果比较，有性能退化时退出码为 1
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+TRANSPORTS = ("inprocess", "socket")
+CONCURRENCY = ("thread", "process")
+DEFAULT_SIZES = (1, 10, 100, 1000, 10000, 100000)
+# 每种大小生成的不同购物车数
+CART_VARIANTS = 4
+
+
+def make_cart(n, rng):
+    """生成 n 件商品的购物车请求体（bytes）"""
+    items = [{"price": rng.randrange(1, 100000) / 100, "quantity": rng.randrange(1, 10)} for _ in range(n)]
+    return json.dumps({"items": items}).encode("utf-8")
+
+
+def percentile(sorted_values, p):
+    """最近秩法求分位数，sorted_values 须已排序且非空"""
+    rank = max(1, -(-len(sorted_values) * p // 100))  # 向上取整
+    return sorted_values[int(rank) - 1]
+
+
+def peak_rss_mb():
+    """当前进程到目前为止的峰值常驻内存（MB），不支持时返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def _load_app(cache):
+    """导入应用并按压测需要配置"""
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    from app.app import app
+    if not cache:
+        app.config["CHECKOUT_CACHE_SIZE"] = 0
+        app.extensions.pop("checkout_cache", None)
+    return app
+
+
+def _make_sender(target, cache):
+    """返回 send(body) -> 状态码；target 为 None 时在进程内调用，否则为服务地址"""
+    if target is None:
+        client = _load_app(cache).test_client()
+
+        def send(body):
+            return client.post("/checkout", data=body, content_type="application/json").status_code
+    else:
+        import requests
+        session = requests.Session()
+        url = target + "/checkout"
+        headers = {"Content-Type": "application/json"}
+
+        def send(body):
+            return session.post(url, data=body, headers=headers).status_code
+    return send
+
+
+def _run_worker(barrier, target, bodies, duration, warmup, cache, offset):
+    """
+    一个并发客户端：预热后等所有客户端就绪，再持续发送 duration 秒
+
+    返回 {"latencies": [...], "errors": n, "started": t0, "finished": t1, "peak_rss_mb": ...}，
+    时间取 time.monotonic()，同一台机器上的各进程可以直接比较
+    """
+    send = _make_sender(target, cache)
+    for i in range(warmup):
+        send(bodies[i % len(bodies)])
+    barrier.wait()
+
+    latencies = []
+    errors = 0
+    clock = time.perf_counter
+    started = time.monotonic()
+    deadline = started + duration
+    i = offset
+    while True:
+        body = bodies[i % len(bodies)]
+        i += 1
+        begin = clock()
+        status = send(body)
+        latencies.append(clock() - begin)
+        if status != 200:
+            errors += 1
+        if time.monotonic() >= deadline:
+            break
+    return {"latencies": latencies, "errors": errors, "started": started,
+            "finished": time.monotonic(), "peak_rss_mb": peak_rss_mb()}
+
+
+def _process_main(barrier, queue, *args):
+    """进程并发时子进程的入口"""
+    try:
+        queue.put(_run_worker(barrier, *args))
+    except BaseException as e:
+        barrier.abort()
+        queue.put({"failed": repr(e)})
+
+
+class _Server:
+    """在后台线程运行的 HTTP 服务"""
+
+    def __init__(self, cache):
+        from werkzeug.serving import make_server
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        self._server = make_server("127.0.0.1", 0, _load_app(cache), threaded=True)
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._thread.join()
+        self._server.server_close()
+
+
+def run_scenario(transport, concurrency, workers, bodies, duration, warmup=1, cache=False, target=None):
+    """
+    运行一个压测场景，返回结果字典
+
+    socket 传输时 target 为服务地址；thread 并发时所有客户端在当前进程内，
+    process 并发时每个客户端一个子进程
+    """
+    args = (None if transport == "inprocess" else target, bodies, duration, warmup, cache)
+    if concurrency == "thread":
+        barrier = threading.Barrier(workers)
+        with ThreadPoolExecutor(workers) as pool:
+            futures = [pool.submit(_run_worker, barrier, *args, offset) for offset in range(workers)]
+            outcomes = [future.result() for future in futures]
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        barrier = ctx.Barrier(workers)
+        queue = ctx.Queue()
+        processes = [ctx.Process(target=_process_main, args=(barrier, queue, *args, offset))
+                     for offset in range(workers)]
+        for process in processes:
+            process.start()
+        # 先取结果再 join，避免子进程因队列未取空而无法退出
+        outcomes = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+        failed = [o["failed"] for o in outcomes if "failed" in o]
+        if failed:
+            raise RuntimeError(f"worker failed: {failed[0]}")
+
+    latencies = sorted(latency for o in outcomes for latency in o["latencies"])
+    elapsed = max(o["finished"] for o in outcomes) - min(o["started"] for o in outcomes)
+    cart_items = len(json.loads(bodies[0])["items"])
+    result = {
+        "transport": transport,
+        "concurrency": concurrency,
+        "workers": workers,
+        "cart_items": cart_items,
+        "requests": len(latencies),
+        "errors": sum(o["errors"] for o in outcomes),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "items_per_s": round(len(latencies) * cart_items / elapsed),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3),
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3),
+        },
+        # 峰值是进程启动以来的最大值，场景按购物车从小到大运行时即为该场景的峰值
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if concurrency == "process":
+        worker_rss = [o["peak_rss_mb"] for o in outcomes if o["peak_rss_mb"] is not None]
+        result["worker_peak_rss_mb"] = max(worker_rss) if worker_rss else None
+    return result
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, transports=TRANSPORTS, concurrency=CONCURRENCY, workers=4,
+                  duration=2.0, warmup=1, cache=False, seed=0, log=None):
+    """按 传输方式 x 并发方式 x 购物车大小 依次运行所有场景，返回报告字典"""
+    rng = random.Random(seed)
+    carts = {n: [make_cart(n, rng) for _ in range(CART_VARIANTS)] for n in sorted(sizes)}
+    results = []
+    for transport in transports:
+        server = _Server(cache) if transport == "socket" else None
+        try:
+            for mode in concurrency:
+                for n, bodies in carts.items():
+                    result = run_scenario(transport, mode, workers, bodies, duration, warmup, cache,
+                                          server.url if server else None)
+                    results.append(result)
+                    if log:
+                        log(f"{transport:>9} {mode:>7} x{workers} {n:>7,} 件: "
+                            f"{result['throughput_rps']:>9.1f} req/s  p50 {result['latency_ms']['p50']:.2f}ms  "
+                            f"p99 {result['latency_ms']['p99']:.2f}ms  RSS {result['peak_rss_mb']}MB")
+        finally:
+            if server is not None:
+                server.stop()
+    return {
+        "config": {"sizes": sorted(sizes), "transports": list(transports), "concurrency": list(concurrency),
+                   "workers": workers, "duration_s": duration, "cache": cache, "seed": seed},
+        "environment": {"python": sys.version.split()[0], "platform": sys.platform, "cpus": os.cpu_count()},
+        "results": results,
+    }
+
+
+def _scenario_key(result):
+    return result["transport"], result["concurrency"], result["workers"], result["cart_items"]
+
+
+def compare(baseline, report, tolerance=0.2):
+    """
+    与基线报告比较，返回退化说明列表（空表示没有退化）
+
+    同一场景的吞吐量低于基线的 (1 - tolerance) 倍，或 p95 延迟高于基线的
+    (1 + tolerance) 倍时视为退化；基线中没有的场景不比较
+    """
+    base = {_scenario_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = base.get(_scenario_key(result))
+        if old is None:
+            continue
+        name = "{} {} x{} {} items".format(*_scenario_key(result))
+        if result["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {old['throughput_rps']} -> {result['throughput_rps']} req/s")
+        if result["latency_ms"]["p95"] > old["latency_ms"]["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old['latency_ms']['p95']} -> {result['latency_ms']['p95']} ms")
+        if result["errors"]:
+            regressions.append(f"{name}: {result['errors']} failed requests")
+    return regressions
+
+
+def main(argv=None):
+    import argparse
+
+    def choices(allowed):
+        def parse(value):
+            values = value.split(",")
+            for v in values:
+                if v not in allowed:
+                    raise argparse.ArgumentTypeError(f"must be one of {', '.join(allowed)}")
+            return values
+        return parse
+
+    parser = argparse.ArgumentParser(description="Checkout微服务压测")
+    parser.add_argument("--sizes", type=lambda v: [int(n) for n in v.split(",")], default=list(DEFAULT_SIZES),
+                        help="购物车商品数，逗号分隔")
+    parser.add_argument("--transport", type=choices(TRANSPORTS), default=list(TRANSPORTS), help="inprocess,socket")
+    parser.add_argument("--concurrency", type=choices(CONCURRENCY), default=list(CONCURRENCY), help="thread,process")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="并发客户端数")
+    parser.add_argument("-d", "--duration", type=float, default=2.0, help="每个场景持续的秒数")
+    parser.add_argument("--warmup", type=int, default=1, help="每个客户端预热请求数（不计入结果）")
+    parser.add_argument("--cache", action="store_true", help="保留结果缓存")
+    parser.add_argument("--seed", type=int, default=0, help="生成购物车的随机种子")
+    parser.add_argument("-o", "--output", help="报告写入该文件，默认输出到标准输出")
+    parser.add_argument("--baseline", help="与该基线报告比较，有退化时退出码为 1")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的退化比例")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.sizes, args.transport, args.concurrency, args.workers, args.duration,
+                           args.warmup, args.cache, args.seed, log=lambda line: print(line, file=sys.stderr))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+压测脚本测试
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from app.app import app as flask_app
+from benchmark import _Server, compare, make_cart, percentile, run_scenario
+
+
+@pytest.fixture
+def restore_config():
+    """压测会关闭结果缓存，结束后恢复，避免影响其他测试"""
+    size = flask_app.config["CHECKOUT_CACHE_SIZE"]
+    yield
+    flask_app.config["CHECKOUT_CACHE_SIZE"] = size
+    flask_app.extensions.pop("checkout_cache", None)
+
+
+def check_result(result, cart_items):
+    assert result["cart_items"] == cart_items
+    assert result["requests"] >= result["workers"] and result["errors"] == 0
+    latency = result["latency_ms"]
+    assert 0 < latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+    assert result["throughput_rps"] > 0
+
+
+class TestBenchmark:
+    """压测脚本测试类"""
+
+    def test_percentile(self):
+        """最近秩法分位数"""
+        values = list(range(1, 101))
+        assert [percentile(values, p) for p in (50, 95, 99, 100)] == [50, 95, 99, 100]
+        assert percentile([7], 99) == 7
+        assert percentile([1, 2, 3], 50) == 2
+
+    def test_compare(self):
+        """吞吐量下降或 p95 上升超过容差时报告退化"""
+        def report(rps, p95, errors=0):
+            return {"results": [{"transport": "inprocess", "concurrency": "thread", "workers": 4,
+                                 "cart_items": 100, "throughput_rps": rps, "errors": errors,
+                                 "latency_ms": {"p95": p95}}]}
+        baseline = report(1000, 10)
+        assert compare(baseline, report(900, 11)) == []
+        assert len(compare(baseline, report(700, 10))) == 1
+        assert len(compare(baseline, report(1000, 13))) == 1
+        assert len(compare(baseline, report(1000, 10, errors=1))) == 1
+        assert compare({"results": []}, report(1, 100)) == []
+
+    def test_run_scenarios(self, restore_config):
+        """进程内（线程和进程并发）和真实套接字三种场景都能跑通"""
+        rng = random.Random(0)
+        bodies = [make_cart(50, rng) for _ in range(2)]
+        check_result(run_scenario("inprocess", "thread", 2, bodies, 0.2), 50)
+        check_result(run_scenario("inprocess", "process", 2, bodies, 0.2), 50)
+        server = _Server(cache=False)
+        try:
+            check_result(run_scenario("socket", "thread", 2, bodies, 0.2, target=server.url), 50)
+        finally:
+            server.stop()
@@ -0,0 +1,111 @@
+"""
+购物车校验规则测试
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from app.cart_schema import ITEM_RULES, Rule, compile_validator, validate_items
+from app.totals import MAX_PRICE
+
+
+def reference(items):
+    """逐个按原来的规则检查，返回 (错误列表, 价格列, 数量列)"""
+    errors, prices, quantities = [], [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append((index, None, "each item must be an object"))
+            continue
+        price = item.get("price", 0.0)
+        quantity = item.get("quantity", 0)
+        price_ok = isinstance(price, (int, float)) and 0 <= price <= MAX_PRICE
+        quantity_ok = isinstance(quantity, int) and quantity >= 0
+        if not price_ok:
+            errors.append((index, "price", "price must be a non-negative number"))
+        if not quantity_ok:
+            errors.append((index, "quantity", "quantity must be a non-negative integer"))
+        if price_ok and quantity_ok:
+            prices.append(price)
+            quantities.append(quantity)
+    return errors, prices, quantities
+
+
+def run(items, start=0, max_errors=1000):
+    columns = ([], [])
+    errors = []
+    validate_items(items, start, columns, errors, max_errors)
+    return errors, columns[0], columns[1]
+
+
+class TestCartSchema:
+    """校验规则测试类"""
+
+    def test_valid_cart(self):
+        """合法购物车按列收集字段值，缺失字段取默认值"""
+        items = [{"price": 10.99, "quantity": 2}, {"price": 3, "quantity": 0}, {"quantity": 1}, {}]
+        assert run(items) == ([], [10.99, 3, 0.0, 0.0], [2, 0, 1, 0])
+        assert run([]) == ([], [], [])
+
+    def test_indexed_errors(self):
+        """一次检查整个购物车，报告每个错误的下标和字段"""
+        items = [{"price": 1, "quantity": 1}, "x", {"price": -1, "quantity": 2.5},
+                 {"price": float("nan")}, {"price": "1", "quantity": 1}]
+        errors, prices, quantities = run(items, start=100)
+        assert errors == [
+            (101, None, "each item must be an object"),
+            (102, "price", "price must be a non-negative number"),
+            (102, "quantity", "quantity must be a non-negative integer"),
+            (103, "price", "price must be a non-negative number"),
+            (104, "price", "price must be a non-negative number"),
+        ]
+        assert prices == [1] and quantities == [1]
+        assert run(items, start=100, max_errors=1)[0] == errors[:1]
+        assert run(items, start=100, max_errors=2)[0] == errors[:3]
+
+    def test_matches_reference(self):
+        """快速路径和逐个检查路径都与原来的规则一致"""
+        rng = random.Random(11)
+        values = [0, 1, 2.5, -1, -0.5, True, None, "1", float("inf"), float("nan"), 10 ** 400, 1e308,
+                  MAX_PRICE, 10 ** 300]
+        for _ in range(500):
+            items = []
+            for _ in range(rng.randrange(0, 6)):
+                if rng.random() < 0.05:
+                    items.append(rng.choice(["x", [], 1]))
+                    continue
+                item = {}
+                if rng.random() < 0.9:
+                    item["price"] = rng.choice(values) if rng.random() < 0.3 else rng.random() * 100
+                if rng.random() < 0.9:
+                    item["quantity"] = rng.choice(values) if rng.random() < 0.3 else rng.randrange(10)
+                items.append(item)
+            errors, prices, quantities = run(items)
+            expected = reference(items)
+            assert errors == expected[0]
+            assert [repr(p) for p in prices] == [repr(p) for p in expected[1]]
+            assert quantities == expected[2]
+        # 超过 MAX_PRICE 的价格换算整数单位会溢出，整列检查和逐个检查都拒绝
+        message = "price must be a non-negative number"
+        assert run([{"price": 1e303, "quantity": 1}] * 2)[0] == [(0, "price", message), (1, "price", message)]
+        assert run([{"price": 10 ** 400, "quantity": 1}, {"price": 0.5, "quantity": 1}])[0] == [(0, "price", message)]
+        assert run([{"price": MAX_PRICE, "quantity": 1}] * 2)[0] == []
+
+    def test_custom_rules(self):
+        """自定义规则"""
+        validate = compile_validator(ITEM_RULES + (Rule("weight", "number", 1, 1, "weight too small"),))
+        columns = ([], [], [])
+        errors = []
+        validate([{"price": 1, "quantity": 1, "weight": 0.5}, {"price": 1, "quantity": 1}],
+                 0, columns, errors, 10)
+        assert errors == [(0, "weight", "weight too small")]
+        assert columns == ([1], [1], [1])
+        assert "def validate" in validate.source
+        with pytest.raises(ValueError):
+            compile_validator((Rule("x", "string", 0, "", "bad"),))
@@ -0,0 +1,114 @@
+"""
+购物车会话测试
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from app.cart_sessions import (AmountTooLargeError, CartFullError, CartSessionStore, LineNotFoundError,
+                               SessionNotFoundError)
+from app.totals import sum_units, to_units
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCartSessions:
+    """购物车会话测试类"""
+
+    def test_incremental_total(self):
+        """随机增删改后，维护的总额与重新计算的结果一致"""
+        store = CartSessionStore()
+        cart_id = store.create()
+        rng = random.Random(2)
+        lines = {}
+        for _ in range(2000):
+            op = rng.random()
+            if op < 0.5 or not lines:
+                price, quantity = rng.randrange(0, 10000) / 100, rng.randrange(0, 10)
+                line_id, units, count = store.add_line(cart_id, price, quantity)
+                lines[line_id] = [price, quantity]
+                assert count == len(lines)
+            elif op < 0.8:
+                line_id = rng.choice(list(lines))
+                quantity = rng.randrange(0, 10)
+                store.update_line(cart_id, line_id, quantity=quantity)
+                lines[line_id][1] = quantity
+            else:
+                line_id = rng.choice(list(lines))
+                store.remove_line(cart_id, line_id)
+                del lines[line_id]
+        units, count = store.total(cart_id)
+        assert count == len(lines)
+        assert units == sum_units([p for p, _ in lines.values()], [q for _, q in lines.values()])
+
+    def test_errors(self):
+        """不存在的会话和行"""
+        store = CartSessionStore(max_lines=1)
+        cart_id = store.create()
+        line_id, units, count = store.add_line(cart_id, 1.5, 2)
+        assert (units, count) == (to_units(3), 1)
+        with pytest.raises(CartFullError):
+            store.add_line(cart_id, 1, 1)
+        with pytest.raises(SessionNotFoundError):
+            store.total("missing")
+        with pytest.raises(LineNotFoundError):
+            store.update_line(cart_id, line_id + 1, price=2)
+        assert store.remove_line(cart_id, line_id) == (0, 0)
+        with pytest.raises(LineNotFoundError):
+            store.remove_line(cart_id, line_id)
+        store.delete(cart_id)
+        with pytest.raises(SessionNotFoundError):
+            store.delete(cart_id)
+
+    def test_idle_eviction(self):
+        """空闲超时和超出数量上限的会话被淘汰，使用会刷新空闲时间"""
+        clock = FakeClock()
+        store = CartSessionStore(max_idle=10, max_sessions=3, clock=clock)
+        a = store.create()
+        clock.now = 5
+        b = store.create()
+        clock.now = 9
+        store.total(a)
+        clock.now = 16
+        assert store.total(a) == (0, 0)
+        with pytest.raises(SessionNotFoundError):
+            store.total(b)
+        ids = [store.create() for _ in range(3)]
+        assert len(store) == 3
+        with pytest.raises(SessionNotFoundError):
+            store.total(a)
+        assert store.total(ids[0]) == (0, 0)
+        assert store.evictions == 2
+
+    def test_amount_errors(self):
+        """价格换算溢出或总额超过上限时报错，购物车保持不变"""
+        store = CartSessionStore(max_units=to_units(100))
+        cart_id = store.create()
+        line_id, _, _ = store.add_line(cart_id, 10, 2)
+        for price, quantity in ((1e303, 1), (60, 2), (None, 11)):
+            with pytest.raises(AmountTooLargeError):
+                store.update_line(cart_id, line_id, price, quantity)
+            assert store.total(cart_id) == (to_units(20), 1)
+        for price, quantity in ((1e303, 1), (81, 1)):
+            with pytest.raises(AmountTooLargeError):
+                store.add_line(cart_id, price, quantity)
+        assert store.total(cart_id) == (to_units(20), 1)
+        # 修改后这一行用的是新价格
+        assert store.update_line(cart_id, line_id, price=40) == (to_units(80), 1)
+        assert store.total(cart_id) == (to_units(80), 1)
+        assert store.update_line(cart_id, line_id, quantity=1) == (to_units(40), 1)
@@ -0,0 +1,115 @@
+"""
+购物车流式解析测试
+"""
+
+import io
+import json
+import os
+import sys
+import tracemalloc
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from app.cart_stream import CartFormatError, iter_items
+
+
+def parse(body, chunk_size=7):
+    """用很小的块解析，覆盖各种块边界"""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return list(iter_items(io.BytesIO(body), chunk_size))
+
+
+class TestCartStream:
+    """流式解析测试类"""
+
+    def test_items_match_json_loads(self):
+        """与一次性解析结果一致，包括多字节字符和跨块的数字"""
+        payload = {
+            "note": {"text": "上海 ✓", "tags": [1, 2, {"x": None}]},
+            "items": [{"price": 123456.789, "quantity": 10 ** 12, "name": "商品😀"},
+                      {"price": 0, "quantity": 0}, "x", [], True],
+            "after": "tail",
+        }
+        body = json.dumps(payload, ensure_ascii=False)
+        for chunk_size in (1, 2, 3, 5, 64):
+            assert parse(body, chunk_size) == payload["items"]
+        assert parse(json.dumps(payload, indent=4)) == payload["items"]
+
+    def test_no_items(self):
+        """没有 items 字段或 items 为空数组"""
+        assert parse('{}') == []
+        assert parse('{"a": 1}') == []
+        assert parse(' { "items" : [ ] } ') == []
+
+    def test_errors(self):
+        """错误信息与一次性解析一致"""
+        cases = [
+            ('', "invalid json format"),
+            ('{"items": [1, 2', "invalid json format"),
+            ('{"items": [1 2]}', "invalid json format"),
+            ('{"items": []} x', "invalid json format"),
+            ('{"items": [], }', "invalid json format"),
+            ('[1, 2]', "invalid request format"),
+            ('"text"', "invalid request format"),
+            ('{"items": [], "items": []}', "invalid request format"),
+            ('{"items": "not a list"}', "items must be a list"),
+            ('{"items": null}', "items must be a list"),
+        ]
+        for body, message in cases:
+            with pytest.raises(CartFormatError) as info:
+                parse(body)
+            assert info.value.args[0] == message
+        with pytest.raises(CartFormatError):
+            list(iter_items(io.BytesIO(b'{"items": ["\xff"]}')))
+
+    def test_stop_early(self):
+        """消费方停止迭代后不再读取剩余请求体"""
+        body = io.BytesIO(b'{"items": [1, 2, 3' + b', 4' * 100000 + b']}')
+        items = iter_items(body, chunk_size=16)
+        assert next(items) == 1
+        items.close()
+        assert body.tell() < 100
+
+    def test_large_non_item_values(self):
+        """items 以外的大数组逐个元素跳过，内存不随其大小增长"""
+        meta = [{"id": i, "tags": ["a", "b"], "score": i / 7} for i in range(50000)]
+        cases = [
+            (json.dumps({"meta": meta, "items": [{"price": 1, "quantity": 2}]}), None),
+            (json.dumps(meta), "invalid request format"),
+            (json.dumps({"items": {"nested": [meta]}}), "items must be a list"),
+        ]
+        for body, message in cases:
+            body = body.encode("utf-8")
+            assert len(body) > 2 ** 21
+            tracemalloc.start()
+            try:
+                if message is None:
+                    assert list(iter_items(io.BytesIO(body))) == [{"price": 1, "quantity": 2}]
+                else:
+                    with pytest.raises(CartFormatError) as info:
+                        list(iter_items(io.BytesIO(body)))
+                    assert info.value.args[0] == message
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            assert peak < 2 ** 20
+
+    def test_fail_fast(self):
+        """第一个商品格式错误时立即报错，不再读取剩余请求体；单个值过大时报错"""
+        body = io.BytesIO(b'{"items": [{"price": 1.5, "quantity": 2x}' + b', {"price": 1}' * 100000 + b']}')
+        with pytest.raises(CartFormatError) as info:
+            list(iter_items(body, chunk_size=1024))
+        assert info.value.args[0] == "invalid json format"
+        assert body.tell() <= 1024
+        assert parse(json.dumps({"note": "x" * 5000, "items": [1]}), chunk_size=256) == [1]
+        with pytest.raises(CartFormatError) as info:
+            list(iter_items(io.BytesIO(json.dumps({"note": "x" * 5000}).encode()), 256, max_value=1000))
+        assert info.value.args[0] == "json value too large"
+        # 嵌套过深
+        with pytest.raises(CartFormatError):
+            parse('{"meta": ' + "[" * 10000 + "]" * 10000 + ', "items": []}', chunk_size=4096)
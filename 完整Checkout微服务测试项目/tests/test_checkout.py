@@ -8,6 +8,8 @@ import requests
 import json
 import sys
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加项目根目录到Python路径
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -286,6 +288,416 @@ class TestCheckoutService:
         assert result["total"] == expected_total
         
         print("✓ 大额订单场景测试通过")
+    
+    def test_checkout_stream_mode(self):
+        """
+        测试10：流式解析场景
+        描述：大请求体按流式解析，结果和错误信息与一次性解析一致
+        """
+        print("\n测试10：流式解析场景")
+        
+        payloads = [
+            {"items": [{"price": i * 0.1, "quantity": i} for i in range(1, 101)]},
+            {"items": []},
+            {"items": "not a list"},
+            {"items": [{"price": 1.0, "quantity": 1}, "not an object"]},
+            {"items": [{"price": -1.0, "quantity": 1}]},
+            {"items": [{"price": 10.00, "quantity": 2.5}]},
+            ["not an object"],
+        ]
+        bodies = [json.dumps(p) for p in payloads] + ['{"items": [{"price": 1}', "not json data"]
+        
+        threshold = flask_app.config["CHECKOUT_STREAM_THRESHOLD"]
+        try:
+            for body in bodies:
+                flask_app.config["CHECKOUT_STREAM_THRESHOLD"] = None
+                expected = self.client.post("/checkout", data=body, content_type='application/json')
+                flask_app.config["CHECKOUT_STREAM_THRESHOLD"] = 0
+                response = self.client.post("/checkout", data=body, content_type='application/json')
+                assert response.status_code == expected.status_code
+                assert response.get_json() == expected.get_json()
+            
+            # 第一个商品不合法时立即返回，后面的请求体不会被解析
+            body = '{"items": [{"price": -1, "quantity": 1}, ' + '{"price": 1, "quantity": 1}, ' * 100000
+            response = self.client.post("/checkout", data=body, content_type='application/json')
+            assert response.status_code == 400
+            assert response.get_json()["error"] == "price must be a non-negative number"
+        finally:
+            flask_app.config["CHECKOUT_STREAM_THRESHOLD"] = threshold
+        
+        print("✓ 流式解析场景测试通过")
+    
+    def test_checkout_exact_total(self):
+        """
+        测试11：整数精确累加场景
+        描述：大量小额商品累加没有浮点误差，NaN 和无穷大价格被拒绝
+        """
+        print("\n测试11：整数精确累加场景")
+        
+        payload = {"items": [{"price": 0.01, "quantity": 1}] * 100000 + [{"price": 0.1, "quantity": 3}]}
+        response = self.client.post(
+            "/checkout",
+            data=json.dumps(payload),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        assert response.get_json()["total"] == 1000.30
+        
+        for price in ("NaN", "Infinity"):
+            response = self.client.post(
+                "/checkout",
+                data='{"items": [{"price": %s, "quantity": 1}]}' % price,
+                content_type='application/json'
+            )
+            assert response.status_code == 400
+            assert response.get_json()["error"] == "price must be a non-negative number"
+        
+        print("✓ 整数精确累加场景测试通过")
+    
+    def test_checkout_batch(self):
+        """
+        测试12：批量结算场景
+        描述：每个购物车的结果与单独调用 /checkout 一致，整体格式错误返回400
+        """
+        print("\n测试12：批量结算场景")
+        
+        carts = [
+            {"items": [{"price": 10.99, "quantity": 2}, {"price": 5.99, "quantity": 1}]},
+            {"items": []},
+            {"items": "not a list"},
+            {"items": ["not an object"]},
+            {"items": [{"price": -10.00, "quantity": 1}]},
+            {"items": [{"price": 10.00, "quantity": 2.5}]},
+            "not an object",
+            {"items": [{"price": i * 0.1, "quantity": i} for i in range(1, 101)]},
+        ]
+        response = self.client.post(
+            "/checkout/batch",
+            data=json.dumps({"carts": carts}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        result = response.get_json()
+        assert result["status"] == "ok"
+        assert len(result["results"]) == len(carts)
+        for cart, item in zip(carts, result["results"]):
+            single = self.client.post("/checkout", data=json.dumps(cart), content_type='application/json')
+            assert item == single.get_json()
+        
+        for body, error in [("not json data", "invalid json format"),
+                            (json.dumps([]), "invalid request format"),
+                            (json.dumps({"carts": {}}), "carts must be a list"),
+                            (json.dumps({"carts": []}), "empty batch"),
+                            (json.dumps({"carts": [{"items": []}] * 10001}), "too many carts (max 10000)")]:
+            response = self.client.post("/checkout/batch", data=body, content_type='application/json')
+            assert response.status_code == 400
+            assert response.get_json()["error"] == error
+        
+        print("✓ 批量结算场景测试通过")
+    
+    def test_checkout_result_cache(self):
+        """
+        测试13：结果缓存场景
+        描述：字节相同的重复请求命中缓存，结果与首次计算一致
+        """
+        print("\n测试13：结果缓存场景")
+        
+        flask_app.extensions.pop("checkout_cache", None)
+        bodies = [json.dumps({"items": [{"price": 10.99, "quantity": 3}]}),
+                  json.dumps({"items": [{"price": -1, "quantity": 1}]})]
+        first = [self.client.post("/checkout", data=b, content_type='application/json') for b in bodies]
+        again = [self.client.post("/checkout", data=b, content_type='application/json') for b in bodies]
+        for a, b in zip(first, again):
+            assert a.status_code == b.status_code
+            assert a.get_json() == b.get_json()
+        assert again[0].get_json()["total"] == 32.97
+        
+        stats = self.client.get("/checkout/cache").get_json()
+        assert stats["enabled"] == True
+        assert stats["hits"] == 2 and stats["misses"] == 2
+        
+        # 舍入方式不同时不能复用缓存
+        flask_app.config["CHECKOUT_ROUNDING"] = "up"
+        try:
+            self.client.post("/checkout", data=bodies[0], content_type='application/json')
+        finally:
+            flask_app.config["CHECKOUT_ROUNDING"] = "half_even"
+        assert self.client.get("/checkout/cache").get_json()["misses"] == 3
+        
+        # 最多报告的错误数不同时，400 响应不能复用缓存
+        bad = json.dumps({"items": [{"price": -1, "quantity": 1}, {"price": -2, "quantity": 1}]})
+        assert len(self.client.post("/checkout", data=bad, content_type='application/json')
+                   .get_json()["errors"]) == 2
+        flask_app.config["CHECKOUT_MAX_ERRORS"] = 1
+        try:
+            response = self.client.post("/checkout", data=bad, content_type='application/json')
+        finally:
+            flask_app.config["CHECKOUT_MAX_ERRORS"] = 100
+        assert len(response.get_json()["errors"]) == 1
+        assert self.client.get("/checkout/cache").get_json()["misses"] == 5
+        
+        print("✓ 结果缓存场景测试通过")
+    
+    def test_checkout_indexed_errors(self):
+        """
+        测试14：错误定位场景
+        描述：一次返回所有不合法商品的下标和字段，error 仍为第一个错误
+        """
+        print("\n测试14：错误定位场景")
+        
+        items = [{"price": 1.0, "quantity": 1}] * 5000
+        items[3] = {"price": -1.0, "quantity": 1}
+        items[4500] = {"price": 2.0, "quantity": 2.5}
+        response = self.client.post(
+            "/checkout",
+            data=json.dumps({"items": items}),
+            content_type='application/json'
+        )
+        assert response.status_code == 400
+        result = response.get_json()
+        assert result["error"] == "price must be a non-negative number"
+        assert result["errors"] == [
+            {"index": 3, "field": "price", "error": "price must be a non-negative number"},
+            {"index": 4500, "field": "quantity", "error": "quantity must be a non-negative integer"},
+        ]
+        
+        print("✓ 错误定位场景测试通过")
+    
+    def test_cart_session(self):
+        """
+        测试15：购物车会话场景
+        描述：逐行增删改后结算，结果与一次性结算相同
+        """
+        print("\n测试15：购物车会话场景")
+        
+        response = self.client.post("/carts")
+        assert response.status_code == 201
+        cart_id = response.get_json()["cart_id"]
+        assert self.client.post(f"/carts/{cart_id}/checkout").get_json()["error"] == "empty cart"
+        
+        def post_line(price, quantity):
+            return self.client.post(f"/carts/{cart_id}/lines",
+                                    data=json.dumps({"price": price, "quantity": quantity}),
+                                    content_type='application/json')
+        
+        first = post_line(10.99, 2).get_json()["line_id"]
+        second = post_line(5.99, 1).get_json()["line_id"]
+        result = post_line(3.50, 4).get_json()
+        assert result["total"] == 41.97 and result["lines"] == 3
+        
+        response = self.client.put(f"/carts/{cart_id}/lines/{first}",
+                                   data=json.dumps({"quantity": 3}), content_type='application/json')
+        assert response.get_json()["total"] == 52.96
+        response = self.client.delete(f"/carts/{cart_id}/lines/{second}")
+        assert response.get_json()["total"] == 46.97
+        
+        response = self.client.post(f"/carts/{cart_id}/checkout")
+        assert response.status_code == 200
+        assert response.get_json() == {"total": 46.97, "status": "ok"}
+        
+        # 校验与 /checkout 相同
+        response = post_line(-1, 1)
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "price must be a non-negative number"
+        response = self.client.put(f"/carts/{cart_id}/lines/{first}",
+                                   data=json.dumps({"quantity": 2.5}), content_type='application/json')
+        assert response.get_json()["errors"] == [{"field": "quantity",
+                                                  "error": "quantity must be a non-negative integer"}]
+        
+        # 超大价格和总额返回 JSON 错误，购物车保持不变
+        response = post_line(1e303, 1)
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "price must be a non-negative number"
+        response = post_line(1e300, 10 ** 12)
+        assert response.status_code == 400
+        assert response.get_json() == {"error": "total too large"}
+        response = self.client.put(f"/carts/{cart_id}/lines/{first}",
+                                   data=json.dumps({"price": 1e300, "quantity": 10 ** 12}),
+                                   content_type='application/json')
+        assert response.get_json() == {"error": "total too large"}
+        assert self.client.post(f"/carts/{cart_id}/checkout").get_json()["total"] == 46.97
+        
+        assert self.client.delete(f"/carts/{cart_id}/lines/{second}").status_code == 404
+        assert self.client.delete(f"/carts/{cart_id}").status_code == 200
+        response = self.client.post(f"/carts/{cart_id}/checkout")
+        assert response.status_code == 404
+        assert response.get_json()["error"] == "cart not found"
+        
+        print("✓ 购物车会话场景测试通过")
+    
+    def test_checkout_quote(self, monkeypatch):
+        """
+        测试16：服务端定价场景
+        描述：按价目表计算价格、促销和税额，重新加载价目表后使用新价格
+        """
+        print("\n测试16：服务端定价场景")
+        
+        def quote(items):
+            return self.client.post("/checkout/quote", data=json.dumps({"items": items}),
+                                    content_type='application/json')
+        
+        def load(catalog, token="secret"):
+            headers = {"Authorization": f"Bearer {token}"} if token else {}
+            return self.client.put("/catalog", data=json.dumps(catalog), content_type='application/json',
+                                   headers=headers)
+        
+        flask_app.extensions.pop("price_catalog", None)
+        response = quote([{"sku": "A1", "quantity": 1}])
+        assert response.status_code == 503
+        assert self.client.get("/catalog").status_code == 404
+        
+        # 未配置管理令牌时不能通过接口修改价目表，令牌不对时拒绝
+        monkeypatch.setitem(flask_app.config, "CHECKOUT_CATALOG_ADMIN_TOKEN", None)
+        assert load({"skus": {}}).status_code == 403
+        monkeypatch.setitem(flask_app.config, "CHECKOUT_CATALOG_ADMIN_TOKEN", "secret")
+        assert load({"skus": {}}, token="wrong").status_code == 401
+        assert load({"skus": {}}, token=None).get_json() == {"error": "unauthorized"}
+        assert self.client.get("/catalog").status_code == 404
+        
+        catalog = {
+            "skus": {"A1": {"price": 10.99, "category": "books"}, "B2": {"price": 5.00}},
+            "promotions": [
+                {"type": "percent", "value": 10, "categories": ["books"]},
+                {"type": "amount", "value": 0.5, "skus": ["B2"], "min_quantity": 10},
+            ],
+            "taxes": [{"rate": 0.06, "categories": ["books"]}],
+            "default_tax": 0.13,
+        }
+        response = load(catalog)
+        assert response.status_code == 200
+        assert response.get_json() == {"version": 1, "skus": 2, "status": "ok"}
+        
+        # 客户端传来的价格被忽略
+        response = quote([{"sku": "A1", "quantity": 2, "price": 0.01}, {"sku": "B2", "quantity": 1}])
+        assert response.status_code == 200
+        assert response.get_json() == {"subtotal": 26.98, "discount": 2.2, "tax": 1.84, "total": 26.62,
+                                       "catalog_version": 1, "status": "ok"}
+        # 数量达到下限后的分档价格
+        result = quote([{"sku": "B2", "quantity": 10}]).get_json()
+        assert (result["subtotal"], result["discount"], result["tax"], result["total"]) == (50.0, 5.0, 5.85, 50.85)
+        
+        response = quote([{"sku": "A1", "quantity": 1}, {"sku": "C3", "quantity": -1}])
+        assert response.status_code == 400
+        assert response.get_json()["errors"] == [
+            {"index": 1, "field": "sku", "error": "unknown sku"},
+            {"index": 1, "field": "quantity", "error": "quantity must be a non-negative integer"},
+        ]
+        assert quote([]).get_json()["error"] == "empty cart"
+        
+        # 格式错误的价目表返回 JSON 错误，不影响当前价目表
+        response = load({"skus": {"A1": {"price": -1}}})
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "price of sku A1 must be a non-negative number"
+        for bad in ({"skus": {"A1": {"price": 1e303}}},
+                    {"skus": {"A1": {"price": 1, "category": []}}},
+                    {"skus": {"A1": {"price": 1}}, "promotions": [{"type": "amount", "value": 1, "skus": [{}]}]}):
+            response = load(bad)
+            assert response.status_code == 400
+            assert "error" in response.get_json()
+        assert self.client.get("/catalog").get_json()["version"] == 1
+        response = quote([{"sku": "A1", "quantity": 10 ** 310}])
+        assert response.status_code == 400
+        assert response.get_json() == {"error": "total too large"}
+        catalog["skus"]["A1"]["price"] = 20.0
+        assert load(catalog).get_json()["version"] == 2
+        result = quote([{"sku": "A1", "quantity": 1}]).get_json()
+        assert (result["total"], result["catalog_version"]) == (19.08, 2)
+        assert self.client.get("/catalog").get_json() == {"version": 2, "skus": 2, "status": "ok"}
+        
+        
+        # 并发的第一批请求只创建一份价目表，不会丢失其中的加载
+        flask_app.extensions.pop("price_catalog", None)
+        barrier = threading.Barrier(8)
+        
+        def first_use():
+            barrier.wait()
+            return sys.modules["app.app"]._get_catalog()
+        
+        with ThreadPoolExecutor(8) as pool:
+            catalogs = list(pool.map(lambda _: first_use(), range(8)))
+        assert all(c is catalogs[0] for c in catalogs)
+        
+        print("✓ 服务端定价场景测试通过")
+    
+    def test_checkout_huge_price(self):
+        """
+        测试17：超大价格场景
+        描述：换算整数单位会溢出的价格返回 400 而不是 500
+        """
+        print("\n测试17：超大价格场景")
+        
+        # 逐个检查和整列检查（商品较多时）两条路径
+        huge = {"price": 1e303, "quantity": 1}
+        for items in ([huge], [{"price": 1.0, "quantity": 1}] + [huge] * 300):
+            response = self.client.post("/checkout", data=json.dumps({"items": items}),
+                                        content_type='application/json')
+            assert response.status_code == 400
+            assert response.get_json()["error"] == "price must be a non-negative number"
+        
+        payload = {"items": [{"price": 1e300, "quantity": 10 ** 12}]}
+        response = self.client.post("/checkout", data=json.dumps(payload), content_type='application/json')
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "total too large"
+        
+        print("✓ 超大价格场景测试通过")
+    
+    def test_checkout_batch_isolation(self, monkeypatch):
+        """
+        测试18：批量结算隔离场景
+        描述：某个购物车处理时抛出异常，只影响该购物车的结果
+        """
+        print("\n测试18：批量结算隔离场景")
+        
+        price_cart = sys.modules["app.app"]._price_cart
+        
+        def failing(cart):
+            if cart.get("fail"):
+                raise RuntimeError("boom")
+            return price_cart(cart)
+        
+        monkeypatch.setattr("app.app._price_cart", failing)
+        payload = {"carts": [
+            {"items": [{"price": 10.99, "quantity": 2}]},
+            {"items": [{"price": 1, "quantity": 1}], "fail": True},
+            {"items": [{"price": 1e303, "quantity": 1}]},
+            {"items": [{"price": 5.99, "quantity": 1}]},
+        ]}
+        response = self.client.post("/checkout/batch", data=json.dumps(payload),
+                                    content_type='application/json')
+        assert response.status_code == 200
+        results = response.get_json()["results"]
+        assert results[0] == {"total": 21.98, "status": "ok"}
+        assert results[1] == {"error": "internal server error: boom"}
+        assert results[2]["error"] == "price must be a non-negative number"
+        assert results[3] == {"total": 5.99, "status": "ok"}
+        
+        print("✓ 批量结算隔离场景测试通过")
+    
+    def test_cart_session_internal_error(self, monkeypatch):
+        """
+        测试19：购物车会话内部错误场景
+        描述：会话存储抛出意外异常时返回 JSON 500，会话不存在仍返回 404
+        """
+        print("\n测试19：购物车会话内部错误场景")
+        
+        cart_id = self.client.post("/carts").get_json()["cart_id"]
+        sessions = sys.modules["app.app"]._get_sessions()
+        
+        def broken(*args, **kwargs):
+            raise RuntimeError("boom")
+        
+        monkeypatch.setattr(sessions, "add_line", broken)
+        response = self.client.post(f"/carts/{cart_id}/lines", data=json.dumps({"price": 1, "quantity": 1}),
+                                    content_type='application/json')
+        assert response.status_code == 500
+        assert response.get_json() == {"error": "internal server error: boom"}
+        
+        response = self.client.delete(f"/carts/{cart_id}/lines/1")
+        assert response.status_code == 404
+        assert response.get_json() == {"error": "line not found"}
+        assert self.client.post("/carts/missing/checkout").get_json() == {"error": "cart not found"}
+        
+        print("✓ 购物车会话内部错误场景测试通过")
 
 if __name__ == "__main__":
     """运行测试"""
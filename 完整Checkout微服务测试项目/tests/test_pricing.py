@@ -0,0 +1,142 @@
+"""
+服务端定价测试
+"""
+
+import os
+import random
+import sys
+import threading
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from app.pricing import CatalogError, PriceBook, PriceCatalog
+from app.totals import round_units, to_units
+
+CATALOG = {
+    "skus": {
+        "A1": {"price": 10.99, "category": "books"},
+        "B2": {"price": 5.00, "category": "food"},
+        "C3": {"price": 0.30},
+    },
+    "promotions": [
+        {"type": "percent", "value": 10, "categories": ["books"]},
+        {"type": "amount", "value": 0.5, "skus": ["B2", "C3"], "min_quantity": 10},
+        {"type": "percent", "value": 12.5, "min_quantity": 100},
+    ],
+    "taxes": [{"rate": 0.06, "categories": ["books", "food"]}],
+    "default_tax": 0.13,
+}
+
+
+def reference(catalog, items):
+    """逐行按原始规则计算，返回 (原价合计, 折后合计, 税额)，作为对照"""
+    subtotal = net = tax = 0
+    for item in items:
+        info = catalog["skus"][item["sku"]]
+        quantity = item["quantity"]
+        unit = to_units(info["price"])
+        subtotal += unit * quantity
+        for rule in catalog["promotions"]:
+            targeted = "skus" in rule or "categories" in rule
+            if targeted and item["sku"] not in rule.get("skus", ()) \
+                    and info.get("category") not in rule.get("categories", ()):
+                continue
+            if quantity < rule.get("min_quantity", 0):
+                continue
+            if rule["type"] == "percent":
+                unit = round_units(unit * (to_units(100) - to_units(rule["value"])), "half_even", -2)
+            else:
+                unit = max(0, unit - to_units(rule["value"]))
+        rate = next((t["rate"] for t in catalog["taxes"] if info.get("category") in t["categories"]),
+                    catalog["default_tax"])
+        net += unit * quantity
+        tax += unit * quantity * to_units(rate)
+    return subtotal, net, round_units(tax, "half_even", 0)
+
+
+class TestPricing:
+    """服务端定价测试类"""
+
+    def test_quote(self):
+        """促销叠加、数量分档和按分类的税率"""
+        book = PriceBook(CATALOG)
+        amounts, errors = book.quote([{"sku": "A1", "quantity": 2}, {"sku": "B2", "quantity": 10}])
+        assert errors == []
+        # A1: 10.99 * 0.9 = 9.891；B2 满 10 件每件减 0.5；税率都是 6%
+        assert amounts == (to_units(71.98), to_units(64.782), to_units(3.88692))
+        # 满 100 件再打 87.5 折，C3 减价后 0.3 - 0.5 不低于 0
+        amounts, _ = book.quote([{"sku": "B2", "quantity": 100}, {"sku": "C3", "quantity": 100}])
+        assert amounts[1] == to_units(393.75)
+
+    def test_matches_reference(self):
+        """编译后的查找表与逐行按规则计算的结果一致"""
+        book = PriceBook(CATALOG)
+        rng = random.Random(5)
+        for _ in range(200):
+            items = [{"sku": rng.choice("A1 B2 C3".split()), "quantity": rng.choice([0, 1, 9, 10, 99, 100, 1000])}
+                     for _ in range(rng.randrange(1, 20))]
+            assert book.quote(items) == (reference(CATALOG, items), [])
+
+    def test_errors(self):
+        """未知 SKU、数量不合法和格式错误的价目表"""
+        book = PriceBook(CATALOG)
+        items = [{"sku": "A1", "quantity": 1}, "x", {"sku": "Z9", "quantity": 1.5}, {"sku": ["A1"]}]
+        assert book.quote(items) == (None, [
+            (1, None, "each item must be an object"),
+            (2, "sku", "unknown sku"),
+            (2, "quantity", "quantity must be a non-negative integer"),
+            (3, "sku", "unknown sku"),
+        ])
+        assert book.quote(items, max_errors=2)[1] == [(1, None, "each item must be an object"),
+                                                      (2, "sku", "unknown sku"),
+                                                      (2, "quantity", "quantity must be a non-negative integer")]
+        for catalog in ({}, {"skus": {"A": {"price": "1"}}}, {"skus": {}, "promotions": [{"type": "gift"}]},
+                        {"skus": {}, "promotions": [{"type": "percent", "value": 150}]},
+                        {"skus": {}, "promotions": [{"type": "amount", "value": 1, "min_quantity": -1}]},
+                        {"skus": {}, "taxes": [{"rate": float("nan")}]},
+                        {"skus": {}, "promotions": [{"type": "amount", "value": 1, "skus": "A"}]},
+                        # 换算整数单位会溢出的价格、不可哈希的分类和范围
+                        {"skus": {"A": {"price": 1e303}}},
+                        {"skus": {"A": {"price": 1, "category": []}}},
+                        {"skus": {"A": {"price": 1}}, "promotions": [{"type": "amount", "value": 1, "skus": [{}]}]},
+                        {"skus": {"A": {"price": 1}}, "taxes": [{"rate": 1e303}]},
+                        {"skus": {"A": {"price": 1}}, "promotions": [{"type": "amount", "value": 1e303}]}):
+            with pytest.raises(CatalogError):
+                PriceBook(catalog)
+
+    def test_hot_swap(self):
+        """重新加载时读取方始终拿到完整的价目表，格式错误时旧表不变"""
+        catalog = PriceCatalog()
+        assert catalog.book is None
+        assert catalog.load({"skus": {"A": {"price": 1}}}) == 1
+        with pytest.raises(CatalogError):
+            catalog.load({"skus": {"A": {"price": -1}}})
+        assert catalog.book.version == 1
+
+        stop = threading.Event()
+        seen = set()
+
+        def reader():
+            while not stop.is_set():
+                book = catalog.book
+                amounts, _ = book.quote([{"sku": "A", "quantity": 1}, {"sku": "B", "quantity": 1}]
+                                        if "B" in book else [{"sku": "A", "quantity": 1}])
+                seen.add((book.version, amounts[0]))
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        for version in range(2, 50):
+            skus = {"A": {"price": version}}
+            if version % 2:
+                skus["B"] = {"price": version}
+            assert catalog.load({"skus": skus}) == version
+        stop.set()
+        thread.join()
+        # 每个版本的金额只能来自同一份价目表
+        for version, subtotal in seen:
+            expected = to_units(1) if version == 1 else to_units(version) * (2 if version % 2 else 1)
+            assert subtotal == expected
@@ -0,0 +1,84 @@
+"""
+结算结果缓存测试
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from app.result_cache import ResultCache, content_key
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResultCache:
+    """结果缓存测试类"""
+
+    def test_content_key(self):
+        """相同内容和参数得到相同的键"""
+        assert content_key(b'{"items": []}', "half_even") == content_key(b'{"items": []}', "half_even")
+        assert content_key(b'{"items": []}', "half_even") != content_key(b'{"items": []}', "half_up")
+        assert content_key(b'{"items": []}') != content_key(b'{"items":[]}')
+        assert len(content_key(b"")) == 16
+
+    def test_lru_eviction(self):
+        """超出容量时淘汰最久未使用的条目"""
+        cache = ResultCache(max_entries=2, ttl=None)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        stats = cache.stats()
+        assert stats["hits"] == 3 and stats["misses"] == 1 and stats["evictions"] == 1
+        assert stats["size"] == 2
+        with pytest.raises(ValueError):
+            ResultCache(max_entries=0)
+
+    def test_ttl(self):
+        """超过有效期的条目失效"""
+        clock = FakeClock()
+        cache = ResultCache(max_entries=10, ttl=5, clock=clock)
+        cache.put("a", 1)
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5.0
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+        assert len(cache) == 0
+        cache.clear()
+        assert cache.stats()["hits"] == 0
+
+    def test_threads(self):
+        """多线程并发读写时计数一致、容量不超限"""
+        cache = ResultCache(max_entries=50, ttl=None)
+
+        def worker(offset):
+            for i in range(2000):
+                key = (i + offset) % 80
+                if cache.get(key) is None:
+                    cache.put(key, key)
+
+        threads = [threading.Thread(target=worker, args=(n * 7,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        assert stats["hits"] + stats["misses"] == 8 * 2000
+        assert stats["size"] <= 50
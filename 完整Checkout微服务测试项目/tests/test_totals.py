@@ -0,0 +1,65 @@
+"""
+金额计算测试
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from app import totals
+from app.totals import compute_total, round_units, sum_units, to_units
+
+
+class TestTotals:
+    """金额计算测试类"""
+
+    def test_exact_sum(self):
+        """浮点累加会产生误差的用例，整数累加结果精确"""
+        assert compute_total([0.1, 0.2], [3, 2]) == 0.7
+        assert compute_total([0.01] * 100_000, [1] * 100_000) == 1000.0
+        assert compute_total([10.99, 5.99, 3.50], [2, 1, 4]) == 41.97
+        assert sum_units([1.1], [3]) == 3_300_000
+        assert to_units(19.99) == 19_990_000
+        assert to_units(10 ** 20) == 10 ** 26
+
+    def test_rounding_modes(self):
+        """各种舍入方式"""
+        cases = {
+            # 单位：百万分之一元，舍入到分
+            "half_even": [(15_000, 2), (25_000, 2), (25_001, 3), (14_999, 1)],
+            "half_up": [(15_000, 2), (25_000, 3), (14_999, 1)],
+            "half_down": [(15_000, 1), (15_001, 2), (25_000, 2)],
+            "down": [(19_999, 1), (10_000, 1)],
+            "up": [(10_001, 2), (10_000, 1)],
+        }
+        for mode, pairs in cases.items():
+            for units, cents in pairs:
+                assert round_units(units, mode) == cents
+                assert round_units(-units, mode) == -cents
+        assert compute_total([0.125], [1], "half_up") == 0.13
+        assert compute_total([0.125], [1], "half_even") == 0.12
+        with pytest.raises(ValueError):
+            round_units(1, "nearest")
+
+    @pytest.mark.skipif(totals.np is None, reason="numpy 未安装")
+    def test_vector_matches_scalar(self):
+        """数组计算与逐个计算结果完全一致，可能溢出时回退"""
+        rng = random.Random(5)
+        for _ in range(20):
+            n = rng.randrange(1, 3000)
+            prices = [rng.choice([rng.randrange(0, 10 ** 6) / 100, rng.random() * 1000,
+                                  rng.randrange(0, 1000), 1e-7 * rng.randrange(100)])
+                      for _ in range(n)]
+            quantities = [rng.randrange(0, 10 ** rng.randrange(1, 7)) for _ in range(n)]
+            assert sum_units(prices, quantities, 0) == sum_units(prices, quantities, float("inf"))
+        # 超出 int64 或浮点精确范围时回退到逐个计算
+        for prices, quantities in (([10 ** 20, 1], [1, 1]), ([1e9, 1.5], [10 ** 12, 1]),
+                                   ([1.5, 2.5], [2 ** 70, 1])):
+            expected = sum(to_units(p) * q for p, q in zip(prices, quantities))
+            assert sum_units(prices, quantities, 0) == expected